@@ -2,27 +2,93 @@ import sys
 import serial
 import threading
 import time
+from collections import deque
+from pathlib import Path
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel,
-    QTableWidget, QTableWidgetItem, QHeaderView
+    QTableView, QHeaderView
 )
-from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QTimer, Qt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+from buffer_circular import BufferCircular
+from grabador import GrabadorTelemetria
+from protocolo import crear_decodificador
+
 # --- CONFIGURACIÓN SERIAL ---
 PORT = 'COM3'     # Cambia según tu puerto
 BAUD = 115200
+PROTOCOLO = 'ascii'          # 'ascii' (líneas "sp,pv") o 'binario' (MODO_BINARIO = 1 en el sketch)
+PERIODO_MUESTREO = 0.05      # s, igual a `interval` del sketch (tiempo de cada trama binaria
+                             # y separación de las muestras ASCII que llegan en una misma lectura)
 
 # --- LÍMITES DEL GRÁFICO Y TABLA ---
 MAX_POINTS = 200
 MAX_ROWS = 30
 
+# Cola entre el hilo serial y la GUI (si la GUI se atrasa, se descartan las más viejas)
+MAX_PENDIENTES = 100000
+
+# --- GRABACIÓN DE LA SESIÓN (todas las muestras, no solo las visibles) ---
+GRABAR = False              # True: cada sesión se graba en GRABACIONES_DIR (no versionado)
+GRABACIONES_DIR = Path(__file__).resolve().parent / "grabaciones"
+
 # --- CONFIG GRÁFICO ---
 AUTO_Y_SCALING = True
 Y_MIN_INIT = 0
 Y_MAX_INIT = 60
 
+# Solo se redibujan los ejes si el límite Y cambia más que esta fracción del rango
+TOLERANCIA_EJE_Y = 0.05
+# Al llenarse el eje X se deja este margen libre (fracción de la ventana) antes del próximo salto
+MARGEN_EJE_X = 0.25
+
+class ModeloMuestras(QAbstractTableModel):
+    # Tabla virtual sobre el historial: fila 0 = muestra más reciente.
+    # Qt pide solo las celdas visibles; no se crean items por muestra.
+    ENCABEZADOS = ["Setpoint (RPM)", "RPM medida", "Error"]
+
+    def __init__(self, historial, max_filas):
+        super().__init__()
+        self.historial = historial
+        self.max_filas = max_filas
+        self.filas = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.filas
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        _, sp, pv = self.historial.vista()[:, -1 - index.row()]
+        valor = (sp, pv, sp - pv)[index.column()]
+        return f"{valor:.2f}"
+
+    def headerData(self, seccion, orientacion, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientacion == Qt.Horizontal:
+            return self.ENCABEZADOS[seccion]
+        return super().headerData(seccion, orientacion, role)
+
+    def refrescar(self):
+        filas = min(len(self.historial), self.max_filas)
+        if filas > self.filas:
+            self.beginInsertRows(QModelIndex(), self.filas, filas - 1)
+            self.filas = filas
+            self.endInsertRows()
+        elif filas < self.filas:
+            self.beginResetModel()
+            self.filas = filas
+            self.endResetModel()
+        if self.filas:
+            self.dataChanged.emit(self.index(0, 0), self.index(self.filas - 1, 2))
+
+
 class MotorMonitor(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -30,18 +96,26 @@ class MotorMonitor(QMainWindow):
         self.setGeometry(100, 100, 900, 600)
 
         # Datos iniciales
-        self.sp_data = []
-        self.pv_data = []
-        self.time_data = []
+        self.historial = BufferCircular(MAX_POINTS)
+
+        # El hilo serial solo escribe aquí; la GUI lo consume en el temporizador.
+        # deque.append/popleft son atómicos, no hace falta lock.
+        self.pendientes = deque(maxlen=MAX_PENDIENTES)
+        self.estado_serial = "Conectando al puerto serial..."
+        self.estado_mostrado = self.estado_serial
 
         # Escalado inicial del eje Y
         self.y_min = Y_MIN_INIT
         self.y_max = Y_MAX_INIT
 
+        # Grabación en segundo plano (el hilo serial solo le entrega las muestras)
+        self.grabador = GrabadorTelemetria(GRABACIONES_DIR) if GRABAR else None
+
         # Configurar interfaz
         self.initUI()
 
         # Iniciar lectura serial
+        self.leyendo = True
         self.serial_thread = threading.Thread(target=self.read_serial, daemon=True)
         self.serial_thread.start()
 
@@ -68,10 +142,26 @@ class MotorMonitor(QMainWindow):
         self.ax.set_xlabel("Tiempo (s)")
         self.ax.grid(True)
 
+        # Líneas persistentes: en cada refresco solo se actualizan sus datos (blitting)
+        self.line_sp, = self.ax.plot([], [], label="Setpoint", color='blue', linewidth=1.5)
+        self.line_pv, = self.ax.plot([], [], label="RPM medida", color='red', linewidth=1)
+        self.ax.legend(loc="upper left")
+        # Animadas después de crear la leyenda, para que la leyenda sí quede en el fondo
+        self.line_sp.set_animated(True)
+        self.line_pv.set_animated(True)
+
+        self.ax.set_ylim(self.y_min, self.y_max)
+        self.ylim_aplicado = (self.y_min, self.y_max)
+        self.xlim_aplicado = (0, 1)
+        self.ax.set_xlim(*self.xlim_aplicado)
+
+        self.fondo = None
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+
         # --- TABLA DE DATOS ---
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Setpoint (RPM)", "RPM medida", "Error"])
+        self.modelo = ModeloMuestras(self.historial, MAX_ROWS)
+        self.table = QTableView()
+        self.table.setModel(self.modelo)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         layout.addWidget(self.table)
 
@@ -79,92 +169,150 @@ class MotorMonitor(QMainWindow):
         self.setCentralWidget(central_widget)
 
     def read_serial(self):
+        # Corre en un hilo aparte: nunca toca widgets de Qt
         try:
             self.ser = serial.Serial(PORT, BAUD, timeout=1)
-            self.label_status.setText(f"✅ Conectado a {PORT}")
+            self.estado_serial = f"✅ Conectado a {PORT}"
             start_time = time.time()
-
-            while True:
-                line = self.ser.readline().decode('utf-8').strip()
-                if line:
-                    parts = line.split(',')
-                    if len(parts) >= 2:
-                        try:
-                            sp = float(parts[0])
-                            pv = float(parts[1])
-                            error = sp - pv
-                            t = time.time() - start_time
-
-                            self.sp_data.append(sp)
-                            self.pv_data.append(pv)
-                            self.time_data.append(t)
-
-                            if len(self.time_data) > MAX_POINTS:
-                                self.sp_data.pop(0)
-                                self.pv_data.pop(0)
-                                self.time_data.pop(0)
-
-                            self.update_table(sp, pv, error)
-                        except ValueError:
-                            pass
+            self.decodificador = crear_decodificador(PROTOCOLO)
+            seq_inicial = None
+            ultimo_t = 0.0
+            perdidas = 0
+
+            while self.leyendo:
+                # Lectura en bloque: todo lo que haya en el buffer (o espera al menos un byte)
+                datos = self.ser.read(self.ser.in_waiting or 1)
+                muestras = self.decodificador.decodificar(datos)
+                if not muestras:
+                    continue
+
+                ahora = time.time() - start_time
+                if seq_inicial is None:
+                    seq_inicial = muestras[0][0]
+                # En ASCII no hay secuencia: las muestras de una misma lectura se reparten hacia
+                # atrás desde `ahora` cada PERIODO_MUESTREO (más juntas si no caben desde la anterior)
+                paso = min(PERIODO_MUESTREO, (ahora - ultimo_t) / len(muestras))
+                for i, (seq, sp, pv) in enumerate(muestras, 1 - len(muestras)):
+                    # En binario el tiempo sale de la secuencia: los huecos quedan a la vista
+                    t = (seq - seq_inicial) * PERIODO_MUESTREO if PROTOCOLO == 'binario' else ahora + i * paso
+                    self.pendientes.append((t, sp, pv))
+                    if self.grabador is not None:
+                        self.grabador.agregar(t, sp, pv)
+
+                ultimo_t = ahora
+
+                if self.decodificador.muestras_perdidas != perdidas:
+                    perdidas = self.decodificador.muestras_perdidas
+                    self.estado_serial = f"✅ Conectado a {PORT} - tramas perdidas: {perdidas}"
         except serial.SerialException:
-            self.label_status.setText("❌ Error: no se pudo abrir el puerto serial.")
+            self.estado_serial = "❌ Error: no se pudo abrir el puerto serial."
+
+    def drain_samples(self):
+        # Saca de la cola todo lo que llegó desde el último refresco
+        nuevas = []
+        while self.pendientes:
+            nuevas.append(self.pendientes.popleft())
+
+        self.historial.extender(nuevas)
+        return nuevas
+
+    def update_table(self, nuevas):
+        # La tabla lee del historial: una sola señal por refresco, sin importar cuántas llegaron
+        if nuevas:
+            self.modelo.refrescar()
+
+    def on_draw(self, event):
+        # Tras un dibujado completo (ejes, resize) se guarda el fondo sin las líneas
+        self.fondo = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_lines()
+
+    def draw_lines(self):
+        self.ax.draw_artist(self.line_sp)
+        self.ax.draw_artist(self.line_pv)
+
+    def update_y_limits(self):
+        h = self.historial
+        ymin = min(h.minimo("sp"), h.minimo("pv"))
+        ymax = max(h.maximo("sp"), h.maximo("pv"))
+        margin = (ymax - ymin) * 0.2 if ymax != ymin else 1
+        target_min = ymin - margin
+        target_max = ymax + margin
+
+        # Si el rango aumenta → ajusta rápido
+        if target_max > self.y_max:
+            self.y_max = 0.8 * self.y_max + 0.2 * target_max
+        if target_min < self.y_min:
+            self.y_min = 0.8 * self.y_min + 0.2 * target_min
+
+        # Si el rango disminuye → ajusta lento (histéresis)
+        if target_max < self.y_max:
+            self.y_max = 0.95 * self.y_max + 0.05 * target_max
+        if target_min > self.y_min:
+            self.y_min = 0.95 * self.y_min + 0.05 * target_min
+
+        # Evita que se haga demasiado pequeño el rango
+        if (self.y_max - self.y_min) < 10:
+            mid = (self.y_max + self.y_min) / 2
+            self.y_min = mid - 5
+            self.y_max = mid + 5
+
+    def update_axes(self):
+        # Devuelve True si cambió algún límite (hace falta redibujar los ejes completos)
+        cambio = False
+
+        if AUTO_Y_SCALING:
+            self.update_y_limits()
+            y0, y1 = self.ylim_aplicado
+            tolerancia = TOLERANCIA_EJE_Y * (self.y_max - self.y_min)
+            if abs(self.y_min - y0) > tolerancia or abs(self.y_max - y1) > tolerancia:
+                self.ylim_aplicado = (self.y_min, self.y_max)
+                self.ax.set_ylim(*self.ylim_aplicado)
+                cambio = True
+
+        # El eje X avanza a saltos: se deja margen libre para no moverlo en cada refresco
+        tiempo = self.historial.vista("t")
+        t0, t1 = tiempo[0], tiempo[-1]
+        x0, x1 = self.xlim_aplicado
+        if t1 > x1 or t0 < x0:
+            ancho = max(t1 - t0, 1e-3)
+            self.xlim_aplicado = (t0, t0 + ancho * (1 + MARGEN_EJE_X))
+            self.ax.set_xlim(*self.xlim_aplicado)
+            cambio = True
+
+        return cambio
 
-    def update_table(self, sp, pv, error):
-        self.table.insertRow(0)
-        self.table.setItem(0, 0, QTableWidgetItem(f"{sp:.2f}"))
-        self.table.setItem(0, 1, QTableWidgetItem(f"{pv:.2f}"))
-        self.table.setItem(0, 2, QTableWidgetItem(f"{error:.2f}"))
+    def update_display(self):
+        if self.estado_serial != self.estado_mostrado:
+            self.label_status.setText(self.estado_serial)
+            self.estado_mostrado = self.estado_serial
 
-        if self.table.rowCount() > MAX_ROWS:
-            self.table.removeRow(self.table.rowCount() - 1)
+        nuevas = self.drain_samples()
+        self.update_table(nuevas)
 
-        for col in range(3):
-            self.table.item(0, col).setTextAlignment(Qt.AlignCenter)
+        if nuevas and len(self.historial) > 1:
+            t, sp, pv = self.historial.vista()
+            self.line_sp.set_data(t, sp)
+            self.line_pv.set_data(t, pv)
 
-    def update_display(self):
-        if len(self.time_data) > 1:
-            self.ax.clear()
-            self.ax.plot(self.time_data, self.sp_data, label="Setpoint", color='blue', linewidth=1.5)
-            self.ax.plot(self.time_data, self.pv_data, label="RPM medida", color='red', linewidth=1)
-
-            self.ax.legend()
-            self.ax.set_ylabel("Velocidad (RPM)")
-            self.ax.set_xlabel("Tiempo (s)")
-            self.ax.set_title("Setpoint vs RPM del Motor")
-            self.ax.grid(True)
-
-            # --- ESCALADO INTELIGENTE DEL EJE Y ---
-            if AUTO_Y_SCALING:
-                ymin = min(self.pv_data + self.sp_data)
-                ymax = max(self.pv_data + self.sp_data)
-                margin = (ymax - ymin) * 0.2 if ymax != ymin else 1
-                target_min = ymin - margin
-                target_max = ymax + margin
-
-                # Si el rango aumenta → ajusta rápido
-                if target_max > self.y_max:
-                    self.y_max = 0.8 * self.y_max + 0.2 * target_max
-                if target_min < self.y_min:
-                    self.y_min = 0.8 * self.y_min + 0.2 * target_min
-
-                # Si el rango disminuye → ajusta lento (histéresis)
-                if target_max < self.y_max:
-                    self.y_max = 0.95 * self.y_max + 0.05 * target_max
-                if target_min > self.y_min:
-                    self.y_min = 0.95 * self.y_min + 0.05 * target_min
-
-                # Evita que se haga demasiado pequeño el rango
-                if (self.y_max - self.y_min) < 10:
-                    mid = (self.y_max + self.y_min) / 2
-                    self.y_min = mid - 5
-                    self.y_max = mid + 5
-
-                self.ax.set_ylim(self.y_min, self.y_max)
+            if self.update_axes() or self.fondo is None:
+                # Redibujado completo; on_draw guarda el fondo nuevo y pinta las líneas
+                self.canvas.draw()
             else:
-                self.ax.set_ylim(Y_MIN_INIT, Y_MAX_INIT)
-
-            self.canvas.draw()
+                self.canvas.restore_region(self.fondo)
+                self.draw_lines()
+            self.canvas.blit(self.ax.bbox)
+
+    def closeEvent(self, event):
+        # Primero se detiene el hilo serial (termina en a lo sumo un timeout de lectura)
+        self.leyendo = False
+        self.timer.stop()
+        self.serial_thread.join(timeout=2)
+        if getattr(self, "ser", None) is not None:
+            self.ser.close()
+        if self.grabador is not None:
+            self.grabador.cerrar()
+            print(f"Grabación guardada en: {', '.join(str(a) for a in self.grabador.archivos)}")
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
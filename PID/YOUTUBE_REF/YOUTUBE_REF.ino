@@ -24,6 +24,12 @@ float Tm = 0.1; // periodo de muestreo en segundos
 float pv_filtrado = 0.0;
 float alpha = 0.9;   // factor de suavizado (0.9 = muy suave, 0.5 = más rápido)
 
+// Protocolo serial: 0 = texto "sp,pv" (Serial Plotter), 1 = trama binaria para INTERFAZ.py
+// Trama (12 bytes, little-endian): 0xAA | seq (uint16) | sp (float) | pv (float) | crc8
+#define MODO_BINARIO 0
+const byte SYNC = 0xAA;
+unsigned int secuencia = 0;
+
 void setup() {
   pinMode(pinA, INPUT);
   pinMode(PWM_salida, OUTPUT);
@@ -69,11 +75,40 @@ void loop() {
     // Aplicar señal PWM al motor
     analogWrite(PWM_salida, cv * (255.0 / 100.0));
 
+#if MODO_BINARIO
+    enviarTrama(sp, pv);
+#else
     // Enviar datos al Serial Plotter (SP, PV filtrado)
     Serial.print(sp);
     Serial.print(",");
     Serial.println(pv);
+#endif
+  }
+}
+
+// CRC-8 (polinomio 0x07), el mismo que verifica PID/protocolo.py
+byte crc8(const byte *datos, byte n) {
+  byte crc = 0;
+  for (byte i = 0; i < n; i++) {
+    crc ^= datos[i];
+    for (byte b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : (crc << 1);
+    }
   }
+  return crc;
+}
+
+// Envía SP y PV en una trama binaria con número de secuencia y CRC
+void enviarTrama(float sp_, float pv_) {
+  byte trama[12];
+  trama[0] = SYNC;
+  trama[1] = secuencia & 0xFF;
+  trama[2] = secuencia >> 8;
+  memcpy(&trama[3], &sp_, 4);   // AVR es little-endian
+  memcpy(&trama[7], &pv_, 4);
+  trama[11] = crc8(&trama[1], 10);
+  Serial.write(trama, 12);
+  secuencia++;
 }
 
 // Interrupción del encoder (canal A)
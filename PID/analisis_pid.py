@@ -0,0 +1,194 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from grabador import abrir_grabacion, cargar_sesion
+
+# Análisis fuera de línea de sesiones del monitor PID.
+# Entrada: tiempo, setpoint y RPM medida, en cualquiera de los formatos del monitor:
+#   - BufferCircular (o su vista(): array de 3 filas t, sp, pv)
+#   - grabación .pidrec (array estructurado con campos t, sp, pv, error)
+#   - dict con claves "t", "sp", "pv"
+# Todas las métricas se calculan vectorizadas para todos los escalones a la vez.
+
+BANDA_ESTABLECIMIENTO = 0.02   # ±2 % del escalón
+SUBIDA_INICIO = 0.1            # tiempo de subida del 10 % ...
+SUBIDA_FIN = 0.9               # ... al 90 %
+FRACCION_ESTACIONARIA = 0.1    # último 10 % de cada escalón para el error en estado estacionario
+
+
+def columnas(datos):
+    # Devuelve (t, sp, pv) como arrays float64 (sin copiar si ya lo son)
+    if hasattr(datos, "vista"):
+        datos = datos.vista()
+    if isinstance(datos, np.ndarray) and datos.dtype.names:
+        return tuple(np.asarray(datos[c], dtype=np.float64) for c in ("t", "sp", "pv"))
+    if isinstance(datos, dict):
+        return tuple(np.asarray(datos[c], dtype=np.float64) for c in ("t", "sp", "pv"))
+    t, sp, pv = np.asarray(datos, dtype=np.float64)
+    return t, sp, pv
+
+
+def kpis_lazo(t, sp, pv):
+    """
+    Integrales del error sobre todo el registro: IAE, ISE e ITAE.
+    Funcionan sobre el último eje, así que aceptan varios registros a la vez (2D).
+    """
+    error = sp - pv
+    dt = np.diff(t, axis=-1, append=t[..., -1:])
+    t_rel = t - t[..., :1]
+    return {
+        "iae": np.sum(np.abs(error) * dt, axis=-1),
+        "ise": np.sum(error * error * dt, axis=-1),
+        "itae": np.sum(t_rel * np.abs(error) * dt, axis=-1),
+    }
+
+
+def metricas_respuesta(t, sp, pv, banda=BANDA_ESTABLECIMIENTO):
+    """
+    Métricas de una respuesta a un solo escalón desde 0 hasta `sp`, sobre el último eje:
+    `pv` puede tener forma (n_candidatos, n_muestras) para evaluar muchas respuestas a la vez.
+    """
+    pv = np.asarray(pv, dtype=np.float64)
+    n = pv.shape[-1]
+    y = pv / sp
+    t_rel = t - t[0]
+
+    def primer_tiempo(mascara):
+        idx = np.argmax(mascara, axis=-1)
+        return np.where(mascara.any(axis=-1), t_rel[idx], np.nan)
+
+    fuera = np.abs(y - 1) > banda
+    ultimo_fuera = n - 1 - np.argmax(fuera[..., ::-1], axis=-1)
+    tiempo_establecimiento = np.where(
+        ~fuera.any(axis=-1), 0.0,
+        np.where(ultimo_fuera < n - 1, t_rel[np.minimum(ultimo_fuera + 1, n - 1)], np.nan))
+
+    n_final = max(int(n * FRACCION_ESTACIONARIA), 1)
+    metricas = {
+        "tiempo_subida": primer_tiempo(y >= SUBIDA_FIN) - primer_tiempo(y >= SUBIDA_INICIO),
+        "tiempo_establecimiento": tiempo_establecimiento,
+        "sobrepico_pct": np.maximum(y.max(axis=-1) - 1, 0) * 100,
+        "error_estacionario": (sp - pv[..., -n_final:]).mean(axis=-1),
+    }
+    metricas.update(kpis_lazo(t, np.full_like(pv, sp), pv))
+    return metricas
+
+
+def detectar_escalones(sp):
+    # Índices donde cambia el setpoint (primer índice de cada escalón)
+    return np.flatnonzero(np.diff(sp) != 0) + 1
+
+
+def metricas_escalones(datos, banda=BANDA_ESTABLECIMIENTO):
+    """
+    Métricas de respuesta de cada escalón de setpoint. Devuelve un dict de arrays
+    (uno por escalón): inicio, t_escalon, amplitud, tiempo_subida, tiempo_establecimiento,
+    sobrepico_pct, error_estacionario, iae, ise, itae. Los tiempos que no se alcanzan
+    dentro del escalón quedan en NaN.
+    """
+    t, sp, pv = columnas(datos)
+    inicios = detectar_escalones(sp)
+    if not len(inicios):
+        return {}
+    fines = np.append(inicios[1:], len(sp))
+    n_total = fines[-1] - inicios[0]
+
+    # Todo se trabaja sobre el tramo [primer escalón, fin) con un id de escalón por muestra
+    tramo = slice(inicios[0], fines[-1])
+    t_, sp_, pv_ = t[tramo], sp[tramo], pv[tramo]
+    starts = inicios - inicios[0]
+    largos = fines - inicios
+    escalon = np.repeat(np.arange(len(inicios)), largos)
+    indices = np.arange(n_total)
+
+    t0 = t[inicios]
+    pv0 = pv[inicios - 1]
+    amplitud = sp[inicios] - sp[inicios - 1]
+    # Respuesta normalizada: 0 al inicio del escalón, 1 en el nuevo setpoint
+    referencia = sp[inicios] - pv0
+    referencia = np.where(referencia == 0, amplitud, referencia)
+    y = (pv_ - pv0[escalon]) / referencia[escalon]
+
+    def primer_indice(mascara):
+        primero = np.minimum.reduceat(np.where(mascara, indices, n_total), starts)
+        return np.where(primero < starts + largos, primero, -1)
+
+    def ultimo_indice(mascara):
+        return np.maximum.reduceat(np.where(mascara, indices, -1), starts)
+
+    def tiempo_en(idx):
+        return np.where(idx >= 0, t_[np.maximum(idx, 0)] - t0, np.nan)
+
+    i_subida_ini = primer_indice(y >= SUBIDA_INICIO)
+    i_subida_fin = primer_indice(y >= SUBIDA_FIN)
+    tiempo_subida = np.where((i_subida_ini >= 0) & (i_subida_fin >= 0),
+                             tiempo_en(i_subida_fin) - tiempo_en(i_subida_ini), np.nan)
+
+    # Establecido: después de la última muestra fuera de la banda (si no es la última del escalón)
+    fuera = ultimo_indice(np.abs(y - 1) > banda)
+    siguiente = fuera + 1
+    establecido = siguiente < starts + largos
+    tiempo_establecimiento = np.where(
+        fuera < 0, 0.0,
+        np.where(establecido, t_[np.minimum(siguiente, n_total - 1)] - t0, np.nan))
+
+    sobrepico = np.maximum(np.maximum.reduceat(y, starts) - 1, 0) * 100
+
+    error = sp_ - pv_
+    dt = np.diff(t_, append=t_[-1])
+    abs_error = np.abs(error)
+    iae = np.add.reduceat(abs_error * dt, starts)
+    ise = np.add.reduceat(error * error * dt, starts)
+    itae = np.add.reduceat((t_ - t0[escalon]) * abs_error * dt, starts)
+
+    # Error en estado estacionario: promedio sobre el último tramo de cada escalón
+    n_final = np.maximum((largos * FRACCION_ESTACIONARIA).astype(np.int64), 1)
+    en_final = indices >= (starts + largos - n_final)[escalon]
+    suma_final = np.bincount(escalon, weights=np.where(en_final, error, 0), minlength=len(inicios))
+    error_estacionario = suma_final / n_final
+
+    return {
+        "inicio": inicios,
+        "t_escalon": t0,
+        "amplitud": amplitud,
+        "tiempo_subida": tiempo_subida,
+        "tiempo_establecimiento": tiempo_establecimiento,
+        "sobrepico_pct": sobrepico,
+        "error_estacionario": error_estacionario,
+        "iae": iae,
+        "ise": ise,
+        "itae": itae,
+    }
+
+
+def resumen_escalones(metricas):
+    # Mediana de cada métrica (ignorando NaN) y cantidad de escalones
+    if not metricas:
+        return {"escalones": 0}
+    resumen = {"escalones": len(metricas["inicio"])}
+    for clave, valores in metricas.items():
+        if clave in ("inicio", "t_escalon"):
+            continue
+        resumen[clave] = float(np.nanmedian(valores)) if np.isfinite(valores).any() else float("nan")
+    return resumen
+
+
+def imprimir_resumen(resumen):
+    print(f"Escalones analizados: {resumen['escalones']}")
+    for clave, valor in resumen.items():
+        if clave != "escalones":
+            print(f"   {clave}: {valor:.4f}")
+
+
+def main():
+    # Uso: python PID/analisis_pid.py [grabación.pidrec | directorio de grabaciones]
+    ruta = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parent / "grabaciones"
+    datos = cargar_sesion(ruta) if ruta.is_dir() else abrir_grabacion(ruta)
+    imprimir_resumen(resumen_escalones(metricas_escalones(datos)))
+    print("Lazo completo:", {k: round(float(v), 4) for k, v in kpis_lazo(*columnas(datos)).items()})
+
+
+if __name__ == "__main__":
+    main()
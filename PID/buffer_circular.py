@@ -0,0 +1,79 @@
+from collections import deque
+
+import numpy as np
+
+# Columnas del historial de muestras del monitor: tiempo (s), setpoint y RPM medida
+COLUMNAS = ("t", "sp", "pv")
+
+
+class BufferCircular:
+    """
+    Historial de capacidad fija con costo O(1) por muestra.
+    Cada muestra se escribe dos veces (posición i e i + capacidad), así la ventana
+    siempre es un tramo contiguo del array y `vista()` no copia datos.
+    El mínimo y el máximo de la ventana se mantienen con colas monótonas.
+    """
+
+    def __init__(self, capacidad, columnas=COLUMNAS, extremos=("sp", "pv")):
+        self.capacidad = capacidad
+        self.columnas = tuple(columnas)
+        self.datos = np.zeros((len(self.columnas), 2 * capacidad))
+        self.total = 0  # muestras agregadas desde el inicio (índice global)
+        self._col_extremos = [(self.columnas.index(c), c) for c in extremos]
+        self._min = {c: deque() for c in extremos}
+        self._max = {c: deque() for c in extremos}
+
+    def __len__(self):
+        return min(self.total, self.capacidad)
+
+    def agregar(self, *valores):
+        i = self.total % self.capacidad
+        self.datos[:, i] = valores
+        self.datos[:, i + self.capacidad] = valores
+
+        indice = self.total
+        self.total += 1
+        primero = self.total - len(self)  # índice global de la muestra más vieja
+
+        for k, c in self._col_extremos:
+            v = valores[k]
+            cola_min = self._min[c]
+            while cola_min and cola_min[-1][1] >= v:
+                cola_min.pop()
+            cola_min.append((indice, v))
+            if cola_min[0][0] < primero:
+                cola_min.popleft()
+
+            cola_max = self._max[c]
+            while cola_max and cola_max[-1][1] <= v:
+                cola_max.pop()
+            cola_max.append((indice, v))
+            if cola_max[0][0] < primero:
+                cola_max.popleft()
+
+    def extender(self, muestras):
+        for muestra in muestras:
+            self.agregar(*muestra)
+
+    def vista(self, columna=None):
+        # Ventana actual, de la muestra más vieja a la más nueva (vista, sin copia)
+        n = len(self)
+        inicio = (self.total - n) % self.capacidad
+        if columna is None:
+            return self.datos[:, inicio:inicio + n]
+        return self.datos[self.columnas.index(columna), inicio:inicio + n]
+
+    def ultimas(self, n, columna=None):
+        vista = self.vista(columna)
+        return vista[..., max(0, vista.shape[-1] - n):]
+
+    def minimo(self, columna):
+        return self._min[columna][0][1]
+
+    def maximo(self, columna):
+        return self._max[columna][0][1]
+
+    def limpiar(self):
+        self.total = 0
+        for cola in list(self._min.values()) + list(self._max.values()):
+            cola.clear()
@@ -0,0 +1,131 @@
+import queue
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+# Archivo de grabación (.pidrec): encabezado de 16 bytes y luego registros de 4 float64
+# little-endian (t, sp, pv, error) uno tras otro. Solo se anexa, así que un archivo
+# cortado a la mitad sigue siendo legible hasta el último registro completo.
+MAGIA = b"UTPPID\x00\x01"
+TAM_ENCABEZADO = 16
+DTYPE_REGISTRO = np.dtype([("t", "<f8"), ("sp", "<f8"), ("pv", "<f8"), ("error", "<f8")])
+EXTENSION = ".pidrec"
+
+
+class GrabadorTelemetria:
+    """
+    Graba todas las muestras decodificadas en segundo plano.
+    `agregar()` (hilo serial) solo acumula en un array('d'); cada lote completo se pasa a una
+    cola y un hilo escritor lo convierte a NumPy y lo escribe de una vez. La rotación de
+    archivos también ocurre en el hilo escritor, así que nunca bloquea la lectura serial.
+    """
+
+    def __init__(self, directorio, tam_lote=1024, max_registros=1_000_000, max_espera=1.0):
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.tam_lote = tam_lote
+        self.max_registros = max_registros
+        self.max_espera = max_espera  # s máximos que un lote incompleto espera antes de escribirse
+        self.sesion = time.strftime("%Y%m%d_%H%M%S")
+        self.archivos = []
+        self.registros = 0
+        self.lotes_descartados = 0
+
+        self._lote = array("d")
+        self._inicio_lote = time.monotonic()
+        self._cola = queue.Queue(maxsize=256)
+        self._archivo = None
+        self._registros_archivo = 0
+        self._hilo = threading.Thread(target=self._escribir, daemon=True)
+        self._hilo.start()
+
+    def agregar(self, t, sp, pv):
+        self._lote.extend((t, sp, pv, sp - pv))
+        if len(self._lote) >= 4 * self.tam_lote or time.monotonic() - self._inicio_lote >= self.max_espera:
+            self.vaciar()
+
+    def agregar_lote(self, muestras):
+        for t, sp, pv in muestras:
+            self.agregar(t, sp, pv)
+
+    def vaciar(self):
+        lote, self._lote = self._lote, array("d")
+        self._inicio_lote = time.monotonic()
+        if not lote:
+            return
+        try:
+            self._cola.put_nowait(lote)
+        except queue.Full:
+            # El disco no da abasto: se pierde el lote antes que frenar la lectura serial
+            self.lotes_descartados += 1
+
+    def cerrar(self):
+        self.vaciar()
+        self._cola.put(None)
+        self._hilo.join()
+
+    def _nuevo_archivo(self):
+        if self._archivo is not None:
+            self._archivo.close()
+        path = self.directorio / f"pid_{self.sesion}_{len(self.archivos):04d}{EXTENSION}"
+        self._archivo = open(path, "wb")
+        self._archivo.write(MAGIA.ljust(TAM_ENCABEZADO, b"\x00"))
+        self._registros_archivo = 0
+        self.archivos.append(path)
+
+    def _escribir(self):
+        while True:
+            lote = self._cola.get()
+            if lote is None:
+                break
+            if sys.byteorder == "big":
+                lote.byteswap()
+            registros = np.frombuffer(lote, dtype=DTYPE_REGISTRO)
+            while len(registros):
+                if self._archivo is None or self._registros_archivo >= self.max_registros:
+                    self._nuevo_archivo()
+                parte = registros[:self.max_registros - self._registros_archivo]
+                self._archivo.write(parte.tobytes())
+                self._registros_archivo += len(parte)
+                self.registros += len(parte)
+                registros = registros[len(parte):]
+            self._archivo.flush()
+        if self._archivo is not None:
+            self._archivo.close()
+
+
+def abrir_grabacion(path):
+    """
+    Abre un archivo .pidrec como np.memmap de solo lectura (campos t, sp, pv, error).
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        if f.read(len(MAGIA)) != MAGIA:
+            raise ValueError(f"{path} no es una grabación del monitor PID")
+    n = (path.stat().st_size - TAM_ENCABEZADO) // DTYPE_REGISTRO.itemsize
+    if n == 0:
+        return np.empty(0, dtype=DTYPE_REGISTRO)
+    return np.memmap(path, dtype=DTYPE_REGISTRO, mode="r", offset=TAM_ENCABEZADO, shape=(n,))
+
+
+def archivos_de_sesion(directorio, sesion=None):
+    # Archivos de una sesión en orden de rotación (por defecto, la más reciente)
+    archivos = sorted(Path(directorio).glob(f"pid_*{EXTENSION}"))
+    if sesion is None and archivos:
+        sesion = archivos[-1].name[4:19]
+    return [a for a in archivos if a.name[4:19] == sesion]
+
+
+def cargar_sesion(directorio, sesion=None):
+    """
+    Une todos los archivos de una sesión en un solo array (copia); para archivos
+    sueltos muy grandes conviene usar abrir_grabacion directamente.
+    """
+    partes = [abrir_grabacion(a) for a in archivos_de_sesion(directorio, sesion)]
+    if not partes:
+        return np.empty(0, dtype=DTYPE_REGISTRO)
+    return np.concatenate(partes)
@@ -0,0 +1,156 @@
+import struct
+
+import numpy as np
+
+# Trama binaria enviada por YOUTUBE_REF.ino con MODO_BINARIO = 1 (12 bytes, little-endian):
+#   sync (0xAA) | seq (uint16) | sp (float32) | pv (float32) | crc8 (seq+sp+pv)
+SYNC = 0xAA
+FORMATO_TRAMA = "<BHffB"
+TAM_TRAMA = struct.calcsize(FORMATO_TRAMA)
+DTYPE_TRAMA = np.dtype([("sync", "u1"), ("seq", "<u2"), ("sp", "<f4"), ("pv", "<f4"), ("crc", "u1")])
+
+# CRC-8 (polinomio 0x07, valor inicial 0), el mismo que calcula el sketch
+POLINOMIO_CRC = 0x07
+
+
+def _tabla_crc8():
+    tabla = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ POLINOMIO_CRC) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        tabla.append(crc)
+    return tabla
+
+
+TABLA_CRC8 = _tabla_crc8()
+_TABLA_CRC8_NP = np.array(TABLA_CRC8, dtype=np.uint8)
+
+
+def crc8(datos):
+    crc = 0
+    for byte in datos:
+        crc = TABLA_CRC8[crc ^ byte]
+    return crc
+
+
+def crc8_vectorizado(bloque):
+    # CRC de muchas tramas a la vez: `bloque` es (n_tramas, n_bytes) uint8
+    crc = np.zeros(len(bloque), dtype=np.uint8)
+    for k in range(bloque.shape[1]):
+        crc = _TABLA_CRC8_NP[crc ^ bloque[:, k]]
+    return crc
+
+
+def armar_trama(seq, sp, pv):
+    cuerpo = struct.pack("<Hff", seq & 0xFFFF, sp, pv)
+    return bytes([SYNC]) + cuerpo + bytes([crc8(cuerpo)])
+
+
+class DecodificadorBinario:
+    """
+    Decodifica tramas binarias a partir de bytes leídos en bloque (ser.read(ser.in_waiting)).
+    Si el flujo está alineado, todas las tramas se validan y decodifican juntas con NumPy;
+    ante un byte perdido o un CRC inválido se resincroniza buscando el siguiente SYNC.
+    Cuenta las tramas inválidas y las perdidas (saltos en el número de secuencia).
+    """
+
+    def __init__(self):
+        self.pendiente = b""
+        self.tramas_ok = 0
+        self.tramas_invalidas = 0
+        self.muestras_perdidas = 0
+        self.bytes_descartados = 0
+        self._seq_global = None  # última secuencia, sin las vueltas del contador de 16 bits
+
+    def _bloque_valido(self, datos, pos):
+        # Cuántas tramas seguidas desde `pos` son válidas, y sus valores
+        n = (len(datos) - pos) // TAM_TRAMA
+        if n == 0:
+            return 0, None
+        crudo = np.frombuffer(datos, dtype=np.uint8, count=n * TAM_TRAMA, offset=pos).reshape(n, TAM_TRAMA)
+        tramas = crudo.view(DTYPE_TRAMA).reshape(n)
+        validas = (tramas["sync"] == SYNC) & (crc8_vectorizado(crudo[:, 1:-1]) == tramas["crc"])
+        n_ok = n if validas.all() else int(np.argmin(validas))
+        return n_ok, tramas[:n_ok]
+
+    def _secuencias(self, seq):
+        # Desenvuelve el contador de 16 bits y cuenta los saltos como muestras perdidas
+        seq = seq.astype(np.int64)
+        if self._seq_global is None:
+            self._seq_global = int(seq[0]) - 1
+        previa = np.concatenate(([self._seq_global % 65536], seq[:-1]))
+        pasos = (seq - previa) % 65536
+        self.muestras_perdidas += int(np.maximum(pasos - 1, 0).sum())
+        globales = self._seq_global + np.cumsum(pasos)
+        self._seq_global = int(globales[-1])
+        return globales
+
+    def decodificar(self, datos):
+        # Devuelve una lista de (seq, sp, pv); los bytes sobrantes quedan para la próxima vez
+        datos = self.pendiente + datos
+        pos = 0
+        partes = []
+        while len(datos) - pos >= TAM_TRAMA:
+            n_ok, tramas = self._bloque_valido(datos, pos)
+            if n_ok:
+                partes.append(tramas)
+                pos += n_ok * TAM_TRAMA
+                continue
+            # Trama inválida: si empezaba con SYNC cuenta como corrupta, y se busca el próximo SYNC
+            if datos[pos] == SYNC:
+                self.tramas_invalidas += 1
+            siguiente = datos.find(bytes([SYNC]), pos + 1)
+            if siguiente < 0:
+                siguiente = len(datos)
+            self.bytes_descartados += siguiente - pos
+            pos = siguiente
+        self.pendiente = datos[pos:]
+
+        if not partes:
+            return []
+        tramas = np.concatenate(partes)
+        self.tramas_ok += len(tramas)
+        seq = self._secuencias(tramas["seq"])
+        return list(zip(seq.tolist(), tramas["sp"].astype(float).tolist(),
+                        tramas["pv"].astype(float).tolist()))
+
+
+class DecodificadorAscii:
+    """
+    Formato original del sketch: líneas de texto "sp,pv". Misma interfaz que el binario;
+    la secuencia es simplemente un contador de líneas válidas.
+    """
+
+    def __init__(self):
+        self.pendiente = b""
+        self.tramas_ok = 0
+        self.tramas_invalidas = 0
+        self.muestras_perdidas = 0
+        self.bytes_descartados = 0
+
+    def decodificar(self, datos):
+        *lineas, self.pendiente = (self.pendiente + datos).split(b"\n")
+        muestras = []
+        for linea in lineas:
+            linea = linea.decode("utf-8", errors="replace").strip()
+            if not linea:
+                continue
+            parts = linea.split(',')
+            if len(parts) >= 2:
+                try:
+                    muestras.append((self.tramas_ok, float(parts[0]), float(parts[1])))
+                    self.tramas_ok += 1
+                    continue
+                except ValueError:
+                    pass
+            self.tramas_invalidas += 1
+        return muestras
+
+
+def crear_decodificador(protocolo):
+    if protocolo == "binario":
+        return DecodificadorBinario()
+    if protocolo == "ascii":
+        return DecodificadorAscii()
+    raise ValueError(f"Protocolo desconocido: {protocolo}")
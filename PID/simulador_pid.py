@@ -0,0 +1,155 @@
+import argparse
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from comun.lotes import ejecutar_en_paralelo
+
+from analisis_pid import metricas_respuesta
+
+# Simulador del lazo de YOUTUBE_REF.ino para buscar ganancias sin flashear el Arduino.
+# Reproduce la ley del sketch tal cual, incluidos sus detalles:
+#   - el filtro de pv y la ecuación en diferencias usan la constante Tm (0.1 s),
+#     aunque el lazo corre cada `interval` = 50 ms (PERIODO);
+#   - cv1 guarda la salida SIN saturar (el sketch satura después de actualizar cv1).
+# La planta es un motor de primer orden: rpm' = (GANANCIA * cv - rpm) / TAU.
+
+# Valores del sketch
+SP = 19.41
+KP, KI, KD = 0.2, 0.3, 0.0005
+ALPHA = 0.9
+TM = 0.1
+PERIODO = 0.05
+
+# Planta por defecto (rpm por % de PWM y constante de tiempo en s): ajustar al motor real
+GANANCIA_PLANTA = 0.5
+TAU_PLANTA = 0.4
+RPM_POR_PULSO = 10 * 60.0 / 649.0  # conversión del sketch: pulsos en 50 ms -> rpm
+
+
+def rejilla(kp, ki, kd, alpha):
+    """
+    Producto cartesiano de los valores de cada ganancia: dict de arrays planos.
+    """
+    mallas = np.meshgrid(np.asarray(kp, float), np.asarray(ki, float),
+                         np.asarray(kd, float), np.asarray(alpha, float), indexing="ij")
+    return {nombre: m.ravel() for nombre, m in zip(("kp", "ki", "kd", "alpha"), mallas)}
+
+
+def simular(candidatos, duracion=20.0, sp=SP, ganancia=GANANCIA_PLANTA, tau=TAU_PLANTA,
+            tm=TM, periodo=PERIODO, cuantizar=False):
+    """
+    Respuesta al escalón 0 -> sp de todos los candidatos a la vez.
+    `candidatos` es un dict de arrays (kp, ki, kd, alpha) del mismo largo.
+    Devuelve (t, pv, cv) con pv y cv de forma (n_candidatos, n_pasos).
+    """
+    kp, ki, kd, alpha = (np.asarray(candidatos[c], dtype=np.float64) for c in ("kp", "ki", "kd", "alpha"))
+    m = len(kp)
+    n = int(round(duracion / periodo))
+
+    # Coeficientes de la ecuación en diferencias, uno por candidato
+    q0 = kp + kd / tm
+    q1 = -kp + ki * tm - 2 * kd / tm
+    q2 = kd / tm
+    decaimiento = np.exp(-periodo / tau)  # planta discretizada (retención de orden cero)
+
+    rpm = np.zeros(m)
+    pv_f = np.zeros(m)
+    cv1 = np.zeros(m)
+    error1 = np.zeros(m)
+    error2 = np.zeros(m)
+    historial_pv = np.empty((m, n))
+    historial_cv = np.empty((m, n))
+
+    for k in range(n):
+        pv_raw = np.floor(rpm / RPM_POR_PULSO) * RPM_POR_PULSO if cuantizar else rpm
+        pv_f = alpha * pv_f + (1.0 - alpha) * pv_raw
+        error = sp - pv_f
+
+        cv = cv1 + q0 * error + q1 * error1 + q2 * error2
+        cv1 = cv
+        error2 = error1
+        error1 = error
+        cv_sat = np.clip(cv, 0.0, 100.0)
+
+        historial_pv[:, k] = pv_f
+        historial_cv[:, k] = cv_sat
+        # El motor responde al PWM aplicado hasta el próximo muestreo
+        rpm = decaimiento * rpm + (1.0 - decaimiento) * ganancia * cv_sat
+
+    t = np.arange(n) * periodo
+    return t, historial_pv, historial_cv
+
+
+def evaluar(candidatos, sp=SP, **opciones):
+    # Simula un bloque de candidatos y devuelve sus KPIs (función de módulo: va a los procesos)
+    t, pv, _ = simular(candidatos, sp=sp, **opciones)
+    return metricas_respuesta(t, sp, pv)
+
+
+def evaluar_rejilla(candidatos, max_workers=1, tam_bloque=2000, **opciones):
+    """
+    Evalúa todos los candidatos, opcionalmente repartidos en bloques entre procesos.
+    Devuelve un dict con las ganancias y los KPIs de cada candidato.
+    """
+    n = len(candidatos["kp"])
+    bloques = [{c: v[i:i + tam_bloque] for c, v in candidatos.items()} for i in range(0, n, tam_bloque)]
+    resultados = ejecutar_en_paralelo(partial(evaluar, **opciones), bloques, max_workers)
+    kpis = {clave: np.concatenate([r[clave] for r in resultados]) for clave in resultados[0]}
+    return {**candidatos, **kpis}
+
+
+def ranking(resultados, criterio="itae", max_sobrepico=None, n=10):
+    """
+    Ordena por `criterio` (menor es mejor). Los candidatos que no se establecen
+    o superan `max_sobrepico` (%) quedan al final.
+    """
+    puntaje = np.where(np.isnan(resultados["tiempo_establecimiento"]), np.inf, resultados[criterio])
+    if max_sobrepico is not None:
+        puntaje = np.where(resultados["sobrepico_pct"] > max_sobrepico, np.inf, puntaje)
+    orden = np.argsort(puntaje, kind="stable")[:n]
+    return [{clave: float(valores[i]) for clave, valores in resultados.items()} for i in orden]
+
+
+def imprimir_candidato(c):
+    print(f"   Kp={c['kp']:.4f} Ki={c['ki']:.4f} Kd={c['kd']:.5f} alpha={c['alpha']:.2f}"
+          f" | subida {c['tiempo_subida']:.2f} s  establec. {c['tiempo_establecimiento']:.2f} s"
+          f"  sobrepico {c['sobrepico_pct']:.1f} %  e_ss {c['error_estacionario']:.3f}"
+          f"  IAE {c['iae']:.2f}  ITAE {c['itae']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda de ganancias PID por simulación")
+    parser.add_argument("--puntos", type=int, default=20, help="valores por ganancia en la rejilla")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--criterio", choices=["iae", "ise", "itae"], default="itae")
+    parser.add_argument("--max-sobrepico", type=float, default=10.0, help="sobrepico máximo admitido (%)")
+    parser.add_argument("--duracion", type=float, default=20.0, help="segundos simulados")
+    parser.add_argument("--cuantizar", action="store_true", help="simular la cuantización del encoder")
+    args = parser.parse_args()
+
+    opciones = {"duracion": args.duracion, "cuantizar": args.cuantizar}
+    actual = evaluar_rejilla(rejilla([KP], [KI], [KD], [ALPHA]), max_workers=1, **opciones)
+    print("Ganancias actuales del sketch:")
+    imprimir_candidato(ranking(actual, args.criterio, n=1)[0])
+
+    p = args.puntos
+    candidatos = rejilla(np.linspace(0.05, 2.0, p), np.linspace(0.05, 3.0, p),
+                         np.linspace(0.0, 0.01, p), np.linspace(0.5, 0.95, max(p // 4, 2)))
+    inicio = time.perf_counter()
+    resultados = evaluar_rejilla(candidatos, args.workers, **opciones)
+    print(f"\n{len(candidatos['kp']):,} candidatos simulados en {time.perf_counter() - inicio:.2f} s")
+    print(f"Mejores por {args.criterio.upper()} (sobrepico <= {args.max_sobrepico:g} %):")
+    for c in ranking(resultados, args.criterio, args.max_sobrepico):
+        imprimir_candidato(c)
+
+
+if __name__ == "__main__":
+    main()
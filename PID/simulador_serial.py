@@ -0,0 +1,139 @@
+import argparse
+import itertools
+import os
+import random
+import threading
+import time
+import tty
+from array import array
+from pathlib import Path
+
+from grabador import EXTENSION, abrir_grabacion
+from protocolo import armar_trama
+
+# Puerto serial falso para probar INTERFAZ.py sin el Arduino (solo Linux/Unix: usa un pty).
+# Uso: python PID/simulador_serial.py --tasa 1000 --protocolo binario
+#      y poner en INTERFAZ.py PORT = <ruta que imprime> (p. ej. /dev/pts/3)
+
+
+def muestras_sinteticas(sp_bajo=10.0, sp_alto=30.0, periodo=400, tau=20.0, ruido=0.3, semilla=1):
+    """
+    Escalones de setpoint y una planta de primer orden con ruido: (sp, pv) infinito.
+    `periodo` y `tau` están en muestras.
+    """
+    rnd = random.Random(semilla)
+    pv = sp_bajo
+    for i in itertools.count():
+        sp = sp_alto if (i // periodo) % 2 else sp_bajo
+        pv += (sp - pv) / tau
+        yield sp, pv + rnd.gauss(0, ruido)
+
+
+def muestras_grabadas(path):
+    """
+    Repite en bucle un archivo grabado (.pidrec) o de texto con líneas "sp,pv".
+    """
+    path = Path(path)
+    if path.suffix == EXTENSION:
+        datos = abrir_grabacion(path)
+        muestras = list(zip(datos["sp"].tolist(), datos["pv"].tolist()))
+    else:
+        muestras = []
+        with open(path, "r", encoding="utf-8") as f:
+            for linea in f:
+                partes = linea.strip().split(',')
+                try:
+                    muestras.append((float(partes[0]), float(partes[1])))
+                except (ValueError, IndexError):
+                    pass
+    if not muestras:
+        raise ValueError(f"{path} no tiene muestras")
+    return itertools.cycle(muestras)
+
+
+class PuertoSimulado:
+    """
+    Pseudo-terminal que emite muestras a `tasa_hz` en el protocolo indicado.
+    `ruta` es el dispositivo que se le pasa a serial.Serial. Guarda el instante de envío
+    de cada muestra (time.perf_counter) para medir la latencia de punta a punta.
+    """
+
+    def __init__(self, tasa_hz=1000, protocolo="ascii", fuente=None, tick=0.001):
+        self.tasa_hz = tasa_hz
+        self.protocolo = protocolo
+        self.fuente = fuente if fuente is not None else muestras_sinteticas()
+        self.tick = tick
+        self.enviadas = 0
+        self.tiempos_envio = array("d")
+
+        self.maestro, self.esclavo = os.openpty()
+        tty.setraw(self.esclavo)
+        self.ruta = os.ttyname(self.esclavo)
+        self._activo = False
+        self._hilo = None
+
+    def _codificar(self, seq, sp, pv):
+        if self.protocolo == "binario":
+            return armar_trama(seq, sp, pv)
+        return f"{sp:.2f},{pv:.2f}\r\n".encode()
+
+    def _emitir(self):
+        inicio = time.perf_counter()
+        while self._activo:
+            # Cuántas muestras "deberían" haber salido hasta ahora; se envían de una vez
+            debidas = int((time.perf_counter() - inicio) * self.tasa_hz) - self.enviadas
+            if debidas > 0:
+                bloque = b"".join(self._codificar(self.enviadas + k, *next(self.fuente))
+                                  for k in range(debidas))
+                try:
+                    os.write(self.maestro, bloque)
+                except OSError:
+                    break
+                ahora = time.perf_counter()
+                self.tiempos_envio.extend(itertools.repeat(ahora, debidas))
+                self.enviadas += debidas
+            time.sleep(self.tick)
+
+    def iniciar(self):
+        self._activo = True
+        self._hilo = threading.Thread(target=self._emitir, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._activo = False
+        if self._hilo is not None:
+            self._hilo.join()
+
+    def cerrar(self):
+        self.detener()
+        os.close(self.maestro)
+        os.close(self.esclavo)
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Puerto serial simulado para el monitor PID")
+    parser.add_argument("--tasa", type=float, default=1000, help="muestras por segundo (100 a 10000)")
+    parser.add_argument("--protocolo", choices=["ascii", "binario"], default="ascii")
+    parser.add_argument("--archivo", help="grabación .pidrec o texto 'sp,pv' a repetir (por defecto, sintético)")
+    args = parser.parse_args()
+
+    fuente = muestras_grabadas(args.archivo) if args.archivo else None
+    with PuertoSimulado(args.tasa, args.protocolo, fuente) as puerto:
+        print(f"Puerto simulado en: {puerto.ruta}  ({args.tasa:g} Hz, {args.protocolo})")
+        print("Ctrl+C para terminar")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(f"\nMuestras enviadas: {puerto.enviadas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,61 @@
+import argparse
 import csv
-from datetime import datetime
+import json
+import os
+import shutil
+import sys
+import time
+from array import array
+from functools import partial
 from pathlib import Path
-from statistics import mean, stdev
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 import math
+# NumPy es obligatorio: lo usan los KPIs vectorizados, el índice de eventos, el formato
+# columnar y la decimación de los gráficos
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from comun.columnar import (EscritorColumnar, anexar_columnar, leer_encabezado,
+                            truncar_columnar, unir_columnar)
+from comun.decimacion import ancho_en_pixeles, grupos_boxplot, indices_min_max
+from comun.eventos import IndiceEventos
+from comun.lotes import (combinar_contadores, combinar_parciales, dividir_en_bloques,
+                         ejecutar_en_paralelo, expandir_entradas, fin_ultima_linea_completa,
+                         iterar_en_paralelo, lineas_de_bloque, nombres_repetidos, resumir_parcial)
+from comun.render import FORMATO, Renderizador
+from comun.seguimiento import seguir_lineas
+from comun.tiempo import EPOCH_MS, ParserTimestamps, datetime_desde_ms, iso_desde_ms
+
+import kpis_vectorizados
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 IN_FILE = PROJECT_ROOT / "datos" / "raw" / "sensor_data.csv"
 OUT_FILE = PROJECT_ROOT / "datos" / "processing" / "ultrasonic_processed.csv"
+OUT_BIN_FILE = OUT_FILE.with_suffix(".bin")
+CHECKPOINT_FILE = OUT_FILE.with_suffix(".checkpoint.json")
+GRAFICO_FILE = PROJECT_ROOT / "datos" / "processing" / "graficos_ultrasonic.png"
+
+# Resolución de los gráficos guardados; también fija cuántos puntos se dibujan (2 por píxel)
+DPI_GRAFICOS = 150
+TAM_FIGURA = (15, 10)
+
+# Formato de salida: "csv" (texto), "bin" (columnar, ver comun/columnar.py) o "ambos"
+FORMATO_SALIDA = "csv"
+
+# Backend de KPIs: "python" (acumulador en línea, memoria acotada; el mismo del modo
+# incremental y --follow) o "numpy" (guarda las distancias y reduce con NumPy, memoria O(n))
+KPI_BACKEND = "python"
+
+# Un archivo único se parte en bloques paralelos solo si cada bloque tendría al menos este tamaño
+TAM_MIN_BLOQUE = 16 * 1024 * 1024
 
-def verificar_estructura():
+def verificar_estructura(contar_lineas: bool = True):
     print("Verificando estructura de carpetas...")
     
     carpetas_necesarias = [
@@ -34,6 +78,9 @@ def verificar_estructura():
     print(f"   Archivo de entrada encontrado: {IN_FILE}")
     print(f"   Tamaño del archivo: {IN_FILE.stat().st_size} bytes")
     
+    if not contar_lineas:
+        return True
+    
     try:
         with open(IN_FILE, 'r', encoding='utf-8') as f:
             line_count = sum(1 for line in f)
@@ -58,117 +105,288 @@ def limpiar_valor_numerico(valor_raw: str) -> Optional[float]:
     except ValueError:
         return None
 
-def limpiar_timestamp(ts_raw: str) -> Optional[str]:
-    if not ts_raw:
-        return None
-    
-    ts_raw = ts_raw.strip()
-    
-    try:
-        ts_int = int(ts_raw)
-        dt = datetime.fromtimestamp(ts_int / 1000)
-        return dt.strftime("%Y-%m-%dT%H:%M:%S")
-    except (ValueError, OSError):
-        pass
-    
-    return None
+def limpiar_timestamp(ts_raw: str, parser: Optional[ParserTimestamps] = None) -> Optional[int]:
+    # Devuelve milisegundos epoch; el texto ISO solo se genera al escribir la salida
+    if parser is None:
+        parser = ParserTimestamps((EPOCH_MS,))
+    return parser.a_epoch_ms(ts_raw)
+
+CAMPOS_SIN_ENCABEZADO = ["ts_ms", "Sensor_ID", "distancia", "dist_avg", "estado",
+                         "num_eventos", "dur_promedio", "porc_alerta", "escenario"]
 
-def procesar_archivo() -> Tuple[List[Dict], Dict]:
-    datos_procesados = []
-    estadisticas = {
+def nuevas_estadisticas() -> Dict:
+    return {
         "total": 0,
         "keep": 0,
         "bad_ts": 0,
         "bad_val": 0,
         "alertas_count": 0
     }
+
+def leer_filas_crudas(fin: TextIO) -> Iterator[Dict]:
+    primera_linea = fin.readline().strip()
+    fin.seek(0)
+    
+    if primera_linea.startswith("ts_ms") or primera_linea.startswith("timestamp"):
+        reader = csv.DictReader(fin)
+        print("   Usando archivo con encabezados")
+    else:
+        reader = csv.DictReader(fin, fieldnames=CAMPOS_SIN_ENCABEZADO)
+        print("   Usando archivo sin encabezados")
+    
+    yield from reader
+
+def limpiar_filas(filas: Iterable[Dict], estadisticas: Dict, mostrar_progreso: bool = True) -> Iterator[Dict]:
+    parser_ts = ParserTimestamps((EPOCH_MS,))
+    
+    for row_num, row in enumerate(filas, 1):
+        estadisticas["total"] += 1
+        
+        distancia_raw = row.get("dist_avg", "")
+        distancia = limpiar_valor_numerico(distancia_raw)
+        if distancia is None:
+            estadisticas["bad_val"] += 1
+            continue
+        
+        ts_raw = row.get("ts_ms", "")
+        ts_clean = limpiar_timestamp(ts_raw, parser_ts)
+        if ts_clean is None:
+            estadisticas["bad_ts"] += 1
+            continue
+        
+        estado_raw = row.get("estado", "")
+        estado = "ALERT" if estado_raw.upper() in ["ALERTA", "ALERT", "1"] else "NORMAL"
+        
+        if estado == "ALERT":
+            estadisticas["alertas_count"] += 1
+        
+        estadisticas["keep"] += 1
+        yield {
+            "Timestamp": ts_clean,
+            "Distancia_cm": round(distancia, 2),
+            "Estado": estado
+        }
+        
+        if mostrar_progreso and row_num % 100 == 0:
+            print(f"   Procesadas {row_num} filas...")
+
+def procesar_archivo(estadisticas: Optional[Dict] = None, in_file: Path = IN_FILE) -> Iterator[Dict]:
+    # Generador: lee, limpia y clasifica fila por fila sin cargar el archivo en memoria.
+    # Los contadores de `estadisticas` quedan completos cuando el flujo se agota.
+    if estadisticas is None:
+        estadisticas = nuevas_estadisticas()
     
     try:
-        with open(IN_FILE, 'r', encoding="utf-8", newline="") as fin:
-            contenido = fin.read()
-            fin.seek(0)
-            
-            primera_linea = fin.readline().strip()
-            fin.seek(0)
-            
-            if primera_linea.startswith("ts_ms") or primera_linea.startswith("timestamp"):
-                reader = csv.DictReader(fin)
-                print("   Usando archivo con encabezados")
-            else:
-                fieldnames = ["ts_ms", "Sensor_ID", "distancia", "dist_avg", "estado", 
-                            "num_eventos", "dur_promedio", "porc_alerta", "escenario"]
-                reader = csv.DictReader(fin, fieldnames=fieldnames)
-                print("   Usando archivo sin encabezados")
-            
-            for row_num, row in enumerate(reader, 1):
-                estadisticas["total"] += 1
-                
-                distancia_raw = row.get("dist_avg", "")
-                distancia = limpiar_valor_numerico(distancia_raw)
-                if distancia is None:
-                    estadisticas["bad_val"] += 1
-                    continue
-                
-                ts_raw = row.get("ts_ms", "")
-                ts_clean = limpiar_timestamp(ts_raw)
-                if ts_clean is None:
-                    estadisticas["bad_ts"] += 1
-                    continue
-                
-                estado_raw = row.get("estado", "")
-                estado = "ALERT" if estado_raw.upper() in ["ALERTA", "ALERT", "1"] else "NORMAL"
-                
-                if estado == "ALERT":
-                    estadisticas["alertas_count"] += 1
-                
-                datos_procesados.append({
-                    "Timestamp": ts_clean,
-                    "Distancia_cm": round(distancia, 2),
-                    "Estado": estado
-                })
-                estadisticas["keep"] += 1
-                
-                if row_num % 100 == 0:
-                    print(f"   Procesadas {row_num} filas...")
-                
+        with open(in_file, 'r', encoding="utf-8", newline="") as fin:
+            yield from limpiar_filas(leer_filas_crudas(fin), estadisticas)
     except FileNotFoundError:
-        print(f"Error: No se puede encontrar el archivo {IN_FILE}")
-        return [], estadisticas
+        print(f"Error: No se puede encontrar el archivo {in_file}")
+        return
     except Exception as e:
         print(f"Error leyendo el archivo: {e}")
-        return [], estadisticas
+        return
     
     print(f"   Resumen de procesamiento:")
     print(f"      Filas totales: {estadisticas['total']}")
     print(f"      Filas válidas: {estadisticas['keep']}")
     print(f"      Errores timestamp: {estadisticas['bad_ts']}")
     print(f"      Errores valor: {estadisticas['bad_val']}")
-    
-    return datos_procesados, estadisticas
 
-def guardar_datos_procesados(datos_procesados: List[Dict]):
-    OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+def guardar_datos_procesados(datos_procesados: Iterable[Dict], out_file: Path = OUT_FILE,
+                             encabezado: bool = True, anexar: bool = False) -> Iterator[Dict]:
+    # Escribe cada fila al CSV de salida y la reenvía, para que el mismo flujo
+    # pueda alimentar calcular_estadisticas en una sola pasada.
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    with open(out_file, "a" if anexar else "w", encoding="utf-8", newline="") as fout:
+        writer = csv.writer(fout)
+        if encabezado:
+            writer.writerow(["ts_ms", "sensor_id", "valor(s)", "estado"])
+        
+        for fila in datos_procesados:
+            writer.writerow([iso_desde_ms(fila["Timestamp"], local=True), "HC-SR04", fila["Distancia_cm"], fila["Estado"]])
+            yield fila
+
+def guardar_columnar(datos_procesados: Iterable[Dict], out_file: Path = OUT_BIN_FILE) -> Iterator[Dict]:
+    # Igual que guardar_datos_procesados pero en columnas tipadas:
+    # int64 ms epoch, float32 distancia, uint8 estado (1 = ALERT)
+    with EscritorColumnar(out_file) as escritor:
+        for fila in datos_procesados:
+            escritor.agregar(fila["Timestamp"], fila["Distancia_cm"], fila["Estado"] == "ALERT")
+            yield fila
+
+def guardar_salidas(datos_procesados: Iterable[Dict], formato: str = FORMATO_SALIDA,
+                    out_file: Path = OUT_FILE, out_bin: Path = OUT_BIN_FILE,
+                    encabezado: bool = True, anexar: bool = False) -> Iterator[Dict]:
+    # anexar=True solo aplica al CSV; el columnar se anexa aparte (ver procesar_incremental)
+    if formato in ("csv", "ambos"):
+        datos_procesados = guardar_datos_procesados(datos_procesados, out_file, encabezado, anexar)
+    if formato in ("bin", "ambos"):
+        datos_procesados = guardar_columnar(datos_procesados, out_bin)
+    return datos_procesados
+
+class ColumnasGrafico:
+    # Columnas tipadas (ms, cm, alerta) tomadas de las filas mientras van hacia la salida:
+    # los gráficos salen de aquí, sin releer ni volver a parsear el archivo procesado
+    def __init__(self):
+        self.ts_ms, self.distancias, self.alertas = array("q"), array("d"), array("B")
+    
+    def __len__(self) -> int:
+        return len(self.distancias)
     
-    with open(OUT_FILE, "w", encoding="utf-8", newline="") as fout:
-        writer = csv.DictWriter(fout, fieldnames=["ts_ms", "sensor_id", "valor(s)", "estado"])
-        writer.writeheader()
+    def registrar(self, datos_procesados: Iterable[Dict]) -> Iterator[Dict]:
+        for fila in datos_procesados:
+            self.ts_ms.append(fila["Timestamp"])
+            self.distancias.append(fila["Distancia_cm"])
+            self.alertas.append(fila["Estado"] == "ALERT")
+            yield fila
+    
+    def extender(self, otras: "ColumnasGrafico") -> "ColumnasGrafico":
+        # Para unir los bloques de un mismo archivo en orden
+        self.ts_ms.extend(otras.ts_ms)
+        self.distancias.extend(otras.distancias)
+        self.alertas.extend(otras.alertas)
+        return self
+
+def duracion_segundos(inicio_ms: int, fin_ms: int) -> float:
+    # Resolución de 1 s, igual que los timestamps del CSV procesado
+    return float(fin_ms // 1000 - inicio_ms // 1000)
+
+# Campos float del estado del acumulador que pueden no ser finitos (p. ej. una lectura "inf")
+CAMPOS_FLOAT_ESTADO = ("minimo", "maximo", "media", "m2", "suma_cuadrados", "suma_duraciones_previas")
+
+def float_a_json(x: float):
+    # JSON estándar no admite Infinity/NaN: esos valores se guardan como texto ("inf", "nan")
+    # y float() los recupera al cargar
+    return x if math.isfinite(x) else str(x)
+
+class AcumuladorKPIs:
+    # Agregados en línea (memoria acotada): Welford para media/desviación,
+    # suma de cuadrados para RMS, histograma de 5 cm e índice de eventos de alerta.
+    def __init__(self):
+        self.n = 0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        self.media = 0.0
+        self.m2 = 0.0
+        self.suma_cuadrados = 0.0
+        self.histograma: Dict[int, int] = {}
+        self.eventos = IndiceEventos()
+        self.primera_fila: Optional[Dict] = None
+        # Eventos cerrados antes del último checkpoint (solo se guarda su conteo y suma)
+        self.eventos_previos = 0
+        self.suma_duraciones_previas = 0.0
+    
+    def agregar(self, fila: Dict):
+        d = fila["Distancia_cm"]
+        if self.primera_fila is None:
+            self.primera_fila = fila
+        self.n += 1
+        if d < self.minimo:
+            self.minimo = d
+        if d > self.maximo:
+            self.maximo = d
+        delta = d - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (d - self.media)
+        self.suma_cuadrados += d * d
         
+        if math.isfinite(d):  # inf no tiene bin de 5 cm
+            bin_val = round(d / 5) * 5
+            self.histograma[bin_val] = self.histograma.get(bin_val, 0) + 1
+        
+        self.eventos.agregar_muestra(fila["Timestamp"], fila["Estado"] == "ALERT")
+    
+    def a_estado(self) -> Dict:
+        # Estado serializable a JSON para el checkpoint del modo incremental, de tamaño
+        # acotado: los eventos cerrados se reducen a conteo y suma de duraciones y del
+        # índice de eventos solo queda el evento abierto
+        estado = dict(vars(self))
+        duraciones = self.eventos.duraciones_s()
+        estado["eventos_previos"] = self.eventos_previos + len(duraciones)
+        estado["suma_duraciones_previas"] = self.suma_duraciones_previas + float(duraciones.sum())
+        estado["histograma"] = [[k, v] for k, v in self.histograma.items()]
+        estado["eventos"] = self.eventos.a_estado(cerrados=False)
+        for clave in CAMPOS_FLOAT_ESTADO:
+            estado[clave] = float_a_json(estado[clave])
+        if not self.n:
+            # Sin muestras, mínimo y máximo son los ±inf iniciales: se guardan como null
+            estado["minimo"] = estado["maximo"] = None
+        if self.primera_fila is not None:
+            estado["primera_fila"] = dict(self.primera_fila, Distancia_cm=float_a_json(self.primera_fila["Distancia_cm"]))
+        return estado
+    
+    @classmethod
+    def desde_estado(cls, estado: Dict) -> "AcumuladorKPIs":
+        acumulador = cls()
+        vars(acumulador).update(estado)
+        for clave in CAMPOS_FLOAT_ESTADO:
+            if estado[clave] is not None:
+                setattr(acumulador, clave, float(estado[clave]))
+        if estado["minimo"] is None:
+            acumulador.minimo, acumulador.maximo = math.inf, -math.inf
+        if estado["primera_fila"] is not None:
+            acumulador.primera_fila = dict(estado["primera_fila"],
+                                           Distancia_cm=float(estado["primera_fila"]["Distancia_cm"]))
+        acumulador.histograma = {k: v for k, v in estado["histograma"]}
+        acumulador.eventos = IndiceEventos.desde_estado(estado["eventos"])
+        return acumulador
+    
+    def consumir(self, datos_procesados: Iterable[Dict]) -> "AcumuladorKPIs":
         for fila in datos_procesados:
-            processed_row = {
-                "ts_ms": fila["Timestamp"],
-                "sensor_id": "HC-SR04",
-                "valor(s)": fila["Distancia_cm"],
-                "estado": fila["Estado"]
-            }
-            writer.writerow(processed_row)
-
-def calcular_estadisticas(datos_procesados: List[Dict], estadisticas: Dict) -> Tuple[Dict, Dict, Dict]:
-    if not datos_procesados:
+            self.agregar(fila)
+        return self
+    
+    def resumen(self) -> Dict:
+        n = self.n
+        if not n:
+            return {"n": 0}
+        histograma = self.histograma
+        return {
+            "n": n,
+            "min": self.minimo,
+            "max": self.maximo,
+            "media": self.media,
+            "std": math.sqrt(self.m2 / (n - 1)) if n > 1 else 0,
+            "std_poblacional": math.sqrt(self.m2 / n),
+            "rms": math.sqrt(self.suma_cuadrados / n),
+            "frecuencia_pico": max(histograma.items(), key=lambda x: x[1])[0] if histograma else 0,
+            "duraciones": self.eventos.duraciones_s().tolist(),
+            "eventos_previos": self.eventos_previos,
+            "suma_duraciones_previas": self.suma_duraciones_previas,
+        }
+    
+    def parcial(self) -> Dict:
+        # Forma combinable entre archivos (ver comun.lotes.combinar_parciales)
+        return {
+            "n": self.n,
+            "media": self.media,
+            "m2": self.m2,
+            "suma_cuadrados": self.suma_cuadrados,
+            "min": self.minimo,
+            "max": self.maximo,
+            "histograma": dict(self.histograma),
+            "duraciones": self.eventos.duraciones_s().tolist(),
+            # Para unir eventos entre bloques contiguos (ver unir_eventos)
+            "primer_ts": self.primera_fila["Timestamp"] if self.primera_fila else None,
+            "primer_estado": self.primera_fila["Estado"] if self.primera_fila else None,
+            "evento_abierto": self.eventos.abierto_ts,
+        }
+
+def crear_acumulador(backend: str = KPI_BACKEND):
+    if backend == "numpy":
+        return kpis_vectorizados.AcumuladorArrays()
+    return AcumuladorKPIs()
+
+def calcular_estadisticas(datos_procesados: Iterable[Dict], estadisticas: Dict,
+                          backend: str = KPI_BACKEND) -> Tuple[Dict, Dict, Dict]:
+    resumen = crear_acumulador(backend).consumir(datos_procesados).resumen()
+    return calcular_kpis_desde_resumen(resumen, estadisticas)
+
+def calcular_kpis_desde_resumen(resumen: Dict, estadisticas: Dict) -> Tuple[Dict, Dict, Dict]:
+    if not resumen["n"]:
         print("   No hay datos para calcular estadísticas")
         return {}, {}, {}
-        
-    distancias = [fila["Distancia_cm"] for fila in datos_procesados]
-    estados = [fila["Estado"] for fila in datos_procesados]
     
     descartes_totales = estadisticas["bad_ts"] + estadisticas["bad_val"]
     pct_descartadas = (descartes_totales / estadisticas["total"] * 100.0) if estadisticas["total"] else 0.0
@@ -181,40 +399,30 @@ def calcular_estadisticas(datos_procesados: List[Dict], estadisticas: Dict) -> T
         "%_descartadas": round(pct_descartadas, 2),
     }
     
+    n = resumen["n"]
     kpis_basicos = {
-        'n': len(distancias),
-        'min': round(min(distancias), 2),
-        "max": round(max(distancias), 2),
-        "prom": round(mean(distancias), 2),
-        "desviacion_std": round(stdev(distancias), 2) if len(distancias) > 1 else 0,
+        'n': n,
+        'min': round(resumen["min"], 2),
+        "max": round(resumen["max"], 2),
+        "prom": round(resumen["media"], 2),
+        "desviacion_std": round(resumen["std"], 2) if n > 1 else 0,
         "alertas": estadisticas["alertas_count"],
-        "alertas_pct": round(100.0 * estadisticas["alertas_count"] / len(distancias), 2),
+        "alertas_pct": round(100.0 * estadisticas["alertas_count"] / n, 2),
     }
     
-    kpis_avanzados = calcular_kpis_avanzados(distancias)
+    kpis_avanzados = calcular_kpis_avanzados(resumen)
     
-    duraciones = []
-    in_event = False
-    event_start = None
-    
-    for fila in datos_procesados:
-        current_time = datetime.strptime(fila["Timestamp"], "%Y-%m-%dT%H:%M:%S")
-        
-        if fila["Estado"] == "ALERT" and not in_event:
-            in_event = True
-            event_start = current_time
-        elif fila["Estado"] == "NORMAL" and in_event and event_start:
-            in_event = False
-            duracion = (current_time - event_start).total_seconds()
-            duraciones.append(duracion)
-    
-    kpis_avanzados["duracion_promedio_eventos"] = round(mean(duraciones), 2) if duraciones else 0
-    kpis_avanzados["total_eventos"] = len(duraciones)
+    # Eventos cerrados en corridas incrementales anteriores: solo llegan su conteo y suma
+    duraciones = resumen["duraciones"]
+    total_eventos = resumen.get("eventos_previos", 0) + len(duraciones)
+    suma_duraciones = resumen.get("suma_duraciones_previas", 0.0) + sum(duraciones)
+    kpis_avanzados["duracion_promedio_eventos"] = round(suma_duraciones / total_eventos, 2) if total_eventos else 0
+    kpis_avanzados["total_eventos"] = total_eventos
     
     return kpis_calidad, kpis_basicos, kpis_avanzados
 
-def calcular_kpis_avanzados(distancias: List[float]) -> Dict:
-    if not distancias:
+def calcular_kpis_avanzados(resumen: Dict) -> Dict:
+    if not resumen["n"]:
         return {
             "rms": 0,
             "thd": 0,
@@ -223,45 +431,376 @@ def calcular_kpis_avanzados(distancias: List[float]) -> Dict:
             "total_eventos": 0
         }
     
-    rms = math.sqrt(sum(d**2 for d in distancias) / len(distancias))
-    
-    fundamental = mean(distancias)
-    harmonic_distortion = math.sqrt(sum((d - fundamental)**2 for d in distancias) / len(distancias))
+    fundamental = resumen["media"]
+    harmonic_distortion = resumen["std_poblacional"]
     thd = (harmonic_distortion / fundamental) * 100 if fundamental != 0 else 0
     
-    histograma = {}
-    for d in distancias:
-        bin_val = round(d / 5) * 5
-        histograma[bin_val] = histograma.get(bin_val, 0) + 1
-    
-    frecuencia_pico = max(histograma.items(), key=lambda x: x[1])[0] if histograma else 0
-    
     return {
-        "rms": round(rms, 2),
+        "rms": round(resumen["rms"], 2),
         "thd": round(thd, 2),
-        "frecuencia_pico": frecuencia_pico
+        "frecuencia_pico": resumen["frecuencia_pico"]
     }
 
-def generar_graficos(datos_procesados: List[Dict]):
-    if not datos_procesados:
-        print("No hay datos para generar gráficos")
+def procesar_un_archivo(in_file: Path, formato: str = FORMATO_SALIDA, dpi: Optional[int] = None,
+                        backend: str = KPI_BACKEND) -> Tuple[Dict, Dict, Optional[Dict]]:
+    # Unidad de trabajo del modo lote: limpia un archivo, escribe su salida procesada
+    # y devuelve sus contadores y KPIs parciales para combinarlos después. Con dpi,
+    # también los datos ya reducidos de su gráfico (preparar_graficos), listos para dibujar,
+    # armados con las filas en la misma pasada.
+    out_file = OUT_FILE.parent / f"{Path(in_file).stem}_processed.csv"
+    estadisticas = nuevas_estadisticas()
+    acumulador = crear_acumulador(backend)
+    flujo = guardar_salidas(procesar_archivo(estadisticas, Path(in_file)), formato, out_file, out_file.with_suffix(".bin"))
+    
+    datos_grafico = None
+    if dpi is not None:
+        columnas = ColumnasGrafico()
+        acumulador.consumir(columnas.registrar(flujo))
+        datos_grafico = preparar_graficos(columnas, dpi)
+    else:
+        acumulador.consumir(flujo)
+    return estadisticas, acumulador.parcial(), datos_grafico
+
+def unir_eventos(parciales: List[Dict]) -> Tuple[List[float], Optional[int]]:
+    # Une las duraciones de bloques contiguos de un mismo archivo. Un evento abierto al
+    # final de un bloque continúa en el siguiente: o se cierra en su primera fila NORMAL,
+    # o su primer evento en realidad empezó antes (se corrige el inicio).
+    duraciones: List[float] = []
+    abierto: Optional[int] = None
+    
+    for p in parciales:
+        if not p["n"]:
+            continue
+        propias = list(p["duraciones"])
+        siguiente_abierto = p["evento_abierto"]
+        
+        if abierto is not None:
+            if p["primer_estado"] == "NORMAL":
+                duraciones.append(duracion_segundos(abierto, p["primer_ts"]))
+            elif propias:
+                propias[0] += duracion_segundos(abierto, p["primer_ts"])
+            else:
+                siguiente_abierto = abierto
+        
+        duraciones.extend(propias)
+        abierto = siguiente_abierto
+    
+    return duraciones, abierto
+
+def calcular_estadisticas_globales(resultados: List[Tuple[Dict, Dict]],
+                                   unir_bloques: bool = False) -> Tuple[Dict, Dict, Dict]:
+    # unir_bloques=True: los resultados son bloques consecutivos de un mismo archivo
+    estadisticas = combinar_contadores(r[0] for r in resultados)
+    parcial = combinar_parciales(r[1] for r in resultados)
+    
+    resumen = resumir_parcial(parcial)
+    if resumen["n"]:
+        histograma = parcial["histograma"]
+        resumen["frecuencia_pico"] = max(histograma.items(), key=lambda x: x[1])[0]
+        if unir_bloques:
+            resumen["duraciones"], _ = unir_eventos([r[1] for r in resultados])
+        else:
+            resumen["duraciones"] = [d for r in resultados for d in r[1]["duraciones"]]
+    return calcular_kpis_desde_resumen(resumen, estadisticas)
+
+def es_encabezado(linea: str) -> bool:
+    texto = linea.strip()
+    return texto.startswith("ts_ms") or texto.startswith("timestamp")
+
+def detectar_encabezado(in_file: Path) -> Tuple[List[str], int]:
+    # Devuelve los nombres de columna y el byte donde empiezan los datos
+    with open(in_file, "rb") as f:
+        primera = f.readline()
+    texto = primera.decode("utf-8").strip()
+    if es_encabezado(texto):
+        return next(csv.reader([texto])), len(primera)
+    return CAMPOS_SIN_ENCABEZADO, 0
+
+def procesar_bloque(tarea: Tuple) -> Tuple[Dict, Dict, ColumnasGrafico]:
+    # Limpia un rango de bytes del archivo y escribe sus filas (CSV sin encabezado y/o
+    # columnar) en archivos parte; el proceso principal concatena las partes en orden.
+    # También devuelve las columnas del bloque para el gráfico.
+    in_file, inicio, fin, campos, parte, formato, backend = tarea
+    estadisticas = nuevas_estadisticas()
+    acumulador = crear_acumulador(backend)
+    columnas = ColumnasGrafico()
+    
+    filas = csv.DictReader(lineas_de_bloque(in_file, inicio, fin), fieldnames=campos)
+    flujo = limpiar_filas(filas, estadisticas, mostrar_progreso=False)
+    acumulador.consumir(columnas.registrar(
+        guardar_salidas(flujo, formato, parte, parte.with_suffix(".bin"), encabezado=False)))
+    
+    return estadisticas, acumulador.parcial(), columnas
+
+def procesar_archivo_en_bloques(in_file: Path = IN_FILE, out_file: Path = OUT_FILE,
+                                max_workers: Optional[int] = None, formato: str = FORMATO_SALIDA,
+                                backend: str = KPI_BACKEND) -> List[Tuple[Dict, Dict, ColumnasGrafico]]:
+    # Versión paralela de procesar_archivo + guardar_datos_procesados para un solo archivo
+    # grande. La salida, los contadores y los KPIs son los mismos que en la versión serie.
+    campos, inicio_datos = detectar_encabezado(in_file)
+    print("   Usando archivo con encabezados" if inicio_datos else "   Usando archivo sin encabezados")
+    
+    n_bloques = (max_workers or os.cpu_count() or 1) * 4
+    bloques = dividir_en_bloques(in_file, n_bloques, inicio_datos)
+    partes = [out_file.parent / f".{out_file.stem}.parte{i}.csv" for i in range(len(bloques))]
+    tareas = [(in_file, ini, fin, campos, parte, formato, backend) for (ini, fin), parte in zip(bloques, partes)]
+    
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    print(f"   Procesando {len(bloques)} bloques en paralelo...")
+    try:
+        resultados = ejecutar_en_paralelo(procesar_bloque, tareas, max_workers)
+        
+        if formato in ("csv", "ambos"):
+            with open(out_file, "w", encoding="utf-8", newline="") as fout:
+                csv.writer(fout).writerow(["ts_ms", "sensor_id", "valor(s)", "estado"])
+                for parte in partes:
+                    with open(parte, "r", encoding="utf-8", newline="") as fparte:
+                        shutil.copyfileobj(fparte, fout)
+        if formato in ("bin", "ambos"):
+            unir_columnar([parte.with_suffix(".bin") for parte in partes], out_file.with_suffix(".bin"))
+    finally:
+        for parte in partes:
+            parte.unlink(missing_ok=True)
+            parte.with_suffix(".bin").unlink(missing_ok=True)
+    
+    return resultados
+
+def usar_bloques(in_file: Path, max_workers: Optional[int]) -> bool:
+    workers = max_workers or os.cpu_count() or 1
+    return workers > 1 and in_file.stat().st_size >= 2 * TAM_MIN_BLOQUE
+
+def procesar_lote(entrada: str, max_workers: Optional[int] = None, formato: str = FORMATO_SALIDA,
+                  dpi: int = DPI_GRAFICOS, formato_grafico: str = FORMATO, backend: str = KPI_BACKEND):
+    archivos = expandir_entradas(entrada)
+    if not archivos:
+        print(f"No se encontraron archivos para: {entrada}")
         return
     
-    distancias = [fila["Distancia_cm"] for fila in datos_procesados]
-    timestamps = [fila["Timestamp"] for fila in datos_procesados]
-    estados = [fila["Estado"] for fila in datos_procesados]
+    # Las salidas se nombran por el archivo de entrada: dos con el mismo nombre se pisarían
+    repetidos = nombres_repetidos(archivos)
+    if repetidos:
+        print("Hay archivos con el mismo nombre en distintas carpetas (sus salidas se pisarían):")
+        for rutas in repetidos.values():
+            print("   " + ", ".join(str(r) for r in rutas))
+        return
     
-    tiempos = [datetime.strptime(ts, "%Y-%m-%dT%H:%M:%S") for ts in timestamps]
+    print(f"\nProcesando {len(archivos)} archivos en paralelo...")
+    resultados = []
+    # El lote nunca abre ventanas: el gráfico de cada archivo se envía al renderizador en
+    # cuanto ese archivo termina y se dibuja en otro proceso mientras se limpian los siguientes
+    with Renderizador(sin_pantalla=True, dpi=dpi, formato=formato_grafico) as renderizador:
+        tarea = partial(procesar_un_archivo, formato=formato, dpi=dpi, backend=backend)
+        for in_file, (estadisticas, parcial, datos_grafico) in zip(
+                archivos, iterar_en_paralelo(tarea, archivos, max_workers)):
+            resultados.append((estadisticas, parcial))
+            if datos_grafico is not None:
+                renderizador.enviar(f"{in_file.stem}_graficos", dibujar_graficos, datos_grafico,
+                                    path=OUT_FILE.parent / f"{in_file.stem}_graficos")
+        
+        kpis_calidad, kpis_basicos, kpis_avanzados = calcular_estadisticas_globales(resultados)
+        if not kpis_calidad:
+            print("No se pudieron procesar datos")
+            return
+        
+        generar_informe(kpis_calidad, kpis_basicos, kpis_avanzados,
+                        entrada=entrada, salida=OUT_FILE.parent, grafico=OUT_FILE.parent)
+        renderizador.informe()
+
+def huella_archivo(in_file: Path, n_bytes: int = 256) -> str:
+    # Primeros bytes del archivo: detectan si fue reemplazado por otro distinto
+    with open(in_file, "rb") as f:
+        return f.read(n_bytes).hex()
+
+def cargar_checkpoint(in_file: Path, checkpoint_file: Path = CHECKPOINT_FILE,
+                      formato: str = FORMATO_SALIDA) -> Optional[Dict]:
+    # Devuelve el checkpoint solo si sigue siendo válido para el archivo actual
+    try:
+        with open(checkpoint_file, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
     
-    plt.figure(figsize=(15, 10))
+    tam = in_file.stat().st_size
+    huella = checkpoint.get("huella", "")
+    if (checkpoint.get("version") != 4 or checkpoint.get("in_file") != str(in_file)
+            or checkpoint.get("formato") != formato or checkpoint["offset"] > tam
+            or huella_archivo(in_file, len(huella) // 2) != huella):
+        return None
     
-    plt.subplot(2, 2, 1)
-    plt.plot(tiempos, distancias, 'b-', alpha=0.7, linewidth=1, label='Distancia')
+    # Las salidas deben tener al menos lo registrado (lo que sobre se trunca al reanudar)
+    out_file = Path(checkpoint["out_file"])
+    try:
+        if formato in ("csv", "ambos") and out_file.stat().st_size < checkpoint["bytes_csv"]:
+            return None
+        if formato in ("bin", "ambos") and leer_encabezado(out_file.with_suffix(".bin"))[0] < checkpoint["filas_bin"]:
+            return None
+    except (OSError, ValueError):
+        return None
+    return checkpoint
+
+def guardar_checkpoint(checkpoint: Dict, checkpoint_file: Path = CHECKPOINT_FILE):
+    # Escritura atómica: un corte a mitad de escritura no deja un checkpoint corrupto
+    temporal = checkpoint_file.with_name(checkpoint_file.name + ".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, allow_nan=False)
+    os.replace(temporal, checkpoint_file)
+
+def procesar_incremental(in_file: Path = IN_FILE, out_file: Path = OUT_FILE,
+                         formato: str = FORMATO_SALIDA,
+                         checkpoint_file: Path = CHECKPOINT_FILE) -> Tuple[Dict, Dict, ColumnasGrafico]:
+    # Procesa solo los bytes agregados desde la última corrida y anexa a la salida
+    # (CSV y columnar), con costo proporcional a lo nuevo. El checkpoint guarda el offset,
+    # los contadores, los agregados del acumulador de KPIs (incluido el evento de alerta
+    # abierto), los nombres de columna y el largo de cada salida. Solo se procesan líneas
+    # completas: una línea a medio escribir queda para la siguiente corrida. Las columnas
+    # devueltas (para el gráfico) son solo las de las filas nuevas de esta corrida.
+    checkpoint = cargar_checkpoint(in_file, checkpoint_file, formato)
+    out_bin = out_file.with_suffix(".bin")
+    
+    if checkpoint is None:
+        campos, offset = detectar_encabezado(in_file)
+        estadisticas = nuevas_estadisticas()
+        acumulador = AcumuladorKPIs()
+        nuevo = True
+        print("   Sin checkpoint válido: procesando desde el inicio")
+    else:
+        campos, offset = checkpoint["campos"], checkpoint["offset"]
+        estadisticas = checkpoint["estadisticas"]
+        acumulador = AcumuladorKPIs.desde_estado(checkpoint["acumulador"])
+        nuevo = False
+        print(f"   Reanudando desde el byte {offset}")
+        # Un corte entre anexar y guardar el checkpoint deja filas de más en las salidas:
+        # se descartan para no duplicarlas al reprocesar esos bytes
+        if formato in ("csv", "ambos"):
+            os.truncate(out_file, checkpoint["bytes_csv"])
+        if formato in ("bin", "ambos"):
+            truncar_columnar(out_bin, checkpoint["filas_bin"])
+    
+    fin = max(offset, fin_ultima_linea_completa(in_file))
+    filas = csv.DictReader(lineas_de_bloque(in_file, offset, fin), fieldnames=campos)
+    flujo = limpiar_filas(filas, estadisticas)
+    
+    # Las filas nuevas del columnar van a una parte que después se anexa en su lugar
+    parte_bin = out_bin if nuevo else out_bin.with_name(f".{out_bin.name}.nuevo")
+    columnas = ColumnasGrafico()
+    acumulador.consumir(columnas.registrar(guardar_salidas(flujo, formato, out_file, parte_bin,
+                                                           encabezado=nuevo, anexar=not nuevo)))
+    
+    if formato in ("bin", "ambos") and not nuevo:
+        anexar_columnar(parte_bin, out_bin)
+        parte_bin.unlink(missing_ok=True)
+    
+    print(f"   Filas nuevas válidas: {len(columnas)}")
+    
+    guardar_checkpoint({
+        "version": 4,
+        "in_file": str(in_file),
+        "out_file": str(out_file),
+        "formato": formato,
+        "huella": huella_archivo(in_file),
+        "offset": fin,
+        "campos": campos,
+        "estadisticas": estadisticas,
+        "acumulador": acumulador.a_estado(),
+        "bytes_csv": out_file.stat().st_size if formato in ("csv", "ambos") else None,
+        "filas_bin": leer_encabezado(out_bin)[0] if formato in ("bin", "ambos") else None,
+    }, checkpoint_file)
+    
+    return estadisticas, acumulador.resumen(), columnas
+
+def estado_en_vivo(acumulador: AcumuladorKPIs, estadisticas: Dict, ultimo_ts: Optional[int]) -> str:
+    # Línea de estado del modo --follow; todo sale de los agregados en línea del acumulador
+    resumen = acumulador.resumen()
+    n = resumen["n"]
+    if not n:
+        return f"   Filas leídas: {estadisticas['total']} (ninguna válida todavía)"
+    duraciones = resumen["duraciones"]
+    linea = (f"   n={n}  prom={resumen['media']:.2f} cm  std={resumen['std']:.2f} cm"
+             f"  rms={resumen['rms']:.2f} cm  alertas={100.0 * estadisticas['alertas_count'] / n:.2f}%"
+             f"  eventos={len(duraciones)}")
+    if duraciones:
+        linea += f"  dur_prom={sum(duraciones) / len(duraciones):.2f} s"
+    if acumulador.eventos.abierto_ts is not None and ultimo_ts is not None:
+        linea += f"  evento en curso: {duracion_segundos(acumulador.eventos.abierto_ts, ultimo_ts):.0f} s"
+    return linea
+
+def seguir_archivo(in_file: Path = IN_FILE, intervalo_informe: float = 5.0,
+                   desde_inicio: bool = True, detener=None) -> Tuple[Dict, Dict]:
+    # Modo en vivo (como `tail -f`): cada fila nueva pasa por limpiar_filas y actualiza
+    # el acumulador en O(1) (Welford, sumas para RMS, evento de alerta abierto).
+    # Usa inotify si está disponible y si no, sondeo del tamaño. Termina con Ctrl+C.
+    campos, inicio_datos = detectar_encabezado(in_file)
+    desde = inicio_datos if desde_inicio else fin_ultima_linea_completa(in_file)
+    estadisticas = nuevas_estadisticas()
+    acumulador = AcumuladorKPIs()
+    ultimo_ts = None
+    
+    print(f"   Siguiendo {in_file} (Ctrl+C para terminar)...")
+    # Tras una rotación el archivo nuevo se lee desde el byte 0: su encabezado no es una fila
+    filas = csv.DictReader(seguir_lineas(in_file, max(desde, inicio_datos), detener=detener,
+                                         es_encabezado=es_encabezado), fieldnames=campos)
+    proximo_informe = time.monotonic() + intervalo_informe
+    try:
+        for fila in limpiar_filas(filas, estadisticas, mostrar_progreso=False):
+            acumulador.agregar(fila)
+            ultimo_ts = fila["Timestamp"]
+            if time.monotonic() >= proximo_informe:
+                print(estado_en_vivo(acumulador, estadisticas, ultimo_ts))
+                proximo_informe = time.monotonic() + intervalo_informe
+    except KeyboardInterrupt:
+        print("\n   Seguimiento detenido")
+    
+    print(estado_en_vivo(acumulador, estadisticas, ultimo_ts))
+    return estadisticas, acumulador.resumen()
+
+def preparar_graficos(columnas: ColumnasGrafico, dpi: int = DPI_GRAFICOS) -> Optional[Dict]:
+    """
+    A partir de las columnas tipadas, solo lo que se dibuja: series decimadas (mín/máx
+    por píxel), franjas de alerta, conteos del histograma y cuartiles del boxplot.
+    El resultado es chico y se puede enviar a otro proceso.
+    """
+    if not len(columnas):
+        return None
+    
+    ts_ms = np.frombuffer(columnas.ts_ms, dtype=np.int64)
+    distancias = np.frombuffer(columnas.distancias, dtype=np.float64)
+    alertas = np.frombuffer(columnas.alertas, dtype=np.uint8).astype(bool)
+    
+    def fechas(indices):
+        # Solo los puntos que se dibujan pasan a datetime
+        return mdates.date2num([datetime_desde_ms(t, local=True) for t in ts_ms[indices].tolist()])
+    
+    ancho = ancho_en_pixeles(TAM_FIGURA[0], dpi, columnas=2)
+    i_dist = indices_min_max(distancias, ancho)
+    i_estado = indices_min_max(alertas.view(np.uint8), ancho)
+    inicios, fines = IndiceEventos.desde_arrays(ts_ms, alertas).tramos()
+    conteos, bordes = np.histogram(distancias, bins=20)
+    
+    return {
+        "t_dist": fechas(i_dist),
+        "distancias": distancias[i_dist],
+        "t_estado": fechas(i_estado),
+        "estados": alertas[i_estado].astype(np.uint8),
+        "franjas_inicio": fechas(inicios),
+        "franjas_fin": fechas(np.minimum(fines, len(ts_ms) - 1)),
+        "conteos": conteos,
+        "bordes": bordes,
+        "cajas": grupos_boxplot(distancias, [('Normal', ~alertas), ('Alerta', alertas)]),
+    }
+
+def dibujar_graficos(datos: Dict):
+    # Arma la figura de 4 paneles a partir de preparar_graficos (puede correr en otro proceso)
+    figura = plt.figure(figsize=TAM_FIGURA)
+    
+    # Serie temporal decimada y alertas como franjas
+    ax = plt.subplot(2, 2, 1)
+    plt.plot(mdates.num2date(datos["t_dist"]), datos["distancias"], 'b-', alpha=0.7, linewidth=1, label='Distancia')
     
-    alert_times = [tiempos[i] for i, estado in enumerate(estados) if estado == "ALERT"]
-    alert_dists = [distancias[i] for i, estado in enumerate(estados) if estado == "ALERT"]
-    if alert_times:
-        plt.scatter(alert_times, alert_dists, color='red', s=10, alpha=0.6, label='Alerta')
+    if len(datos["franjas_inicio"]):
+        limites_y = ax.get_ylim()  # las franjas ocupan todo el alto, no deben cambiar la escala
+        ax.broken_barh(list(zip(datos["franjas_inicio"], datos["franjas_fin"] - datos["franjas_inicio"])), (0, 1),
+                       transform=ax.get_xaxis_transform(), color='red', alpha=0.2, label='Alerta')
+        ax.set_ylim(limites_y)
     
     plt.axhline(y=30, color='r', linestyle='--', alpha=0.5, label='Umbral (30cm)')
     plt.xlabel('Tiempo')
@@ -271,8 +810,10 @@ def generar_graficos(datos_procesados: List[Dict]):
     plt.grid(True, alpha=0.3)
     plt.xticks(rotation=45)
     
+    # Histograma con los conteos ya calculados
     plt.subplot(2, 2, 2)
-    plt.hist(distancias, bins=20, alpha=0.7, edgecolor='black', color='skyblue')
+    bordes = datos["bordes"]
+    plt.hist(bordes[:-1], bins=bordes, weights=datos["conteos"], alpha=0.7, edgecolor='black', color='skyblue')
     plt.axvline(x=30, color='r', linestyle='--', label='Umbral de alerta (30cm)')
     plt.xlabel('Distancia (cm)')
     plt.ylabel('Frecuencia')
@@ -280,29 +821,16 @@ def generar_graficos(datos_procesados: List[Dict]):
     plt.legend()
     plt.grid(True, alpha=0.3)
     
-    plt.subplot(2, 2, 3)
-    dist_normal = [distancias[i] for i, estado in enumerate(estados) if estado == "NORMAL"]
-    dist_alerta = [distancias[i] for i, estado in enumerate(estados) if estado == "ALERT"]
-    
-    data = []
-    labels = []
-    
-    if dist_normal:
-        data.append(dist_normal)
-        labels.append('Normal')
-    if dist_alerta:
-        data.append(dist_alerta) 
-        labels.append('Alerta')
-    
-    if data:
-        plt.boxplot(data, labels=labels)
+    # Boxplot con cuartiles precalculados
+    ax = plt.subplot(2, 2, 3)
+    if datos["cajas"]:
+        ax.bxp(datos["cajas"])
         plt.ylabel('Distancia (cm)')
         plt.title('Boxplot - Comparación de Escenarios')
         plt.grid(True, alpha=0.3)
     
     plt.subplot(2, 2, 4)
-    estado_numerico = [1 if estado == "ALERT" else 0 for estado in estados]
-    plt.plot(tiempos, estado_numerico, 'r-', linewidth=2)
+    plt.plot(mdates.num2date(datos["t_estado"]), datos["estados"], 'r-', linewidth=2)
     plt.xlabel('Tiempo')
     plt.ylabel('Estado (0=Normal, 1=Alerta)')
     plt.title('Estados del Sistema')
@@ -310,13 +838,26 @@ def generar_graficos(datos_procesados: List[Dict]):
     plt.xticks(rotation=45)
     
     plt.tight_layout()
+    return figura
+
+def generar_graficos(columnas: ColumnasGrafico, renderizador: Optional[Renderizador] = None,
+                     grafico_path: Path = GRAFICO_FILE) -> Optional[Path]:
+    # Sin renderizador: modo interactivo de siempre (guarda y muestra la ventana)
+    renderizador = renderizador or Renderizador(dpi=DPI_GRAFICOS)
+    datos = preparar_graficos(columnas, renderizador.dpi)
+    if datos is None:
+        print("No hay datos para generar gráficos")
+        return None
     
-    grafico_path = PROJECT_ROOT / "datos" / "processing" / "graficos_ultrasonic.png"
-    plt.savefig(grafico_path, dpi=150, bbox_inches='tight')
-    print(f"Gráficos guardados en: {grafico_path}")
-    plt.show()
+    grafico_path = renderizador.enviar("graficos_ultrasonic", dibujar_graficos, datos, path=grafico_path)
+    if renderizador.sin_pantalla:
+        print(f"Gráficos en preparación (segundo plano): {grafico_path}")
+    else:
+        print(f"Gráficos guardados en: {grafico_path}")
+    return grafico_path
 
-def generar_informe(kpis_calidad: Dict, kpis_basicos: Dict, kpis_avanzados: Dict):
+def generar_informe(kpis_calidad: Dict, kpis_basicos: Dict, kpis_avanzados: Dict,
+                    entrada=IN_FILE, salida=OUT_FILE, grafico: Optional[Path] = GRAFICO_FILE):
     print("\n" + "="*70)
     print("INFORME DE RESULTADOS - VIGILANTE ULTRASÓNICO")
     print("="*70)
@@ -343,38 +884,91 @@ def generar_informe(kpis_calidad: Dict, kpis_basicos: Dict, kpis_avanzados: Dict
     print(f"   Duración promedio eventos: {kpis_avanzados['duracion_promedio_eventos']} s")
 
     print(f"\nARCHIVOS:")
-    print(f"   Entrada: {IN_FILE}")
-    print(f"   Salida procesada: {OUT_FILE}")
-    print(f"   Gráficos: {PROJECT_ROOT/'datos'/'processing'/'graficos_ultrasonic.png'}")
+    print(f"   Entrada: {entrada}")
+    print(f"   Salida procesada: {salida}")
+    if grafico is not None:
+        print(f"   Gráficos: {grafico}")
 
     print(f"\nPROCESAMIENTO COMPLETADO EXITOSAMENTE")
     print("="*70)
 
 def main():
+    parser = argparse.ArgumentParser(description="Procesamiento de datos del vigilante ultrasónico")
+    parser.add_argument("--batch", metavar="ENTRADA",
+                        help="directorio o glob de archivos crudos a procesar en paralelo")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="procesos del modo lote o por bloques (por defecto, uno por núcleo)")
+    parser.add_argument("--bloques", action="store_true",
+                        help="procesar el archivo en bloques paralelos aunque sea pequeño")
+    parser.add_argument("--formato", choices=["csv", "bin", "ambos"], default=FORMATO_SALIDA,
+                        help="formato de salida: CSV de texto, columnar binario o ambos")
+    parser.add_argument("--kpis", choices=["python", "numpy"], default=KPI_BACKEND,
+                        help="backend de KPIs: acumulador en línea (memoria acotada) o arrays NumPy")
+    parser.add_argument("--incremental", action="store_true",
+                        help="procesar solo lo agregado desde la última corrida (usa un checkpoint)")
+    parser.add_argument("--follow", action="store_true",
+                        help="seguir el archivo en vivo (como tail -f) actualizando los KPIs")
+    parser.add_argument("--intervalo", type=float, default=5.0,
+                        help="segundos entre líneas de estado en el modo --follow")
+    parser.add_argument("--sin-pantalla", action="store_true",
+                        help="gráficos sin ventana (backend Agg), renderizados en otro proceso")
+    parser.add_argument("--dpi", type=int, default=DPI_GRAFICOS, help="resolución de los gráficos")
+    parser.add_argument("--formato-grafico", default=FORMATO, help="formato de imagen: png, svg, pdf, ...")
+    args = parser.parse_args()
+    
     print("PROCESAMIENTO DE DATOS - VIGILANTE ULTRASÓNICO")
     
-    if not verificar_estructura():
+    if args.batch:
+        procesar_lote(args.batch, args.workers, args.formato, args.dpi, args.formato_grafico, args.kpis)
+        return
+    
+    if not verificar_estructura(contar_lineas=not (args.incremental or args.follow)):
         print("No se puede continuar - archivo de datos no disponible")
         return
     
     print("\nIniciando procesamiento de datos...")
     
-    datos_procesados, estadisticas = procesar_archivo()
+    if args.follow:
+        estadisticas, resumen = seguir_archivo(IN_FILE, args.intervalo)
+        kpis_calidad, kpis_basicos, kpis_avanzados = calcular_kpis_desde_resumen(resumen, estadisticas)
+        if kpis_calidad:
+            generar_informe(kpis_calidad, kpis_basicos, kpis_avanzados, salida="-", grafico=None)
+        return
     
-    if not datos_procesados:
+    if args.incremental:
+        estadisticas, resumen, columnas = procesar_incremental(IN_FILE, OUT_FILE, args.formato)
+        kpis_calidad, kpis_basicos, kpis_avanzados = calcular_kpis_desde_resumen(resumen, estadisticas)
+    elif args.bloques or usar_bloques(IN_FILE, args.workers):
+        resultados = procesar_archivo_en_bloques(IN_FILE, OUT_FILE, args.workers, args.formato, args.kpis)
+        estadisticas = combinar_contadores(r[0] for r in resultados)
+        kpis_calidad, kpis_basicos, kpis_avanzados = calcular_estadisticas_globales(resultados, unir_bloques=True)
+        columnas = ColumnasGrafico()
+        for r in resultados:
+            columnas.extender(r[2])
+    else:
+        estadisticas = nuevas_estadisticas()
+        columnas = ColumnasGrafico()
+        flujo = columnas.registrar(guardar_salidas(procesar_archivo(estadisticas), args.formato))
+        kpis_calidad, kpis_basicos, kpis_avanzados = calcular_estadisticas(flujo, estadisticas, args.kpis)
+    
+    if not estadisticas.get("keep"):
         print("No se pudieron procesar datos")
         return
     
-    guardar_datos_procesados(datos_procesados)
-    print(f"Datos procesados guardados en: {OUT_FILE}")
-    print(f"Registros procesados: {len(datos_procesados)}")
+    salida = OUT_BIN_FILE if args.formato == "bin" else OUT_FILE
+    print(f"Datos procesados guardados en: {salida}")
+    print(f"Registros procesados: {estadisticas['keep']}")
     
-    kpis_calidad, kpis_basicos, kpis_avanzados = calcular_estadisticas(datos_procesados, estadisticas)
-    
-    print("\nGenerando gráficos...")
-    generar_graficos(datos_procesados)
-    
-    generar_informe(kpis_calidad, kpis_basicos, kpis_avanzados)
+    # En modo incremental el gráfico cubre solo las filas nuevas: redibujar todo el
+    # historial costaría releer la salida completa en cada corrida
+    print("\nGenerando gráficos de las filas nuevas..." if args.incremental else "\nGenerando gráficos...")
+    with Renderizador(args.sin_pantalla, dpi=args.dpi, formato=args.formato_grafico) as renderizador:
+        grafico = generar_graficos(columnas, renderizador)
+        
+        # En modo sin pantalla el informe se imprime mientras la figura se renderiza
+        generar_informe(kpis_calidad, kpis_basicos, kpis_avanzados, salida=salida, grafico=grafico)
+        if args.sin_pantalla:
+            renderizador.informe()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
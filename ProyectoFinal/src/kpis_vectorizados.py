@@ -0,0 +1,114 @@
+import math
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from comun.eventos import IndiceEventos
+
+
+class AcumuladorArrays:
+    # Backend vectorizado: en la pasada solo se guardan las distancias (float64)
+    # y el índice de eventos de alerta; los KPIs se obtienen después con reducciones NumPy.
+    def __init__(self):
+        self.distancias = array("d")
+        self.eventos = IndiceEventos()
+        self.primer_ts: Optional[int] = None
+        self.primer_estado: Optional[str] = None
+
+    def agregar(self, fila: Dict):
+        alerta = fila["Estado"] == "ALERT"
+        if self.primer_ts is None:
+            self.primer_ts, self.primer_estado = fila["Timestamp"], "ALERT" if alerta else "NORMAL"
+        self.distancias.append(fila["Distancia_cm"])
+        self.eventos.agregar_muestra(fila["Timestamp"], alerta)
+
+    def consumir(self, datos_procesados: Iterable[Dict]) -> "AcumuladorArrays":
+        for fila in datos_procesados:
+            self.agregar(fila)
+        return self
+
+    def resumen(self) -> Dict:
+        distancias = np.frombuffer(self.distancias, dtype=np.float64)
+        return resumen_desde_arrays(distancias, self.eventos)
+
+    def parcial(self) -> Dict:
+        # Misma forma combinable que AcumuladorKPIs.parcial
+        distancias = np.frombuffer(self.distancias, dtype=np.float64)
+        if not len(distancias):
+            return {"n": 0, "media": 0.0, "m2": 0.0, "suma_cuadrados": 0.0, "min": math.inf,
+                    "max": -math.inf, "histograma": {}, "duraciones": [], "primer_ts": None,
+                    "primer_estado": None, "evento_abierto": None}
+        media = distancias.mean()
+        desvios = distancias - media
+        return {
+            "n": len(distancias),
+            "media": float(media),
+            "m2": float(np.dot(desvios, desvios)),
+            "suma_cuadrados": float(np.dot(distancias, distancias)),
+            "min": extremo(distancias, np.min),
+            "max": extremo(distancias, np.max),
+            "histograma": histograma_5cm(distancias),
+            "duraciones": self.eventos.duraciones_s().tolist(),
+            "primer_ts": self.primer_ts,
+            "primer_estado": self.primer_estado,
+            "evento_abierto": self.eventos.abierto_ts,
+        }
+
+
+def extremo(distancias: np.ndarray, funcion) -> float:
+    # Devuelve el primer elemento igual al extremo, como el acumulador Python
+    # (relevante para 0.0 / -0.0, que NumPy no distingue al reducir)
+    valor = funcion(distancias)
+    return float(distancias[np.argmax(distancias == valor)])
+
+
+def bins_5cm(distancias: np.ndarray) -> np.ndarray:
+    # Bins de 5 cm como float (un valor enorme no desborda int64); los valores no finitos
+    # no tienen bin. np.round redondea al par igual que round().
+    return np.round(distancias[np.isfinite(distancias)] / 5)
+
+
+def histograma_5cm(distancias: np.ndarray) -> Dict[int, int]:
+    # {bin: conteo} en orden de primera aparición, como el dict de la versión Python
+    valores, primeras, conteos = np.unique(bins_5cm(distancias), return_index=True, return_counts=True)
+    orden = np.argsort(primeras)
+    return {int(v) * 5: int(c) for v, c in zip(valores[orden], conteos[orden])}
+
+
+def frecuencia_pico(distancias: np.ndarray) -> int:
+    # Solo se cuentan los bins presentes (np.unique): un valor atípico no agranda el histograma
+    valores, primeras, conteos = np.unique(bins_5cm(distancias), return_index=True, return_counts=True)
+    if not len(valores):
+        return 0
+    candidatos = np.flatnonzero(conteos == conteos.max())
+    # En empate, el dict de la versión Python se queda con el bin que apareció primero
+    return int(valores[candidatos[np.argmin(primeras[candidatos])]]) * 5
+
+
+def resumen_desde_arrays(distancias: np.ndarray, eventos: Optional[IndiceEventos] = None) -> Dict:
+    n = len(distancias)
+    if not n:
+        return {"n": 0}
+
+    media = distancias.mean()
+    desvios = distancias - media
+    suma_desvios2 = np.dot(desvios, desvios)
+
+    return {
+        "n": n,
+        "min": extremo(distancias, np.min),
+        "max": extremo(distancias, np.max),
+        "media": float(media),
+        "std": float(np.sqrt(suma_desvios2 / (n - 1))) if n > 1 else 0,
+        "std_poblacional": float(np.sqrt(suma_desvios2 / n)),
+        "rms": float(np.sqrt(np.dot(distancias, distancias) / n)),
+        "frecuencia_pico": frecuencia_pico(distancias),
+        "duraciones": eventos.duraciones_s().tolist() if eventos is not None else [],
+    }
@@ -1,56 +1,167 @@
 import matplotlib.pyplot as plt
-import csv
+import argparse
 import math
-import statistics
+import numpy as np
+from pathlib import Path
+from comun.columnar import es_columnar, leer_columnar
+from comun.eventos import IndiceEventos
+from comun.render import DPI, FORMATO, Renderizador
+from comun.tokenizador import dividir_campos, leer_bloques, separar_encabezado
+from comun.ventanas import duracion_ms, guardar_tabla_ventanas, imprimir_tabla_ventanas, kpis_por_ventana
+
+# Funciones de dibujo: reciben solo los datos y devuelven la figura (sin plt.show()),
+# así pueden armarse en otro proceso con el backend Agg (ver comun/render.py)
+
+def dibujar_linea_temporal(relative_times, distances, alert_x, alert_y):
+    fig = plt.figure(figsize=(12, 6))
+    
+    plt.plot(relative_times, distances, 'b-', alpha=0.7, label='Distancia')
+    
+    # Resaltar zonas de alerta
+    plt.scatter(alert_x, alert_y, color='red', s=20, label='Alerta', alpha=0.6)
+    
+    plt.axhline(y=30, color='r', linestyle='--', alpha=0.5, label='Umbral (30cm)')
+    plt.xlabel('Tiempo (s)')
+    plt.ylabel('Distancia (cm)')
+    plt.title('Evolución Temporal - Distancia vs Tiempo')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    return fig
+
+def dibujar_histograma(distances):
+    fig = plt.figure(figsize=(10, 6))
+    
+    plt.hist(distances, bins=20, alpha=0.7, edgecolor='black')
+    plt.axvline(x=30, color='r', linestyle='--', label='Umbral de alerta')
+    plt.xlabel('Distancia (cm)')
+    plt.ylabel('Frecuencia')
+    plt.title('Histograma de Distancias')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    return fig
+
+def dibujar_boxplot(normal_distances, alert_distances):
+    fig = plt.figure(figsize=(8, 6))
+    
+    data = [normal_distances, alert_distances]
+    labels = ['Escenario Normal', 'Escenario Alerta']
+    
+    plt.boxplot(data, labels=labels)
+    plt.ylabel('Distancia (cm)')
+    plt.title('Boxplot - Comparación de Escenarios')
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    return fig
 
 class DataAnalyzer:
-    def __init__(self, filename):
+    def __init__(self, filename, sin_pantalla=False, dpi=DPI, formato=FORMATO, carpeta_graficos=None):
         self.filename = filename
-        self.timestamps = []
-        self.distances = []
-        self.states = []
+        # Arrays tipados (se cargan una sola vez, al primer uso): timestamps int64 (ms) y
+        # distances float64 (cm) -> 16 bytes por muestra. El estado se guarda como índice
+        # de eventos de alerta (tramos), del que salen la máscara, los eventos y las franjas.
+        self._columnas = None
+        self._eventos = None
+        # Sin pantalla: backend Agg, sin ventanas y cada gráfico se guarda en segundo plano
+        # (por defecto junto al archivo de datos). En modo interactivo solo se guarda si
+        # se indica carpeta_graficos.
+        self.sin_pantalla = sin_pantalla
+        self.renderizador = Renderizador(sin_pantalla, dpi=dpi, formato=formato)
+        if carpeta_graficos is None and sin_pantalla:
+            carpeta_graficos = Path(filename).resolve().parent
+        if carpeta_graficos is not None:
+            Path(carpeta_graficos).mkdir(parents=True, exist_ok=True)
+        self.carpeta_graficos = carpeta_graficos
+    
+    def ruta_grafico(self, nombre):
+        if self.carpeta_graficos is None:
+            return None
+        return Path(self.carpeta_graficos) / f"{Path(self.filename).stem}_{nombre}"
+    
+    @property
+    def timestamps(self):
+        return self.load_data()['ts_ms']
+    
+    @property
+    def distances(self):
+        return self.load_data()['distance']
+    
+    @property
+    def eventos(self):
+        self.load_data()
+        return self._eventos
+    
+    @property
+    def alertas(self):
+        # Máscara booleana reconstruida desde el índice (no se guarda)
+        return self.eventos.mascara()
         
     def load_data(self):
-        with open(self.filename, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                self.timestamps.append(int(row['ts_ms']))
-                self.distances.append(float(row['distance']))
-                self.states.append(row['state'])
+        # Carga perezosa: solo la primera llamada lee el archivo
+        if self._columnas is None:
+            # Archivo columnar (.bin) generado por ProyectoFinal/src/PythonAnalisis.py --formato bin
+            self._eventos = IndiceEventos()
+            if es_columnar(self.filename):
+                self._columnas = self.load_columnar()
+            else:
+                self._columnas = self.load_csv()
+        return self._columnas
+    
+    def load_csv(self):
+        # Bloques de bytes partidos con el tokenizador común; cada columna se convierte
+        # de una vez (sin objetos Python por fila)
+        partes = {'ts_ms': [], 'distance': []}
+        nombres = None
+        for bloque in leer_bloques(self.filename):
+            if nombres is None:
+                nombres, bloque = separar_encabezado(bloque, b',')
+            campos = dict(zip(nombres, dividir_campos(bloque, len(nombres), b',')))
+            ts_ms = np.array(campos['ts_ms'], dtype=np.bytes_).astype(np.int64)
+            partes['ts_ms'].append(ts_ms)
+            partes['distance'].append(np.array(campos['distance'], dtype=np.bytes_).astype(np.float64))
+            # El estado no se guarda: cada bloque se agrega al índice de eventos
+            self._eventos.agregar(ts_ms, np.array(campos['state'], dtype=np.bytes_) == b'ALERT')
+        
+        tipos = {'ts_ms': np.int64, 'distance': np.float64}
+        return {nombre: np.concatenate(partes[nombre]) if partes[nombre] else np.empty(0, dtype=tipo)
+                for nombre, tipo in tipos.items()}
+    
+    def load_columnar(self):
+        columnas = leer_columnar(self.filename)
+        ts_ms = np.asarray(columnas['ts_ms'], dtype=np.int64)
+        self._eventos.agregar(ts_ms, columnas['estado'].astype(bool))
+        return {
+            'ts_ms': ts_ms,
+            'distance': columnas['distancia_cm'].astype(np.float64),
+        }
     
     def calculate_kpis(self):
+        distances = self.distances
+        
         # KPIs básicos
-        n = len(self.distances)
-        min_dist = min(self.distances)
-        max_dist = max(self.distances)
-        mean_dist = statistics.mean(self.distances)
+        n = len(distances)
+        min_dist = float(distances.min())
+        max_dist = float(distances.max())
+        mean_dist = float(distances.mean())
         
         # % en ALERTA
-        alert_count = self.states.count('ALERT')
+        alert_count = self.eventos.muestras_alerta
         percent_alert = (alert_count / n) * 100
         
-        # Duración de eventos
-        event_durations = []
-        in_event = False
-        event_start = 0
-        
-        for i, state in enumerate(self.states):
-            if state == 'ALERT' and not in_event:
-                in_event = True
-                event_start = self.timestamps[i]
-            elif state == 'NORMAL' and in_event:
-                in_event = False
-                duration = self.timestamps[i] - event_start
-                event_durations.append(duration)
+        # Duración de eventos (un evento que sigue abierto al final no se cuenta)
+        event_durations = self.eventos.duraciones_ms()
         
-        avg_event_duration = statistics.mean(event_durations) if event_durations else 0
+        avg_event_duration = float(event_durations.mean()) if len(event_durations) else 0
+        p50_duration, p90_duration = self.eventos.percentiles([50, 90])
         
         # RMS y THD (simulados para distancia)
-        rms = math.sqrt(sum(d**2 for d in self.distances) / n)
+        rms = math.sqrt(np.dot(distances, distances) / n)
         
         # Calcular THD aproximado
-        fundamental = statistics.mean(self.distances)
-        harmonic_distortion = math.sqrt(sum((d - fundamental)**2 for d in self.distances) / n)
+        fundamental = mean_dist
+        desvios = distances - fundamental
+        harmonic_distortion = math.sqrt(np.dot(desvios, desvios) / n)
         thd = (harmonic_distortion / fundamental) * 100 if fundamental != 0 else 0
         
         print("=== KPIs DEL SISTEMA ===")
@@ -61,6 +172,7 @@ class DataAnalyzer:
         print(f"% en ALERTA: {percent_alert:.2f}%")
         print(f"Número de eventos: {len(event_durations)}")
         print(f"Duración media de eventos: {avg_event_duration:.2f} ms")
+        print(f"Duración de eventos p50 / p90: {p50_duration:.2f} / {p90_duration:.2f} ms")
         print(f"Valor RMS: {rms:.2f}")
         print(f"THD aproximado: {thd:.2f}%")
         
@@ -72,75 +184,80 @@ class DataAnalyzer:
             'percent_alert': percent_alert,
             'event_count': len(event_durations),
             'avg_duration': avg_event_duration,
+            'p50_duration': float(p50_duration),
+            'p90_duration': float(p90_duration),
             'rms': rms,
             'thd': thd
         }
     
+    def calculate_window_kpis(self, ancho_ms, paso_ms=None):
+        # Media, RMS, THD y bin pico (5 cm, como frecuencia_pico) por ventana de tiempo,
+        # fijas o deslizantes: una fila por ventana con datos
+        return kpis_por_ventana(self.timestamps, self.distances, ancho_ms, paso_ms, ancho_bin=5)
+    
     def plot_temporal_line(self):
-        plt.figure(figsize=(12, 6))
-        
         # Convertir timestamps a tiempo relativo en segundos
-        start_time = self.timestamps[0]
-        relative_times = [(ts - start_time) / 1000 for ts in self.timestamps]
-        
-        plt.plot(relative_times, self.distances, 'b-', alpha=0.7, label='Distancia')
-        
-        # Resaltar zonas de alerta
-        alert_x = [relative_times[i] for i, state in enumerate(self.states) if state == 'ALERT']
-        alert_y = [self.distances[i] for i, state in enumerate(self.states) if state == 'ALERT']
-        plt.scatter(alert_x, alert_y, color='red', s=20, label='Alerta', alpha=0.6)
+        relative_times = (self.timestamps - self.timestamps[0]) / 1000
+        alertas = self.alertas
         
-        plt.axhline(y=30, color='r', linestyle='--', alpha=0.5, label='Umbral (30cm)')
-        plt.xlabel('Tiempo (s)')
-        plt.ylabel('Distancia (cm)')
-        plt.title('Evolución Temporal - Distancia vs Tiempo')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.show()
+        return self.renderizador.enviar('linea_temporal', dibujar_linea_temporal, relative_times,
+                                        self.distances, relative_times[alertas],
+                                        self.distances[alertas],
+                                        path=self.ruta_grafico('linea_temporal'))
     
     def plot_histogram(self):
-        plt.figure(figsize=(10, 6))
-        
-        plt.hist(self.distances, bins=20, alpha=0.7, edgecolor='black')
-        plt.axvline(x=30, color='r', linestyle='--', label='Umbral de alerta')
-        plt.xlabel('Distancia (cm)')
-        plt.ylabel('Frecuencia')
-        plt.title('Histograma de Distancias')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.show()
+        return self.renderizador.enviar('histograma', dibujar_histograma, self.distances,
+                                        path=self.ruta_grafico('histograma'))
     
     def plot_boxplot(self):
-        plt.figure(figsize=(8, 6))
-        
         # Separar datos por escenario
-        normal_distances = [self.distances[i] for i, state in enumerate(self.states) if state == 'NORMAL']
-        alert_distances = [self.distances[i] for i, state in enumerate(self.states) if state == 'ALERT']
-        
-        data = [normal_distances, alert_distances]
-        labels = ['Escenario Normal', 'Escenario Alerta']
-        
-        plt.boxplot(data, labels=labels)
-        plt.ylabel('Distancia (cm)')
-        plt.title('Boxplot - Comparación de Escenarios')
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.show()
+        alertas = self.alertas
+        return self.renderizador.enviar('boxplot', dibujar_boxplot, self.distances[~alertas],
+                                        self.distances[alertas],
+                                        path=self.ruta_grafico('boxplot'))
     
     def generate_all_plots(self):
-        self.load_data()
-        kpis = self.calculate_kpis()
-        
-        print("\nGenerando gráficos...")
-        self.plot_temporal_line()
-        self.plot_histogram()
-        self.plot_boxplot()
+        if self.sin_pantalla:
+            # Los gráficos se arman en segundo plano mientras se calculan los KPIs
+            print("\nGenerando gráficos (segundo plano)...")
+            self.plot_temporal_line()
+            self.plot_histogram()
+            self.plot_boxplot()
+            kpis = self.calculate_kpis()
+        else:
+            kpis = self.calculate_kpis()
+            print("\nGenerando gráficos...")
+            self.plot_temporal_line()
+            self.plot_histogram()
+            self.plot_boxplot()
         
+        if self.sin_pantalla:
+            self.renderizador.informe()
+        self.renderizador.cerrar()
         return kpis
 
 # Ejecutar análisis
 if __name__ == "__main__":
-    analyzer = DataAnalyzer('sensor_data.csv')
-    analyzer.generate_all_plots()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="KPIs y gráficos del sensor ultrasónico")
+    parser.add_argument("archivo", nargs="?", default="sensor_data.csv")
+    parser.add_argument("--sin-pantalla", action="store_true",
+                        help="Backend Agg, sin ventanas; los gráficos se guardan en segundo plano")
+    parser.add_argument("--dpi", type=int, default=DPI)
+    parser.add_argument("--formato-grafico", default=FORMATO, help="png, svg, pdf...")
+    parser.add_argument("--carpeta-graficos", default=None)
+    parser.add_argument("--ventana", help="KPIs por ventana de tiempo: 60, 30s, 5min, 1h...")
+    parser.add_argument("--paso", help="paso de ventanas deslizantes (por defecto = ventana, fijas)")
+    parser.add_argument("--tabla-ventanas", default=None,
+                        help="CSV de KPIs por ventana (por defecto <archivo>_ventanas.csv)")
+    args = parser.parse_args()
+    
+    analyzer = DataAnalyzer(args.archivo, sin_pantalla=args.sin_pantalla, dpi=args.dpi,
+                            formato=args.formato_grafico, carpeta_graficos=args.carpeta_graficos)
+    analyzer.generate_all_plots()
+    
+    if args.ventana:
+        tabla = analyzer.calculate_window_kpis(duracion_ms(args.ventana),
+                                               duracion_ms(args.paso) if args.paso else None)
+        imprimir_tabla_ventanas(tabla, " cm")
+        path = args.tabla_ventanas or Path(args.archivo).with_name(f"{Path(args.archivo).stem}_ventanas.csv")
+        print(f"Tabla de ventanas: {guardar_tabla_ventanas(tabla, path)}")
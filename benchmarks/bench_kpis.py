@@ -0,0 +1,83 @@
+# Benchmark de los backends de KPIs del vigilante ultrasónico (Python puro vs NumPy).
+# Uso: python benchmarks/bench_kpis.py [n_filas]   (por defecto 10 millones)
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "ProyectoFinal" / "src"))
+
+import numpy as np
+
+from PythonAnalisis import AcumuladorKPIs, calcular_kpis_avanzados
+import kpis_vectorizados
+from comun.eventos import IndiceEventos
+
+N_FILAS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+
+
+def filas_sinteticas(n: int, semilla: int = 7):
+    rnd = random.Random(semilla)
+    t0_ms = 1_756_684_800_000  # 2025-09-01
+    estado = "NORMAL"
+    for i in range(n):
+        if rnd.random() < 0.01:
+            estado = "ALERT" if estado == "NORMAL" else "NORMAL"
+        distancia = rnd.uniform(0, 30) if estado == "ALERT" else rnd.uniform(30, 200)
+        yield {
+            "Timestamp": t0_ms + i * 1000,
+            "Distancia_cm": round(distancia, 2),
+            "Estado": estado,
+        }
+
+
+def medir(nombre, acumulador):
+    inicio = time.perf_counter()
+    acumulador.consumir(filas_sinteticas(N_FILAS))
+    t_pasada = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resumen = acumulador.resumen()
+    t_kpis = time.perf_counter() - inicio
+
+    print(f"{nombre:8s} pasada: {t_pasada:8.2f} s   KPIs: {t_kpis:8.3f} s")
+    return resumen
+
+
+def redondear(resumen):
+    kpis = calcular_kpis_avanzados(resumen)
+    kpis.update({k: round(resumen[k], 2) for k in ("min", "max", "media", "std")})
+    kpis["eventos"] = len(resumen["duraciones"])
+    return kpis
+
+
+def main():
+    print(f"Filas sintéticas: {N_FILAS:,}")
+    # Generar el flujo cuesta lo mismo para ambos; se mide aparte para poder restarlo
+    inicio = time.perf_counter()
+    for _ in filas_sinteticas(N_FILAS):
+        pass
+    print(f"generador        {time.perf_counter() - inicio:8.2f} s")
+
+    r_python = medir("python", AcumuladorKPIs())
+    r_numpy = medir("numpy", kpis_vectorizados.AcumuladorArrays())
+
+    # Reducciones puras sobre arrays ya construidos (sin el costo de la pasada por filas)
+    rnd = np.random.default_rng(7)
+    distancias = np.round(rnd.uniform(0, 200, N_FILAS), 2)
+    ts_ms = 1_756_684_800_000 + np.arange(N_FILAS, dtype=np.int64) * 1000
+    inicio = time.perf_counter()
+    eventos = IndiceEventos.desde_arrays(ts_ms, distancias < 30)
+    kpis_vectorizados.resumen_desde_arrays(distancias, eventos)
+    print(f"numpy (solo arrays) KPIs: {time.perf_counter() - inicio:8.3f} s")
+
+    iguales = redondear(r_python) == redondear(r_numpy)
+    print("Resultados idénticos:", iguales)
+    if not iguales:
+        print("python:", redondear(r_python))
+        print("numpy: ", redondear(r_numpy))
+
+
+if __name__ == "__main__":
+    main()
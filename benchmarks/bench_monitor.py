@@ -0,0 +1,133 @@
+# Benchmark del monitor PID sin hardware (Linux): un pty simulado reemplaza al Arduino.
+# Mide la decodificación de cada protocolo y, para MotorMonitor en modo sin pantalla,
+# la latencia muestra->fin de update_display, las muestras perdidas y la duración de cada
+# update_display (solo el refresco en la GUI, no el recorrido completo de la muestra).
+# Uso: python benchmarks/bench_monitor.py [segundos_por_corrida]   (por defecto 5)
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "PID"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+import INTERFAZ
+from protocolo import armar_trama, crear_decodificador
+from simulador_serial import PuertoSimulado, muestras_sinteticas
+
+DURACION = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+TASAS = (100, 1000, 10000)
+PROTOCOLOS = ("ascii", "binario")
+
+
+def flujo_de_prueba(protocolo, n):
+    fuente = muestras_sinteticas()
+    if protocolo == "binario":
+        return b"".join(armar_trama(i, *next(fuente)) for i in range(n))
+    return b"".join(f"{sp:.2f},{pv:.2f}\r\n".encode() for sp, pv in (next(fuente) for _ in range(n)))
+
+
+def bench_decodificacion(n=200_000, tam_lectura=4096):
+    print(f"Decodificación ({n:,} muestras, lecturas de {tam_lectura} bytes):")
+
+    # Referencia: el camino original, readline + split + float por línea
+    lineas = flujo_de_prueba("ascii", n).splitlines()
+    inicio = time.perf_counter()
+    for linea in lineas:
+        parts = linea.decode('utf-8').strip().split(',')
+        float(parts[0]), float(parts[1])
+    t = time.perf_counter() - inicio
+    print(f"   {'readline (original)':22s} {n / t:12,.0f} muestras/s")
+
+    for protocolo in PROTOCOLOS:
+        flujo = flujo_de_prueba(protocolo, n)
+        decodificador = crear_decodificador(protocolo)
+        inicio = time.perf_counter()
+        total = 0
+        for i in range(0, len(flujo), tam_lectura):
+            total += len(decodificador.decodificar(flujo[i:i + tam_lectura]))
+        t = time.perf_counter() - inicio
+        print(f"   {protocolo:22s} {total / t:12,.0f} muestras/s")
+
+
+def percentiles(valores_ms):
+    if not len(valores_ms):
+        return "-"
+    p50, p95, maximo = np.percentile(valores_ms, [50, 95, 100])
+    return f"p50 {p50:6.2f}  p95 {p95:6.2f}  max {maximo:7.2f}"
+
+
+def esperar_recepcion(ventana, enviadas, sin_cambios=0.5, limite=5.0):
+    # Pasa al historial lo que siga llegando hasta tener `enviadas` muestras o hasta que
+    # no llegue nada durante `sin_cambios` segundos; devuelve el total recibido
+    fin = time.perf_counter() + limite
+    recibidas, ultimo_cambio = -1, time.perf_counter()
+    while time.perf_counter() < fin:
+        ventana.drain_samples()
+        if ventana.historial.total != recibidas:
+            recibidas, ultimo_cambio = ventana.historial.total, time.perf_counter()
+        if recibidas >= enviadas or time.perf_counter() - ultimo_cambio > sin_cambios:
+            break
+        time.sleep(0.01)
+    return ventana.historial.total
+
+
+def bench_monitor(app, tasa, protocolo):
+    INTERFAZ.GRABAR = False
+    INTERFAZ.PROTOCOLO = protocolo
+    with PuertoSimulado(tasa, protocolo) as puerto:
+        INTERFAZ.PORT = puerto.ruta
+        ventana = INTERFAZ.MotorMonitor()
+        ventana.show()
+
+        cuadros, latencias = [], []
+        refrescar = ventana.update_display
+
+        def medir():
+            inicio = time.perf_counter()
+            refrescar()
+            fin = time.perf_counter()
+            cuadros.append(fin - inicio)
+            # Sin pérdidas, la n-ésima muestra recibida es la n-ésima enviada
+            n = ventana.historial.total
+            if n and n <= len(puerto.tiempos_envio):
+                latencias.append(fin - puerto.tiempos_envio[n - 1])
+
+        ventana.timer.timeout.disconnect()
+        ventana.timer.timeout.connect(medir)
+        QTimer.singleShot(int(DURACION * 1000), app.quit)
+        app.exec_()
+        # Las muestras todavía en el pty o en la cola no son pérdidas: se deja de enviar
+        # y se espera a que el hilo serial las lea antes de contar las no recibidas
+        puerto.detener()
+        enviadas = puerto.enviadas
+        recibidas = esperar_recepcion(ventana, enviadas)
+        ventana.close()
+
+    decodificador = getattr(ventana, "decodificador", None)
+    invalidas = decodificador.tramas_invalidas if decodificador else 0
+    cuadros_ms = np.array(cuadros) * 1000
+    print(f"   {tasa:6d} Hz {protocolo:8s} enviadas {enviadas:7d}  recibidas {recibidas:7d}"
+          f"  no recibidas {enviadas - recibidas:5d}  inválidas {invalidas:3d}"
+          f"  FPS {len(cuadros) / DURACION:5.1f}")
+    print(f"      {'update_display (ms)':31s} {percentiles(cuadros_ms)}")
+    print(f"      {'latencia a update_display (ms)':31s} {percentiles(np.array(latencias) * 1000)}")
+
+
+def main():
+    bench_decodificacion()
+
+    app = QApplication(sys.argv)
+    print(f"\nMotorMonitor sin pantalla ({DURACION:g} s por corrida):")
+    for protocolo in PROTOCOLOS:
+        for tasa in TASAS:
+            bench_monitor(app, tasa, protocolo)
+
+
+if __name__ == "__main__":
+    main()
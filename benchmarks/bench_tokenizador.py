@@ -0,0 +1,99 @@
+# Benchmark de la lectura de CSV "sucios" (estilo datos_sucios_250_v2.csv):
+# csv.DictReader + strip/replace/lower por campo (camino original de s4_LimpiezaCsv.py)
+# frente al motor común con el lector csv.reader y con el tokenizador por bytes.
+# Uso: python benchmarks/bench_tokenizador.py [n_filas]   (por defecto 1 millón)
+import csv
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from comun.limpieza import ConfigLimpieza, limpiar_csv
+from comun.tiempo import DMY, ISO, ParserTimestamps
+
+N_FILAS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+def escribir_sucio(path: Path, n: int, semilla: int = 3):
+    # Mezcla de formatos como el archivo del curso: espacios, coma decimal, dd/mm/aaaa y NA
+    rnd = random.Random(semilla)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("timestamp;value\n")
+        for i in range(n):
+            s = i % 86400
+            hms = f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}"
+            ts = f"2025-09-01T{hms}" if rnd.random() < 0.75 else f"01/09/2025 {hms}"
+            if rnd.random() < 0.005:
+                ts = rnd.choice(["", "sin fecha", "2025-13-01T00:00:00"])
+            v = rnd.uniform(3, 7)
+            r = rnd.random()
+            valor = (f"{v:.{rnd.randint(1, 6)}f}" if r < 0.8 else
+                     f"{v:.6f}".replace(".", ",") if r < 0.95 else rnd.choice(["NA", "", "null", "error", "n/a"]))
+            if rnd.random() < 0.2:
+                ts, valor = f"  {ts}  ", f"  {valor}  "
+            f.write(f"{ts};{valor}\n")
+
+
+def dictreader(path: Path):
+    # Camino original: un dict por fila y limpieza campo a campo
+    estadisticas = {"total": 0, "keep": 0, "bad_ts": 0, "bad_val": 0}
+    parser_ts = ParserTimestamps((ISO, DMY))
+    valores = []
+    with open(path, "r", encoding="utf-8", newline="") as fin:
+        for row in csv.DictReader(fin, delimiter=";"):
+            estadisticas["total"] += 1
+            ts_raw = (row.get("timestamp") or "").strip()
+            val_raw = (row.get("value") or "").strip().replace(",", ".")
+            if val_raw.lower() in {"", "na", "n/a", "nan", "null", "none", "error"}:
+                estadisticas["bad_val"] += 1
+                continue
+            try:
+                val = float(val_raw)
+            except ValueError:
+                estadisticas["bad_val"] += 1
+                continue
+            if parser_ts.a_epoch_ms(ts_raw) is None:
+                estadisticas["bad_ts"] += 1
+                continue
+            valores.append(val)
+            estadisticas["keep"] += 1
+    return np.array(valores), estadisticas
+
+
+def motor(lector):
+    config = ConfigLimpieza(lector=lector)
+
+    def limpiar(path: Path):
+        datos, estadisticas = limpiar_csv(path, config)
+        return datos["valor"], estadisticas
+    return limpiar
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sucio.csv"
+        escribir_sucio(path, N_FILAS)
+        print(f"Filas: {N_FILAS:,}  ({path.stat().st_size / 1e6:.1f} MB, sin escribir salida)")
+
+        referencia = None
+        for nombre, limpiar in (("DictReader (original)", dictreader),
+                                ("motor, lector csv", motor("csv")),
+                                ("motor, lector bytes", motor("bytes"))):
+            inicio = time.perf_counter()
+            valores, estadisticas = limpiar(path)
+            t = time.perf_counter() - inicio
+            if referencia is None:
+                referencia = (valores, estadisticas)
+            igual = estadisticas == referencia[1] and np.array_equal(valores, referencia[0])
+            print(f"   {nombre:22s} {t:7.2f} s  {N_FILAS / t:12,.0f} filas/s"
+                  f"  {'igual' if igual else 'DISTINTO'}  {estadisticas}")
+
+
+if __name__ == "__main__":
+    main()
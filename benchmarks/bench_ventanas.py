@@ -0,0 +1,51 @@
+# Benchmark de los KPIs por ventana: recalcular cada ventana desde cero (una máscara y
+# reducciones NumPy por ventana) frente al motor de sumas acumuladas de comun/ventanas.py.
+# Uso: python benchmarks/bench_ventanas.py [n_filas]   (por defecto 1 millón, 1 muestra cada 100 ms)
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from comun.ventanas import kpis_por_ventana
+
+N_FILAS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+def recalculando(ts_ms, valores, ancho_ms, paso_ms):
+    # Una pasada por ventana: O(n * ancho / paso)
+    filas = []
+    for inicio in range(ts_ms[0] // paso_ms * paso_ms, ts_ms[-1] - ancho_ms + paso_ms + 1, paso_ms):
+        x = valores[(ts_ms >= inicio) & (ts_ms < inicio + ancho_ms)]
+        if len(x):
+            filas.append((len(x), x.mean(), np.sqrt(np.dot(x, x) / len(x)), x.std()))
+    return np.array(filas)
+
+
+def main():
+    rnd = np.random.default_rng(7)
+    ts_ms = 1_756_684_800_000 + np.arange(N_FILAS, dtype=np.int64) * 100
+    distancias = np.round(rnd.uniform(0, 200, N_FILAS), 2)
+    print(f"Filas: {N_FILAS:,}")
+
+    for ancho_ms, paso_ms in ((60_000, 60_000), (600_000, 10_000)):
+        inicio = time.perf_counter()
+        referencia = recalculando(ts_ms, distancias, ancho_ms, paso_ms)
+        t_ref = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        tabla = kpis_por_ventana(ts_ms, distancias, ancho_ms, paso_ms)
+        t_motor = time.perf_counter() - inicio
+
+        obtenido = np.column_stack([tabla[c] for c in ("n", "media", "rms", "std")])
+        igual = obtenido.shape == referencia.shape and np.allclose(obtenido, referencia)
+        print(f"   ancho {ancho_ms // 1000:4d} s paso {paso_ms // 1000:3d} s  ventanas: {len(tabla['n']):7,}"
+              f"  recalculando: {t_ref:7.2f} s  sumas acumuladas: {t_motor:6.3f} s"
+              f"  {'igual' if igual else 'DISTINTO'}")
+
+
+if __name__ == "__main__":
+    main()
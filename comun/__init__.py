@@ -0,0 +1 @@
+# Utilidades compartidas por los scripts de limpieza y análisis de datos del repositorio.
@@ -0,0 +1,251 @@
+import os
+import shutil
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Formato columnar binario (.bin):
+#   encabezado  "<8sIIQ"  magia, versión, n_columnas, n_filas
+#   columnas    "<16s4sQ" nombre, dtype NumPy ('<i8', '<f4', '|u1'), offset en bytes
+#   datos       cada columna contigua y alineada a 8 bytes, en little-endian
+# Así cada columna puede abrirse con np.memmap sin copiar ni parsear texto.
+# Una columna puede reservar lugar para más filas que n_filas (capacidad): anexar_columnar
+# escribe las filas nuevas en ese hueco y solo actualiza n_filas en el encabezado.
+MAGIA = b"UTPCOL\x00\x01"
+VERSION = 1
+FMT_ENCABEZADO = "<8sIIQ"
+FMT_COLUMNA = "<16s4sQ"
+ALINEACION = 8
+
+# Columnas del vigilante ultrasónico: ms epoch, distancia (cm) y estado (0=NORMAL, 1=ALERT)
+COLUMNAS_ULTRASONICO = (("ts_ms", "<i8"), ("distancia_cm", "<f4"), ("estado", "|u1"))
+
+# dtype NumPy -> typecode del módulo array (escritura sin depender de NumPy)
+TYPECODES = {"<i8": "q", "<f4": "f", "|u1": "B"}
+
+
+def _alinear(n: int) -> int:
+    return (n + ALINEACION - 1) // ALINEACION * ALINEACION
+
+
+def _tam_encabezado(n_columnas: int) -> int:
+    return _alinear(struct.calcsize(FMT_ENCABEZADO) + n_columnas * struct.calcsize(FMT_COLUMNA))
+
+
+def _escribir_encabezado(fout, columnas: Sequence[Tuple[str, str]], n_filas: int,
+                         capacidad: int = 0) -> List[int]:
+    """
+    Escribe el encabezado y devuelve el offset de cada columna
+    (con lugar para max(n_filas, capacidad) filas por columna).
+    """
+    offsets = []
+    pos = _tam_encabezado(len(columnas))
+    for _, dtype in columnas:
+        offsets.append(pos)
+        pos = _alinear(pos + max(n_filas, capacidad) * struct.calcsize(TYPECODES[dtype]))
+
+    fout.write(struct.pack(FMT_ENCABEZADO, MAGIA, VERSION, len(columnas), n_filas))
+    for (nombre, dtype), offset in zip(columnas, offsets):
+        fout.write(struct.pack(FMT_COLUMNA, nombre.encode("ascii"), dtype.encode("ascii"), offset))
+    return offsets
+
+
+def leer_encabezado(path: Path) -> Tuple[int, Dict[str, Tuple[str, int]]]:
+    """
+    Devuelve (n_filas, {columna: (dtype, offset)}).
+    """
+    with open(path, "rb") as f:
+        magia, version, n_columnas, n_filas = struct.unpack(
+            FMT_ENCABEZADO, f.read(struct.calcsize(FMT_ENCABEZADO)))
+        if magia != MAGIA:
+            raise ValueError(f"{path} no es un archivo columnar")
+        if version != VERSION:
+            raise ValueError(f"Versión de formato no soportada: {version}")
+        columnas = {}
+        for _ in range(n_columnas):
+            nombre, dtype, offset = struct.unpack(FMT_COLUMNA, f.read(struct.calcsize(FMT_COLUMNA)))
+            columnas[nombre.rstrip(b"\x00").decode("ascii")] = (dtype.rstrip(b"\x00").decode("ascii"), offset)
+    return n_filas, columnas
+
+
+def es_columnar(path: Path) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIA)) == MAGIA
+    except OSError:
+        return False
+
+
+class EscritorColumnar:
+    """
+    Escribe filas en formato columnar con memoria acotada: cada columna se acumula en un
+    buffer tipado que se vuelca a un archivo temporal; al cerrar se arma el archivo final.
+    """
+
+    def __init__(self, path: Path, columnas: Sequence[Tuple[str, str]] = COLUMNAS_ULTRASONICO,
+                 tam_buffer: int = 65536):
+        self.path = Path(path)
+        self.columnas = tuple(columnas)
+        self.tam_buffer = tam_buffer
+        self.n_filas = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._temporales = [self.path.with_name(f".{self.path.name}.{nombre}") for nombre, _ in self.columnas]
+        self._archivos = [open(t, "wb") for t in self._temporales]
+        self._buffers = [array(TYPECODES[dtype]) for _, dtype in self.columnas]
+
+    def agregar(self, *valores):
+        for buffer, valor in zip(self._buffers, valores):
+            buffer.append(valor)
+        self.n_filas += 1
+        if len(self._buffers[0]) >= self.tam_buffer:
+            self._volcar()
+
+    def _volcar(self):
+        for buffer, archivo in zip(self._buffers, self._archivos):
+            if sys.byteorder == "big":
+                buffer.byteswap()
+            buffer.tofile(archivo)
+            del buffer[:]
+
+    def cerrar(self) -> int:
+        self._volcar()
+        for archivo in self._archivos:
+            archivo.close()
+        try:
+            with open(self.path, "wb") as fout:
+                offsets = _escribir_encabezado(fout, self.columnas, self.n_filas)
+                for temporal, offset in zip(self._temporales, offsets):
+                    fout.write(b"\x00" * (offset - fout.tell()))
+                    with open(temporal, "rb") as fin:
+                        shutil.copyfileobj(fin, fout)
+        finally:
+            for temporal in self._temporales:
+                temporal.unlink(missing_ok=True)
+        return self.n_filas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def _copiar_bytes(fin, fout, n_bytes: int, tam_bloque: int = 1 << 20):
+    while n_bytes > 0:
+        datos = fin.read(min(tam_bloque, n_bytes))
+        if not datos:
+            break
+        fout.write(datos)
+        n_bytes -= len(datos)
+
+
+def unir_columnar(partes: Iterable[Path], path: Path) -> int:
+    """
+    Concatena en orden varios archivos columnares con las mismas columnas.
+    """
+    partes = list(partes)
+    encabezados = [leer_encabezado(p) for p in partes]
+    if not encabezados:
+        raise ValueError("No hay partes para unir")
+    columnas = [(nombre, dtype) for nombre, (dtype, _) in encabezados[0][1].items()]
+    n_total = sum(n for n, _ in encabezados)
+
+    with open(path, "wb") as fout:
+        offsets = _escribir_encabezado(fout, columnas, n_total)
+        for (nombre, dtype), offset in zip(columnas, offsets):
+            fout.write(b"\x00" * (offset - fout.tell()))
+            tam_item = struct.calcsize(TYPECODES[dtype])
+            for parte, (n, cols) in zip(partes, encabezados):
+                with open(parte, "rb") as fin:
+                    fin.seek(cols[nombre][1])
+                    _copiar_bytes(fin, fout, n * tam_item)
+    return n_total
+
+
+def capacidad_columnar(path: Path) -> int:
+    """
+    Filas que caben en cada columna sin mover los datos (la última columna no tiene límite).
+    """
+    n_filas, columnas = leer_encabezado(path)
+    offsets = [(offset, struct.calcsize(TYPECODES[dtype])) for dtype, offset in columnas.values()]
+    huecos = [(siguiente - offset) // tam_item
+              for (offset, tam_item), (siguiente, _) in zip(offsets, offsets[1:])]
+    return min(huecos, default=n_filas)
+
+
+def _reservar(path: Path, capacidad: int):
+    # Reescribe el archivo con lugar para `capacidad` filas por columna
+    n_filas, cols = leer_encabezado(path)
+    columnas = [(nombre, dtype) for nombre, (dtype, _) in cols.items()]
+    temporal = path.with_name(f".{path.name}.reserva")
+    with open(path, "rb") as fin, open(temporal, "wb") as fout:
+        offsets = _escribir_encabezado(fout, columnas, n_filas, capacidad)
+        for (nombre, dtype), offset in zip(columnas, offsets):
+            fout.write(b"\x00" * (offset - fout.tell()))
+            fin.seek(cols[nombre][1])
+            _copiar_bytes(fin, fout, n_filas * struct.calcsize(TYPECODES[dtype]))
+        fout.truncate(offsets[-1] + capacidad * struct.calcsize(TYPECODES[columnas[-1][1]]))
+    os.replace(temporal, path)
+
+
+def anexar_columnar(parte: Path, path: Path) -> int:
+    """
+    Agrega al final de `path` las filas del columnar `parte` (mismas columnas) sin
+    reescribir las existentes. Si falta lugar, la capacidad se duplica (costo amortizado
+    proporcional a las filas nuevas, como una lista dinámica). Devuelve el total de filas.
+    """
+    n_parte, cols_parte = leer_encabezado(parte)
+    n_filas, _ = leer_encabezado(path)
+    if not n_parte:
+        return n_filas
+    if n_filas + n_parte > capacidad_columnar(path):
+        _reservar(path, max(2 * n_filas, n_filas + n_parte))
+
+    _, cols = leer_encabezado(path)
+    if set(cols) != set(cols_parte):
+        raise ValueError(f"{parte} y {path} no tienen las mismas columnas")
+    with open(path, "r+b") as fout, open(parte, "rb") as fin:
+        for nombre, (dtype, offset) in cols.items():
+            tam_item = struct.calcsize(TYPECODES[dtype])
+            fin.seek(cols_parte[nombre][1])
+            fout.seek(offset + n_filas * tam_item)
+            _copiar_bytes(fin, fout, n_parte * tam_item)
+        # n_filas se actualiza al final: un corte antes deja el archivo con las filas previas
+        fout.flush()
+        _escribir_n_filas(fout, n_filas + n_parte)
+    return n_filas + n_parte
+
+
+def _escribir_n_filas(fout, n_filas: int):
+    fout.seek(struct.calcsize(FMT_ENCABEZADO) - struct.calcsize("<Q"))
+    fout.write(struct.pack("<Q", n_filas))
+
+
+def truncar_columnar(path: Path, n_filas: int) -> int:
+    """
+    Deja solo las primeras `n_filas` filas (solo cambia el encabezado; el lugar liberado
+    queda como capacidad para anexar). Devuelve las filas que había.
+    """
+    n_actual, _ = leer_encabezado(path)
+    if n_filas > n_actual:
+        raise ValueError(f"{path} tiene {n_actual} filas, no se puede truncar a {n_filas}")
+    if n_filas < n_actual:
+        with open(path, "r+b") as f:
+            _escribir_n_filas(f, n_filas)
+    return n_actual
+
+
+def leer_columnar(path: Path) -> Dict:
+    """
+    Abre cada columna como np.memmap de solo lectura (sin copiar los datos).
+    """
+    import numpy as np
+
+    n_filas, columnas = leer_encabezado(path)
+    return {
+        nombre: np.memmap(path, dtype=np.dtype(dtype), mode="r", offset=offset, shape=(n_filas,))
+        if n_filas else np.empty(0, dtype=np.dtype(dtype))
+        for nombre, (dtype, offset) in columnas.items()
+    }
@@ -0,0 +1,67 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Reducción de series largas antes de graficar: una pantalla no puede mostrar más de
+# ~2 puntos por píxel de ancho, así que se conservan solo los que cambian la imagen.
+# Para eso se toma el mínimo y el máximo de cada bucket: conserva los picos (ideal para
+# ruido y alertas), O(n) vectorizado.
+# Además: estadísticas de boxplot precalculadas (para Axes.bxp sin pasarle millones de valores).
+# Las franjas de alerta salen del índice de eventos (comun/eventos.py).
+
+
+def ancho_en_pixeles(ancho_figura: float, dpi: float, columnas: int = 1) -> int:
+    """
+    Ancho aproximado (px) del área de dibujo de un eje en una figura de `ancho_figura`
+    pulgadas con `columnas` subgráficos por fila (márgenes por defecto de matplotlib).
+    Se calcula sin crear la figura, así los datos se reducen antes de enviarse a dibujar.
+    """
+    izquierda, derecha, espacio = 0.125, 0.9, 0.2
+    fraccion = (derecha - izquierda) / (columnas + espacio * (columnas - 1))
+    return max(1, int(ancho_figura * dpi * fraccion))
+
+
+def indices_min_max(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Índices (ordenados) del mínimo y el máximo de cada uno de `n_buckets` tramos
+    consecutivos, más el primero y el último: ~2 * n_buckets puntos.
+    Si la serie ya es corta, devuelve todos los índices.
+    """
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    k = -(-n // n_buckets)
+    m = -(-n // k)
+    # Se rellena con el último valor para poder usar reshape; los índices del relleno
+    # apuntan al mismo valor, así que se recortan a n - 1
+    matriz = np.concatenate([y, np.full(m * k - n, y[-1], dtype=y.dtype)]).reshape(m, k)
+    base = np.arange(m) * k
+    i_min = np.minimum(base + matriz.argmin(axis=1), n - 1)
+    i_max = np.minimum(base + matriz.argmax(axis=1), n - 1)
+    return np.unique(np.concatenate([i_min, i_max, [0, n - 1]]))
+
+
+def estadisticas_boxplot(valores: np.ndarray, etiqueta: str, whis: float = 1.5,
+                         resolucion_atipicos: float = 0.1) -> Dict:
+    """
+    Estadísticas de una caja para Axes.bxp (mismas reglas que plt.boxplot).
+    Los valores atípicos se agrupan a `resolucion_atipicos` para no dibujar millones de puntos.
+    """
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    iqr = q3 - q1
+    dentro = valores[(valores >= q1 - whis * iqr) & (valores <= q3 + whis * iqr)]
+    atipicos = valores[(valores < q1 - whis * iqr) | (valores > q3 + whis * iqr)]
+    return {
+        "label": etiqueta,
+        "med": mediana,
+        "q1": q1,
+        "q3": q3,
+        "whislo": dentro.min() if len(dentro) else q1,
+        "whishi": dentro.max() if len(dentro) else q3,
+        "fliers": np.unique(np.round(atipicos / resolucion_atipicos) * resolucion_atipicos),
+    }
+
+
+def grupos_boxplot(valores: np.ndarray, mascaras: List[Tuple[str, np.ndarray]]) -> List[Dict]:
+    # Una caja por máscara no vacía, en el orden dado
+    return [estadisticas_boxplot(valores[m], etiqueta) for etiqueta, m in mascaras if m.any()]
@@ -0,0 +1,151 @@
+from array import array
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Índice de eventos de alerta: la columna de estado se codifica una sola vez por tramos
+# (run-length) en cuatro arrays int64 (inicio_idx, fin_idx, ts_inicio, ts_fin).
+# Un evento empieza en la primera muestra en ALERTA y termina en la primera NORMAL
+# siguiente (fin_idx exclusivo); un evento sin cerrar queda "abierto" y no se cuenta.
+# Conteos, duraciones, percentiles, máscaras y franjas para graficar salen del índice.
+# Se puede construir de una vez (desde_arrays), por bloques (agregar) o muestra a
+# muestra en modo en vivo (agregar_muestra), con el mismo resultado.
+
+
+class IndiceEventos:
+    def __init__(self):
+        self.n = 0                # muestras vistas
+        self.muestras_alerta = 0  # incluye las del evento abierto
+        self.abierto_idx: Optional[int] = None
+        self.abierto_ts: Optional[int] = None
+        self._inicio_idx = array("q")
+        self._fin_idx = array("q")
+        self._ts_inicio = array("q")
+        self._ts_fin = array("q")
+
+    @classmethod
+    def desde_arrays(cls, ts_ms: np.ndarray, alertas: np.ndarray) -> "IndiceEventos":
+        return cls().agregar(ts_ms, alertas)
+
+    def agregar_muestra(self, ts_ms: int, alerta: bool):
+        # O(1): solo escribe en los cambios de estado
+        if alerta:
+            self.muestras_alerta += 1
+            if self.abierto_idx is None:
+                self.abierto_idx, self.abierto_ts = self.n, ts_ms
+        elif self.abierto_idx is not None:
+            self._cerrar([self.abierto_idx], [self.n], [self.abierto_ts], [ts_ms])
+            self.abierto_idx = self.abierto_ts = None
+        self.n += 1
+
+    def agregar(self, ts_ms: np.ndarray, alertas: np.ndarray) -> "IndiceEventos":
+        """
+        Agrega un bloque de muestras (vectorizado). Un evento abierto al final del
+        bloque anterior se cierra en la primera muestra NORMAL de este.
+        """
+        ts_ms = np.asarray(ts_ms, dtype=np.int64)
+        alertas = np.asarray(alertas, dtype=bool)
+        if not len(alertas):
+            return self
+
+        previo = self.abierto_idx is not None
+        cambios = np.diff(np.concatenate(([previo], alertas)).astype(np.int8))
+        subidas = np.flatnonzero(cambios == 1)
+        bajadas = np.flatnonzero(cambios == -1)
+
+        if previo and len(bajadas):
+            self._cerrar([self.abierto_idx], [self.n + int(bajadas[0])],
+                         [self.abierto_ts], [int(ts_ms[bajadas[0]])])
+            self.abierto_idx = self.abierto_ts = None
+            bajadas = bajadas[1:]
+
+        cerrados = len(bajadas)
+        self._cerrar(self.n + subidas[:cerrados], self.n + bajadas,
+                     ts_ms[subidas[:cerrados]], ts_ms[bajadas])
+        if len(subidas) > cerrados:
+            self.abierto_idx, self.abierto_ts = self.n + int(subidas[-1]), int(ts_ms[subidas[-1]])
+
+        self.muestras_alerta += int(np.count_nonzero(alertas))
+        self.n += len(alertas)
+        return self
+
+    def _cerrar(self, inicios, fines, ts_inicios, ts_fines):
+        for destino, valores in ((self._inicio_idx, inicios), (self._fin_idx, fines),
+                                 (self._ts_inicio, ts_inicios), (self._ts_fin, ts_fines)):
+            destino.frombytes(np.asarray(valores, dtype=np.int64).tobytes())
+
+    def __len__(self) -> int:
+        # Eventos cerrados
+        return len(self._inicio_idx)
+
+    @property
+    def inicio_idx(self) -> np.ndarray:
+        return np.frombuffer(self._inicio_idx, dtype=np.int64)
+
+    @property
+    def fin_idx(self) -> np.ndarray:
+        return np.frombuffer(self._fin_idx, dtype=np.int64)
+
+    @property
+    def ts_inicio(self) -> np.ndarray:
+        return np.frombuffer(self._ts_inicio, dtype=np.int64)
+
+    @property
+    def ts_fin(self) -> np.ndarray:
+        return np.frombuffer(self._ts_fin, dtype=np.int64)
+
+    def duraciones_ms(self) -> np.ndarray:
+        return self.ts_fin - self.ts_inicio
+
+    def duraciones_s(self) -> np.ndarray:
+        # Resolución de 1 s, igual que los timestamps del CSV procesado
+        return (self.ts_fin // 1000 - self.ts_inicio // 1000).astype(np.float64)
+
+    def percentiles(self, q: Sequence[float], segundos: bool = False) -> np.ndarray:
+        duraciones = self.duraciones_s() if segundos else self.duraciones_ms()
+        if not len(duraciones):
+            return np.zeros(len(q))
+        return np.percentile(duraciones, q)
+
+    def tramos(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (inicios, fines) de todos los tramos en alerta, incluido el abierto (fin = n).
+        """
+        if self.abierto_idx is None:
+            return self.inicio_idx, self.fin_idx
+        return (np.append(self.inicio_idx, self.abierto_idx), np.append(self.fin_idx, self.n))
+
+    def mascara(self) -> np.ndarray:
+        # Máscara booleana de alerta (n muestras) reconstruida desde los tramos
+        inicios, fines = self.tramos()
+        marcas = np.zeros(self.n + 1, dtype=np.int8)
+        marcas[inicios] = 1
+        marcas[fines] = -1
+        return np.cumsum(marcas[:-1], dtype=np.int8).astype(bool)
+
+    def a_estado(self, cerrados: bool = True) -> Dict:
+        # Serializable a JSON. Con cerrados=False solo guarda los contadores y el evento
+        # abierto (tamaño fijo, para el checkpoint del modo incremental)
+        estado = {
+            "n": self.n,
+            "muestras_alerta": self.muestras_alerta,
+            "abierto_idx": self.abierto_idx,
+            "abierto_ts": self.abierto_ts,
+        }
+        if cerrados:
+            estado.update({
+                "inicio_idx": self._inicio_idx.tolist(),
+                "fin_idx": self._fin_idx.tolist(),
+                "ts_inicio": self._ts_inicio.tolist(),
+                "ts_fin": self._ts_fin.tolist(),
+            })
+        return estado
+
+    @classmethod
+    def desde_estado(cls, estado: Dict) -> "IndiceEventos":
+        indice = cls()
+        indice.n, indice.muestras_alerta = estado["n"], estado["muestras_alerta"]
+        indice.abierto_idx, indice.abierto_ts = estado["abierto_idx"], estado["abierto_ts"]
+        for nombre in ("inicio_idx", "fin_idx", "ts_inicio", "ts_fin"):
+            getattr(indice, f"_{nombre}").extend(estado.get(nombre, ()))
+        return indice
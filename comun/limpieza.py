@@ -0,0 +1,306 @@
+import csv
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from comun.lotes import nuevo_parcial
+from comun.tiempo import DMY, ISO, ParserTimestamps, iso_desde_ms_lote, ms_desde_iso_lote
+from comun.tokenizador import (TAM_BLOQUE, TOKENS_NA, dividir_campos, leer_bloques, limpiar_valor_numerico,
+                               separar_encabezado, timestamps_desde_bytes, valores_desde_bytes)
+
+# Motor de limpieza común para los CSV "sucios" de sensores (timestamp;valor).
+# Cada script (PC1.py, PC1_conDef.py, s4_LimpiezaCsv.py) solo describe su ConfigLimpieza:
+# delimitador, formatos de fecha, tokens NA, transformación, regla de alerta y columnas
+# de salida. El motor lee por bloques (sin un dict por fila), convierte cada columna una
+# sola vez con NumPy y escribe la salida con writerows en la misma pasada.
+# Lectores: "bytes" (comun/tokenizador.py, por defecto) o "csv" (csv.reader, admite comillas).
+
+# Filas por bloque del lector csv
+TAM_LOTE = 4096
+
+# Códigos de descarte por fila
+FILA_OK = 0
+DESCARTE_VALOR = 1
+DESCARTE_TS = 2
+
+
+def fmt_iso(ts_ms: np.ndarray) -> List[str]:
+    return iso_desde_ms_lote(ts_ms)
+
+
+def fmt_decimales(decimales: int) -> Callable[[np.ndarray], List[str]]:
+    formato = f"{{:.{decimales}f}}".format
+    return lambda valores: [formato(v) for v in valores.tolist()]
+
+
+def fmt_alerta(si: str = "ALERTA", no: str = "OK") -> Callable[[np.ndarray], List[str]]:
+    return lambda mascara: [si if a else no for a in mascara.tolist()]
+
+
+class ConfigLimpieza:
+    """
+    Describe un formato de CSV sucio y qué hacer con cada fila válida.
+    `transformar(valores)` y `alerta(transformados)` reciben arrays del bloque completo;
+    `salida` es una lista de (encabezado, clave, formateador) sobre las columnas del
+    resultado: "ts_ms", `nombre_valor`, `nombre_transformado` y "es_alerta".
+    """
+
+    def __init__(self, delimitador: str = ";", columna_ts: str = "timestamp", columna_valor: str = "value",
+                 formatos: Iterable[str] = (ISO, DMY), tokens_na: Iterable[str] = TOKENS_NA,
+                 transformar: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                 alerta: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                 nombre_valor: str = "valor", nombre_transformado: str = "transformado",
+                 salida: Sequence[Tuple[str, str, Callable[[np.ndarray], List[str]]]] = (),
+                 lector: str = "bytes", tam_lote: int = TAM_LOTE, tam_bloque: int = TAM_BLOQUE):
+        self.delimitador = delimitador
+        self.columna_ts = columna_ts
+        self.columna_valor = columna_valor
+        self.formatos = tuple(formatos)
+        self.tokens_na = frozenset(tokens_na)
+        self.transformar = transformar
+        self.alerta = alerta
+        self.nombre_valor = nombre_valor
+        self.nombre_transformado = nombre_transformado
+        self.salida = tuple(salida)
+        self.lector = lector
+        self.tam_lote = tam_lote
+        self.tam_bloque = tam_bloque
+
+    def columnas(self) -> List[str]:
+        nombres = ["ts_ms", self.nombre_valor]
+        if self.transformar is not None:
+            nombres.append(self.nombre_transformado)
+        if self.alerta is not None:
+            nombres.append("es_alerta")
+        return nombres
+
+
+def redondear(valores: np.ndarray, decimales: int = 2) -> np.ndarray:
+    """
+    round(x, decimales) de Python sobre un array: np.round difiere en los casos límite
+    (x*10**decimales terminado casi en ,5), que se recalculan con round().
+    """
+    redondeados = np.round(valores, decimales)
+    escalados = valores * 10.0 ** decimales
+    with np.errstate(invalid="ignore"):
+        # inf - floor(inf) es nan: los valores no finitos nunca son casos límite
+        fraccion = np.abs(escalados - np.floor(escalados) - 0.5)
+    for i in np.flatnonzero(fraccion < 1e-6).tolist():
+        redondeados[i] = round(float(valores[i]), decimales)
+    return redondeados
+
+
+def leer_lotes(fin, config: ConfigLimpieza) -> Iterator[Tuple[List[str], List[str]]]:
+    """
+    Lee el CSV en bloques y devuelve las columnas crudas (timestamps, valores) de cada bloque.
+    Igual que DictReader: las líneas vacías se saltan y los campos faltantes quedan en "".
+    """
+    reader = csv.reader(fin, delimiter=config.delimitador)
+    encabezado = next(reader, [])
+    i_ts = encabezado.index(config.columna_ts) if config.columna_ts in encabezado else None
+    i_val = encabezado.index(config.columna_valor) if config.columna_valor in encabezado else None
+
+    ts_raws, val_raws = [], []
+    for row in reader:
+        if not row:
+            continue
+        ts_raws.append(row[i_ts] if i_ts is not None and i_ts < len(row) else "")
+        val_raws.append(row[i_val] if i_val is not None and i_val < len(row) else "")
+        if len(val_raws) >= config.tam_lote:
+            yield ts_raws, val_raws
+            ts_raws, val_raws = [], []
+    if val_raws:
+        yield ts_raws, val_raws
+
+
+def _valores(val_raws: List[str], tokens_na: frozenset) -> List[Optional[float]]:
+    # float() ya tolera espacios; solo los casos raros (coma, NA, basura) se limpian aparte
+    valores = []
+    for valor_raw in val_raws:
+        try:
+            valor = float(valor_raw)
+        except ValueError:
+            valor = limpiar_valor_numerico(valor_raw, tokens_na)
+        else:
+            if valor != valor:  # "nan" y variantes: decide la lista de tokens NA
+                valor = limpiar_valor_numerico(valor_raw, tokens_na)
+        valores.append(valor)
+    return valores
+
+
+def _canonico(ts: str, formatos: Tuple[str, ...]) -> str:
+    # "YYYY-MM-DDTHH:MM:SS" si el texto tiene forma ISO o dd/mm/aaaa permitida; si no, ""
+    if ISO in formatos and len(ts) >= 19 and ts[4] == "-" and ts[7] == "-" and ts[10] == "T" \
+            and ts[13] == ":" and ts[16] == ":":
+        return ts[:19]
+    if DMY in formatos and len(ts) == 19 and ts[2] == "/" and ts[5] == "/" and ts[10] == " " \
+            and ts[13] == ":" and ts[16] == ":":
+        return f"{ts[6:10]}-{ts[3:5]}-{ts[0:2]}T{ts[11:19]}"
+    return ""
+
+
+def timestamps_a_ms(ts_raws: List[str], parser: ParserTimestamps) -> List[Optional[int]]:
+    """
+    Convierte un bloque de timestamps a ms epoch de una vez (ISO y dd/mm/aaaa).
+    Las formas no canónicas o inválidas se resuelven fila por fila con el parser.
+    """
+    canonicos = [_canonico(t.strip(), parser.formatos) if t else "" for t in ts_raws]
+    ms, validos = ms_desde_iso_lote(canonicos)
+    resultado = [m if v else None for m, v in zip(ms.tolist(), validos.tolist())]
+    for i, (ts_raw, m) in enumerate(zip(ts_raws, resultado)):
+        if m is None and ts_raw:
+            resultado[i] = parser.a_epoch_ms(ts_raw)
+    return resultado
+
+
+def limpiar_lote(ts_raws: List[str], val_raws: List[str], parser: ParserTimestamps,
+                 tokens_na: frozenset = TOKENS_NA) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Limpia un bloque de filas: cada columna se convierte una sola vez.
+    Returns (ts_ms, valores, codigos) con un código de descarte por fila.
+    """
+    valores = _valores(val_raws, tokens_na)
+    # El timestamp solo se interpreta si el valor fue válido (el valor se descarta primero)
+    tiempos = timestamps_a_ms([t if v is not None else "" for t, v in zip(ts_raws, valores)], parser)
+
+    codigos = np.full(len(valores), FILA_OK, dtype=np.uint8)
+    codigos[[i for i, t in enumerate(tiempos) if t is None]] = DESCARTE_TS
+    codigos[[i for i, v in enumerate(valores) if v is None]] = DESCARTE_VALOR
+
+    valores = np.array([v if v is not None else np.nan for v in valores], dtype=np.float64)
+    ts_ms = np.array([t if t is not None else 0 for t in tiempos], dtype=np.int64)
+    return ts_ms, valores, codigos
+
+
+def lotes_csv(in_file: Path, config: ConfigLimpieza,
+              parser: ParserTimestamps) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    # Lector csv.reader: bloques de TAM_LOTE filas limpiados con limpiar_lote
+    with open(in_file, "r", encoding="utf-8", newline="") as fin:
+        for ts_raws, val_raws in leer_lotes(fin, config):
+            yield limpiar_lote(ts_raws, val_raws, parser, config.tokens_na)
+
+
+def _campos_csv(bloque: bytes, n_columnas: int, config: ConfigLimpieza) -> List[List[bytes]]:
+    # Bloque con comillas: se parte con csv.reader para respetarlas
+    filas = [f for f in csv.reader(bloque.decode("utf-8").splitlines(), delimiter=config.delimitador) if f]
+    return [[f[i].encode("utf-8") if i < len(f) else b"" for f in filas] for i in range(n_columnas)]
+
+
+def lotes_bytes(in_file: Path, config: ConfigLimpieza,
+                parser: ParserTimestamps) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Lector por bytes (comun/tokenizador.py): cada bloque sale ya tipado como
+    (ts_ms, valores, codigos), igual que limpiar_lote.
+    """
+    delimitador = config.delimitador.encode("utf-8")
+    i_ts = i_val = None
+    n_columnas = 0
+    for bloque in leer_bloques(in_file, config.tam_bloque):
+        if not n_columnas:
+            nombres, bloque = separar_encabezado(bloque, delimitador)
+            n_columnas = len(nombres)
+            i_ts = nombres.index(config.columna_ts) if config.columna_ts in nombres else None
+            i_val = nombres.index(config.columna_valor) if config.columna_valor in nombres else None
+        if b'"' in bloque:
+            campos = _campos_csv(bloque, n_columnas, config)
+        else:
+            campos = dividir_campos(bloque, n_columnas, delimitador)
+        n = len(campos[0])
+        if not n:
+            continue
+        vacios = [b""] * n
+        valores, valor_ok = valores_desde_bytes(campos[i_val] if i_val is not None else vacios, config.tokens_na)
+        # El timestamp solo se interpreta si el valor fue válido (el valor se descarta primero)
+        ts_ms, ts_ok = timestamps_desde_bytes(campos[i_ts] if i_ts is not None else vacios, parser, valor_ok)
+
+        codigos = np.full(n, FILA_OK, dtype=np.uint8)
+        codigos[~ts_ok] = DESCARTE_TS
+        codigos[~valor_ok] = DESCARTE_VALOR
+        yield ts_ms, valores, codigos
+
+
+def escribir_filas(writer, datos: Dict[str, np.ndarray], config: ConfigLimpieza):
+    writer.writerows(zip(*(formatear(datos[clave]) for _, clave, formatear in config.salida)))
+
+
+def guardar_csv(datos: Dict[str, np.ndarray], out_file: Path, config: ConfigLimpieza):
+    """
+    Escribe las columnas limpias con el encabezado y formatos de `config.salida`.
+    """
+    with open(out_file, "w", encoding="utf-8", newline="") as fout:
+        writer = csv.writer(fout)
+        writer.writerow([encabezado for encabezado, _, _ in config.salida])
+        escribir_filas(writer, datos, config)
+
+
+def limpiar_csv(in_file: Path, config: ConfigLimpieza,
+                out_file: Optional[Path] = None) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    Limpia el archivo completo por bloques. Si se da `out_file`, cada bloque limpio se
+    escribe en cuanto se procesa (una sola pasada sobre los datos).
+    Returns (columnas NumPy de las filas válidas, contadores total/keep/bad_ts/bad_val
+    y alertas_count si hay regla de alerta).
+    """
+    estadisticas = {"total": 0, "keep": 0, "bad_ts": 0, "bad_val": 0}
+    if config.alerta is not None:
+        estadisticas["alertas_count"] = 0
+    partes = {nombre: [] for nombre in config.columnas()}
+    parser_ts = ParserTimestamps(config.formatos)
+
+    fout = open(out_file, "w", encoding="utf-8", newline="") if out_file is not None else None
+    try:
+        if fout is not None:
+            writer = csv.writer(fout)
+            writer.writerow([encabezado for encabezado, _, _ in config.salida])
+        lotes = lotes_bytes if config.lector == "bytes" else lotes_csv
+        for ts_ms, valores, codigos in lotes(in_file, config, parser_ts):
+            conteo = np.bincount(codigos, minlength=3)
+            estadisticas["total"] += len(codigos)
+            estadisticas["bad_val"] += int(conteo[DESCARTE_VALOR])
+            estadisticas["bad_ts"] += int(conteo[DESCARTE_TS])
+
+            validas = codigos == FILA_OK
+            lote = {"ts_ms": ts_ms[validas], config.nombre_valor: valores[validas]}
+            if config.transformar is not None:
+                lote[config.nombre_transformado] = config.transformar(lote[config.nombre_valor])
+            if config.alerta is not None:
+                ultima = lote[config.nombre_transformado if config.transformar is not None else config.nombre_valor]
+                lote["es_alerta"] = config.alerta(ultima)
+                estadisticas["alertas_count"] += int(lote["es_alerta"].sum())
+            estadisticas["keep"] += int(validas.sum())
+
+            for nombre, columna in lote.items():
+                partes[nombre].append(columna)
+            if fout is not None:
+                escribir_filas(writer, lote, config)
+    finally:
+        if fout is not None:
+            fout.close()
+
+    tipos = {"ts_ms": np.int64, "es_alerta": np.bool_}
+    datos = {nombre: np.concatenate(p) if p else np.empty(0, dtype=tipos.get(nombre, np.float64))
+             for nombre, p in partes.items()}
+    return datos, estadisticas
+
+
+def parcial_de(valores: np.ndarray) -> Dict:
+    """
+    Parcial combinable (comun.lotes.nuevo_parcial) de un array completo.
+    """
+    parcial = nuevo_parcial()
+    if len(valores):
+        # Con inf y -inf en la columna la media queda en nan (math.fsum lanzaría ValueError)
+        with np.errstate(invalid="ignore"):
+            media = np.mean(valores)
+            desvios = valores - media
+            m2, suma_cuadrados = np.dot(desvios, desvios), np.dot(valores, valores)
+        parcial.update({
+            "n": len(valores),
+            "media": float(media),
+            "m2": float(m2),
+            "suma_cuadrados": float(suma_cuadrados),
+            "min": float(valores.min()),
+            "max": float(valores.max()),
+        })
+    return parcial
@@ -0,0 +1,189 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+def expandir_entradas(entrada: str, patron: str = "*.csv") -> List[Path]:
+    """
+    Devuelve la lista ordenada de archivos a procesar.
+    `entrada` puede ser un directorio (se usa `patron`), un glob o un archivo.
+    """
+    ruta = Path(entrada)
+    if ruta.is_dir():
+        return sorted(p for p in ruta.glob(patron) if p.is_file())
+    return sorted(Path(p) for p in glob(entrada) if Path(p).is_file())
+
+
+def nombres_repetidos(archivos: Iterable[Path]) -> Dict[str, List[Path]]:
+    """
+    Nombres base (stem) que comparten varios archivos de distintas carpetas: en el modo
+    lote sus salidas van a una misma carpeta con ese nombre y se pisarían.
+    """
+    por_nombre: Dict[str, List[Path]] = {}
+    for archivo in archivos:
+        por_nombre.setdefault(Path(archivo).stem, []).append(Path(archivo))
+    return {nombre: rutas for nombre, rutas in por_nombre.items() if len(rutas) > 1}
+
+
+def ejecutar_en_paralelo(funcion: Callable, tareas: Sequence,
+                         max_workers: Optional[int] = None) -> List:
+    """
+    Aplica `funcion(tarea)` a cada tarea (un archivo, un bloque, ...) en un ProcessPoolExecutor.
+    Los resultados se devuelven en el mismo orden que `tareas`.
+    `funcion` debe estar definida a nivel de módulo para poder enviarse a los procesos.
+    """
+    return list(iterar_en_paralelo(funcion, tareas, max_workers))
+
+
+def iterar_en_paralelo(funcion: Callable, tareas: Sequence,
+                       max_workers: Optional[int] = None) -> Iterator:
+    """
+    Como ejecutar_en_paralelo, pero entrega cada resultado (en orden) apenas está listo,
+    para usarlo mientras las tareas siguientes todavía se procesan.
+    """
+    if max_workers == 1 or len(tareas) <= 1:
+        yield from map(funcion, tareas)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(funcion, tareas)
+
+
+def dividir_en_bloques(path: Path, n_bloques: int, inicio: int = 0) -> List[Tuple[int, int]]:
+    """
+    Divide el archivo en rangos de bytes [inicio, fin) alineados al inicio de línea.
+    Cada línea queda en exactamente un bloque; los bloques vacíos se descartan.
+    """
+    tam = Path(path).stat().st_size
+    if tam <= inicio:
+        return []
+    paso = max(1, (tam - inicio) // max(1, n_bloques))
+
+    cortes = [inicio]
+    with open(path, "rb") as f:
+        for i in range(1, n_bloques):
+            objetivo = inicio + i * paso
+            if objetivo <= cortes[-1]:
+                continue
+            f.seek(objetivo - 1)
+            f.readline()  # avanza hasta el siguiente inicio de línea
+            corte = f.tell()
+            if corte >= tam:
+                break
+            if corte > cortes[-1]:
+                cortes.append(corte)
+    cortes.append(tam)
+    return list(zip(cortes[:-1], cortes[1:]))
+
+
+def fin_ultima_linea_completa(path: Path, tam_lectura: int = 65536) -> int:
+    """
+    Byte siguiente al último salto de línea del archivo (0 si no hay ninguno).
+    Sirve para no procesar una línea que todavía se está escribiendo.
+    """
+    with open(path, "rb") as f:
+        pos = f.seek(0, 2)
+        while pos > 0:
+            inicio = max(0, pos - tam_lectura)
+            f.seek(inicio)
+            datos = f.read(pos - inicio)
+            i = datos.rfind(b"\n")
+            if i >= 0:
+                return inicio + i + 1
+            pos = inicio
+    return 0
+
+
+def lineas_de_bloque(path: Path, inicio: int, fin: int, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Genera las líneas (decodificadas) que empiezan dentro del rango [inicio, fin).
+    """
+    with open(path, "rb") as f:
+        f.seek(inicio)
+        pos = inicio
+        while pos < fin:
+            linea = f.readline()
+            if not linea:
+                break
+            pos += len(linea)
+            yield linea.decode(encoding)
+
+
+def combinar_contadores(contadores: Iterable[Dict]) -> Dict:
+    """
+    Suma clave a clave los diccionarios de estadísticas (total, keep, bad_ts, ...).
+    """
+    total: Dict = {}
+    for c in contadores:
+        for clave, valor in c.items():
+            total[clave] = total.get(clave, 0) + valor
+    return total
+
+
+def nuevo_parcial() -> Dict:
+    """
+    Acumulador combinable de KPIs: conteo, media y suma de cuadrados de los desvíos
+    (m2, Welford), suma de cuadrados (para el RMS), mínimo y máximo.
+    """
+    return {"n": 0, "media": 0.0, "m2": 0.0, "suma_cuadrados": 0.0, "min": math.inf, "max": -math.inf}
+
+
+def agregar_valor(parcial: Dict, x: float):
+    parcial["n"] += 1
+    delta = x - parcial["media"]
+    parcial["media"] += delta / parcial["n"]
+    parcial["m2"] += delta * (x - parcial["media"])
+    parcial["suma_cuadrados"] += x * x
+    if x < parcial["min"]:
+        parcial["min"] = x
+    if x > parcial["max"]:
+        parcial["max"] = x
+
+
+def combinar_parciales(parciales: Iterable[Dict]) -> Dict:
+    """
+    Combina parciales de varios archivos o bloques. Media y m2 se unen con la fórmula
+    paralela de Chan (sin restar sumas grandes, el mismo resultado que Welford en serie).
+    Si traen "histograma" ({bin: conteo}), también se suman, respetando el orden de
+    aparición de los bins.
+    """
+    total = nuevo_parcial()
+    for p in parciales:
+        if p["n"]:
+            n_a, n_b = total["n"], p["n"]
+            n = n_a + n_b
+            if n_a:
+                delta = p["media"] - total["media"]
+                total["media"] += delta * n_b / n
+                total["m2"] += p["m2"] + delta * delta * n_a * n_b / n
+            else:
+                total["media"], total["m2"] = p["media"], p["m2"]
+            total["n"] = n
+            total["suma_cuadrados"] += p["suma_cuadrados"]
+            total["min"] = min(total["min"], p["min"])
+            total["max"] = max(total["max"], p["max"])
+        if "histograma" in p:
+            histograma = total.setdefault("histograma", {})
+            for bin_val, conteo in p["histograma"].items():
+                histograma[bin_val] = histograma.get(bin_val, 0) + conteo
+    return total
+
+
+def resumir_parcial(parcial: Dict) -> Dict:
+    """
+    KPIs derivados de un parcial: media, desviación (muestral y poblacional) y RMS.
+    """
+    n = parcial["n"]
+    if not n:
+        return {"n": 0}
+    m2 = parcial["m2"]
+    return {
+        "n": n,
+        "min": parcial["min"],
+        "max": parcial["max"],
+        "media": parcial["media"],
+        "std": math.sqrt(m2 / (n - 1)) if n > 1 else 0,
+        "std_poblacional": math.sqrt(m2 / n),
+        "rms": math.sqrt(parcial["suma_cuadrados"] / n),
+    }
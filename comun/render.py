@@ -0,0 +1,98 @@
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+# Render de gráficos desacoplado del cálculo.
+#   - Modo interactivo (sin_pantalla=False): como siempre, se guarda y se muestra con plt.show().
+#   - Modo sin pantalla: backend Agg, nunca se llama a show() y cada figura se arma y se guarda
+#     en un proceso aparte mientras el programa principal sigue (limpieza, KPIs, informe).
+# Las funciones de dibujo reciben solo datos (arrays ya reducidos) y devuelven la figura;
+# deben estar definidas a nivel de módulo para poder enviarse a los procesos.
+
+DPI = 150
+FORMATO = "png"
+
+
+def modo_sin_pantalla():
+    # Agg no necesita display: sirve en cron, CI o servidores
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def _renderizar(nombre: str, dibujar: Callable, args: Tuple, path: Optional[Path],
+                dpi: int, formato: str, mostrar: bool = False) -> Tuple[str, Optional[Path], float]:
+    import matplotlib.pyplot as plt
+
+    inicio = time.perf_counter()
+    figura = dibujar(*args)
+    # Sin path (solo modo interactivo) la figura se muestra pero no se guarda
+    if path is not None:
+        figura.savefig(path, dpi=dpi, format=formato, bbox_inches="tight")
+    segundos = time.perf_counter() - inicio
+    if mostrar:
+        plt.show()
+    plt.close(figura)
+    return nombre, path, segundos
+
+
+class Renderizador:
+    """
+    Cola de figuras a guardar. `enviar()` no bloquea en modo sin pantalla: la figura se
+    arma en un ProcessPoolExecutor. `esperar()` devuelve (nombre, archivo, segundos) de
+    cada figura en orden de envío e `informe()` imprime el tiempo de render de cada una.
+    """
+
+    def __init__(self, sin_pantalla: bool = False, max_workers: Optional[int] = None,
+                 dpi: int = DPI, formato: str = FORMATO):
+        self.sin_pantalla = sin_pantalla
+        self.dpi = dpi
+        self.formato = formato
+        self.resultados: List[Tuple[str, Optional[Path], float]] = []
+        self._pendientes: List[Future] = []
+        self._pool = None
+        if sin_pantalla:
+            modo_sin_pantalla()
+            if max_workers != 1:
+                self._pool = ProcessPoolExecutor(max_workers=max_workers, initializer=modo_sin_pantalla)
+
+    def ruta(self, path: Optional[Path]) -> Optional[Path]:
+        # El formato elegido manda sobre la extensión del archivo
+        return None if path is None else Path(path).with_suffix(f".{self.formato}")
+
+    def enviar(self, nombre: str, dibujar: Callable, *args, path: Optional[Path]) -> Optional[Path]:
+        path = self.ruta(path)
+        if self.sin_pantalla and path is None:
+            raise ValueError(f"La figura '{nombre}' necesita un archivo de salida en modo sin pantalla")
+        if self._pool is not None:
+            self._pendientes.append(
+                self._pool.submit(_renderizar, nombre, dibujar, args, path, self.dpi, self.formato))
+        else:
+            self.resultados.append(
+                _renderizar(nombre, dibujar, args, path, self.dpi, self.formato, mostrar=not self.sin_pantalla))
+        return path
+
+    def esperar(self) -> List[Tuple[str, Optional[Path], float]]:
+        pendientes, self._pendientes = self._pendientes, []
+        self.resultados.extend(f.result() for f in pendientes)
+        return self.resultados
+
+    def informe(self):
+        resultados = self.esperar()
+        if not resultados:
+            return
+        print(f"\nRENDER DE GRÁFICOS ({self.formato}, {self.dpi} dpi):")
+        for nombre, path, segundos in resultados:
+            print(f"   {nombre:24s} {segundos:7.2f} s  {path or '(solo pantalla)'}")
+
+    def cerrar(self):
+        self.esperar()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,134 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVE_SELF = 0x800
+IN_DELETE_SELF = 0x400
+MASCARA = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVE_SELF | IN_DELETE_SELF
+
+
+class _Inotify:
+    """
+    Vigilancia de un archivo con inotify (Linux) vía ctypes, sin dependencias externas.
+    """
+
+    def __init__(self, path: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(path)), MASCARA) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch falló para {path}")
+
+    def esperar(self, timeout: float):
+        listos, _, _ = select.select([self.fd], [], [], timeout)
+        if listos:
+            try:
+                while os.read(self.fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def cerrar(self):
+        os.close(self.fd)
+
+
+class _Sondeo:
+    """
+    Alternativa portable: simplemente duerme hasta el siguiente sondeo.
+    """
+
+    def __init__(self, path: Path, intervalo: float):
+        self.intervalo = intervalo
+
+    def esperar(self, timeout: float):
+        time.sleep(min(timeout, self.intervalo))
+
+    def cerrar(self):
+        pass
+
+
+def crear_vigilante(path: Path, intervalo: float = 0.5, usar_inotify: bool = True):
+    if usar_inotify and hasattr(select, "select") and os.name == "posix":
+        try:
+            return _Inotify(path)
+        except (OSError, AttributeError):
+            pass
+    return _Sondeo(path, intervalo)
+
+
+def seguir_lineas(path: Path, desde: int = 0, intervalo: float = 0.5, usar_inotify: bool = True,
+                  detener: Optional[Callable[[], bool]] = None,
+                  es_encabezado: Optional[Callable[[str], bool]] = None,
+                  encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Genera las líneas completas de `path` a partir del byte `desde`, y luego las que se
+    vayan agregando (como `tail -f`). Una línea sin salto final se retiene hasta
+    completarse (salvo al detener). Si el archivo se trunca o se reemplaza, se vuelve a leer desde el inicio;
+    si su primera línea cumple `es_encabezado(linea)`, se omite (el archivo rotado trae su propio encabezado).
+    `detener()` permite terminar el seguimiento desde fuera (p. ej. en pruebas).
+    """
+    path = Path(path)
+    while not path.exists():
+        if detener is not None and detener():
+            return
+        time.sleep(intervalo)
+
+    vigilante = crear_vigilante(path, intervalo, usar_inotify)
+    f = open(path, "rb")
+    inodo = os.fstat(f.fileno()).st_ino
+    f.seek(desde)
+    pendiente = b""
+    reabierto = False  # la próxima línea es la primera de un archivo reabierto
+    
+    def primera_es_encabezado(linea: str) -> bool:
+        nonlocal reabierto
+        omitir = reabierto and es_encabezado is not None and es_encabezado(linea)
+        reabierto = False
+        return omitir
+    
+    try:
+        while True:
+            datos = f.read(65536)
+            if datos:
+                pendiente += datos
+                *completas, pendiente = pendiente.split(b"\n")
+                for linea in completas:
+                    linea = linea.decode(encoding) + "\n"
+                    if not primera_es_encabezado(linea):
+                        yield linea
+                continue
+
+            if detener is not None and detener():
+                # Al detener ya no se espera más: se entrega la última línea aunque no tenga salto
+                if pendiente and not primera_es_encabezado(pendiente.decode(encoding)):
+                    yield pendiente.decode(encoding)
+                return
+            vigilante.esperar(intervalo * 2)
+
+            try:
+                estado = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if estado.st_ino != inodo or estado.st_size < f.tell():
+                # Rotación o truncado: reabrir y empezar de nuevo
+                f.close()
+                vigilante.cerrar()
+                vigilante = crear_vigilante(path, intervalo, usar_inotify)
+                f = open(path, "rb")
+                inodo = os.fstat(f.fileno()).st_ino
+                pendiente = b""
+                reabierto = True
+    finally:
+        f.close()
+        vigilante.cerrar()
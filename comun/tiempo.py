@@ -0,0 +1,231 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+
+FORMATO_ISO = "%Y-%m-%dT%H:%M:%S"
+FORMATO_DMY = "%d/%m/%Y %H:%M:%S"
+
+# Formatos de entrada reconocidos
+EPOCH_MS = "epoch_ms"  # milisegundos enteros (Arduino / millis())
+ISO = "iso"            # 2025-09-01T10:00:00 (se ignora lo que venga después del segundo)
+DMY = "dmy"            # 01/09/2025 10:00:00
+
+EPOCH = datetime(1970, 1, 1)
+UN_SEGUNDO = timedelta(seconds=1)
+TAM_CACHE = 8192
+
+
+def _digitos(texto: str) -> bool:
+    return texto.isascii() and texto.isdigit()
+
+
+def _a_ms(dt: datetime, local: bool) -> int:
+    if local:
+        return int(dt.timestamp()) * 1000
+    return (dt - EPOCH) // UN_SEGUNDO * 1000
+
+
+@lru_cache(maxsize=TAM_CACHE)
+def _ms_desde_iso(prefijo: str, local: bool = False) -> Optional[int]:
+    # Clave de caché: "YYYY-MM-DDTHH:MM:SS" (el segundo), compartida por muchas filas
+    if not _digitos(prefijo[0:4] + prefijo[5:7] + prefijo[8:10] + prefijo[11:13] + prefijo[14:16] + prefijo[17:19]):
+        return None
+    try:
+        dt = datetime(int(prefijo[0:4]), int(prefijo[5:7]), int(prefijo[8:10]),
+                      int(prefijo[11:13]), int(prefijo[14:16]), int(prefijo[17:19]))
+    except ValueError:
+        return None
+    return _a_ms(dt, local)
+
+
+@lru_cache(maxsize=TAM_CACHE)
+def _ms_desde_dmy(texto: str, local: bool = False) -> Optional[int]:
+    if not _digitos(texto[0:2] + texto[3:5] + texto[6:10] + texto[11:13] + texto[14:16] + texto[17:19]):
+        return None
+    try:
+        dt = datetime(int(texto[6:10]), int(texto[3:5]), int(texto[0:2]),
+                      int(texto[11:13]), int(texto[14:16]), int(texto[17:19]))
+    except ValueError:
+        return None
+    return _a_ms(dt, local)
+
+
+@lru_cache(maxsize=TAM_CACHE)
+def _datetime_local(segundo: int) -> datetime:
+    return datetime.fromtimestamp(segundo)
+
+
+def _rapido_epoch_ms(ts: str, local: bool = False) -> Optional[int]:
+    try:
+        ms = int(ts)
+        _datetime_local(ms // 1000)  # valida el rango igual que datetime.fromtimestamp
+    except (ValueError, OSError, OverflowError):
+        return None
+    return ms
+
+
+def _rapido_iso(ts: str, local: bool = False) -> Optional[int]:
+    if len(ts) < 19 or ts[4] != "-" or ts[7] != "-" or ts[10] != "T" or ts[13] != ":" or ts[16] != ":":
+        return None
+    return _ms_desde_iso(ts[:19], local)
+
+
+def _rapido_dmy(ts: str, local: bool = False) -> Optional[int]:
+    if len(ts) != 19 or ts[2] != "/" or ts[5] != "/" or ts[10] != " " or ts[13] != ":" or ts[16] != ":":
+        return None
+    return _ms_desde_dmy(ts, local)
+
+
+RAPIDOS: Dict[str, Callable[[str, bool], Optional[int]]] = {
+    EPOCH_MS: _rapido_epoch_ms,
+    ISO: _rapido_iso,
+    DMY: _rapido_dmy,
+}
+
+
+def _lento_texto(ts: str, formatos: Iterable[str], local: bool = False) -> Optional[int]:
+    """
+    Cadena original de strptime para formas no canónicas (p. ej. campos sin ceros a la izquierda).
+    """
+    candidatos = [f for f, clave in ((FORMATO_ISO, ISO), (FORMATO_DMY, DMY)) if clave in formatos]
+    for fmt in candidatos:
+        try:
+            return _a_ms(datetime.strptime(ts, fmt), local)
+        except ValueError:
+            continue
+
+    if ISO in formatos and "T" in ts and len(ts) >= 19:
+        try:
+            return _a_ms(datetime.strptime(ts[:19], FORMATO_ISO), local)
+        except ValueError:
+            pass
+
+    return None
+
+
+class ParserTimestamps:
+    """
+    Convierte timestamps crudos a milisegundos epoch (int).
+    El formato se detecta con la primera fila válida del archivo y las filas siguientes
+    usan directamente su ruta rápida (slicing + caché por segundo). Solo las formas
+    no canónicas caen en la cadena de strptime.
+    Los textos sin zona horaria se interpretan como hora de pared (UTC ingenuo), o
+    como hora local del sistema con local=True.
+    """
+
+    def __init__(self, formatos: Iterable[str] = (ISO, DMY), local: bool = False):
+        self.formatos = tuple(formatos)
+        self.local = local
+        self.formato: Optional[str] = None
+
+    def a_epoch_ms(self, ts_raw: str) -> Optional[int]:
+        if not ts_raw:
+            return None
+
+        ts = ts_raw.strip()
+
+        if self.formato is not None:
+            ms = RAPIDOS[self.formato](ts, self.local)
+            if ms is not None:
+                return ms
+
+        for formato in self.formatos:
+            if formato == self.formato:
+                continue
+            ms = RAPIDOS[formato](ts, self.local)
+            if ms is not None:
+                if self.formato is None:
+                    self.formato = formato
+                return ms
+
+        return _lento_texto(ts, self.formatos, self.local)
+
+
+def ms_desde_iso_lote(canonicos: List[str]):
+    """
+    Versión vectorizada de la ruta rápida ISO para un bloque de textos
+    "YYYY-MM-DDTHH:MM:SS" (hora de pared, sin zona). Devuelve (ms, validos) como arrays
+    NumPy; las fechas imposibles o con caracteres no numéricos quedan con validos=False.
+    """
+    import numpy as np
+
+    n = len(canonicos)
+    ascii_19 = np.array([c.isascii() and len(c) == 19 for c in canonicos], dtype=bool)
+    texto = np.array([c if v else "" for c, v in zip(canonicos, ascii_19.tolist())], dtype="S19")
+    ms, validos = ms_desde_matriz_iso(texto.reshape(n, 1).view(np.uint8).reshape(n, 19))
+    return ms, validos & ascii_19
+
+
+def ms_desde_matriz_iso(matriz):
+    """
+    Igual que ms_desde_iso_lote, pero sobre una matriz uint8 (n, 19) con los bytes
+    ASCII de cada texto "YYYY-MM-DDTHH:MM:SS" (p. ej. la vista de un array "S19").
+    Solo se validan los dígitos: los separadores los verifica quien arma la matriz.
+    """
+    import numpy as np
+
+    n = len(matriz)
+    texto = matriz.astype(np.int64) - ord("0")
+
+    posiciones = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+    validos = ((texto[:, posiciones] >= 0) & (texto[:, posiciones] <= 9)).all(axis=1)
+
+    def numero(*cols):
+        valor = np.zeros(n, dtype=np.int64)
+        for c in cols:
+            valor = valor * 10 + texto[:, c]
+        return valor
+
+    anio, mes, dia = numero(0, 1, 2, 3), numero(5, 6), numero(8, 9)
+    hora, minuto, segundo = numero(11, 12), numero(14, 15), numero(17, 18)
+
+    bisiesto = (anio % 4 == 0) & ((anio % 100 != 0) | (anio % 400 == 0))
+    dias_mes = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[np.clip(mes, 0, 12)]
+    dias_mes = dias_mes + ((mes == 2) & bisiesto)
+    validos &= ((anio >= 1) & (mes >= 1) & (mes <= 12) & (dia >= 1) & (dia <= dias_mes)
+                & (hora < 24) & (minuto < 60) & (segundo < 60))
+
+    # Días desde 1970-01-01 (algoritmo days_from_civil)
+    y = anio - (mes <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (mes + np.where(mes > 2, -3, 9)) + 2) // 5 + dia - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    dias = era * 146097 + doe - 719468
+
+    ms = ((dias * 24 + hora) * 60 + minuto) * 60 + segundo
+    return np.where(validos, ms * 1000, 0), validos
+
+
+def iso_desde_ms_lote(ts_ms) -> List[str]:
+    """
+    iso_desde_ms (hora de pared) para un array de ms epoch, de una vez.
+    """
+    import numpy as np
+
+    segundos = np.asarray(ts_ms, dtype=np.int64) // 1000
+    return np.datetime_as_string(segundos.astype("datetime64[s]"), unit="s").tolist()
+
+
+@lru_cache(maxsize=TAM_CACHE)
+def _iso_utc(segundo: int) -> str:
+    return (EPOCH + timedelta(seconds=segundo)).strftime(FORMATO_ISO)
+
+
+@lru_cache(maxsize=TAM_CACHE)
+def _iso_local(segundo: int) -> str:
+    return _datetime_local(segundo).strftime(FORMATO_ISO)
+
+
+def iso_desde_ms(ms: int, local: bool = False) -> str:
+    """
+    Formatea milisegundos epoch como YYYY-MM-DDTHH:MM:SS (resolución de 1 s).
+    local=True usa la zona horaria del sistema, como datetime.fromtimestamp.
+    """
+    segundo = ms // 1000
+    return _iso_local(segundo) if local else _iso_utc(segundo)
+
+
+def datetime_desde_ms(ms: int, local: bool = False) -> datetime:
+    segundo = ms // 1000
+    return _datetime_local(segundo) if local else EPOCH + timedelta(seconds=segundo)
@@ -0,0 +1,178 @@
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from comun.tiempo import DMY, ISO, ParserTimestamps, ms_desde_matriz_iso
+
+# Tokenizador tolerante para CSV "sucios" de sensores (datos_sucios_250_v2.csv y similares):
+# campos con espacios, coma decimal y tokens NA. Trabaja sobre bytes (o memoryview) por
+# bloques de líneas: las líneas se parten con split en C, cada columna se limpia con las
+# funciones vectorizadas de np.strings y los valores salen ya tipados (float64 / ms int64).
+# Solo los casos raros (basura, formatos no canónicos) pasan por la ruta de Python.
+
+# np.strings existe desde NumPy 2.0; en 1.x las mismas funciones están en np.char
+cadenas = getattr(np, "strings", np.char)
+
+# Bytes por bloque leído del archivo
+TAM_BLOQUE = 1 << 20
+
+# Valores que se tratan como dato faltante (comparados en minúsculas)
+TOKENS_NA = frozenset({"", "na", "n/a", "nan", "null", "none", "error"})
+
+# "DD/MM/YYYY HH:MM:SS" -> posiciones de "YYYY-MM-DDTHH:MM:SS" (los separadores no importan)
+ORDEN_DMY_A_ISO = [6, 7, 8, 9, 2, 3, 4, 5, 0, 1, 10, 11, 12, 13, 14, 15, 16, 17, 18]
+
+
+def limpiar_valor_numerico(valor_raw: str, tokens_na: Iterable[str] = TOKENS_NA) -> Optional[float]:
+    """
+    Limpia y convierte un valor string a float (coma decimal y tokens NA).
+    Returns None si el valor es inválido.
+    """
+    if not valor_raw:
+        return None
+    valor_raw = valor_raw.replace(",", ".")
+    if valor_raw.lower().strip() in tokens_na:
+        return None
+    try:
+        return float(valor_raw)
+    except ValueError:
+        return None
+
+
+def leer_bloques(path: Path, tam_bloque: int = TAM_BLOQUE) -> Iterator[bytes]:
+    """
+    Lee el archivo en bloques de bytes cortados al final de una línea
+    (el último puede no terminar en salto de línea).
+    """
+    with open(path, "rb") as f:
+        resto = b""
+        while True:
+            datos = f.read(tam_bloque)
+            if not datos:
+                break
+            datos = resto + datos
+            corte = datos.rfind(b"\n") + 1
+            resto = datos[corte:]
+            if corte:
+                yield datos[:corte]
+        if resto:
+            yield resto
+
+
+def separar_encabezado(bloque: bytes, delimitador: bytes = b";") -> Tuple[List[str], bytes]:
+    """
+    Devuelve (nombres de columna, resto del bloque) a partir del primer bloque del archivo.
+    """
+    primera, _, resto = bytes(bloque).partition(b"\n")
+    nombres = primera.rstrip(b"\r").decode("utf-8").split(delimitador.decode("utf-8"))
+    return nombres, resto
+
+
+def dividir_campos(bloque, n_columnas: int, delimitador: bytes = b";") -> List[List[bytes]]:
+    """
+    Parte un bloque de líneas en columnas de campos crudos (bytes).
+    Como csv.DictReader: las líneas vacías se saltan, los campos faltantes quedan en b""
+    y los finales de línea CRLF no dejan el \r pegado al último campo.
+    No interpreta comillas (los datos de sensores no las usan).
+    """
+    texto = bytes(bloque)
+    if b"\r" in texto:
+        texto = texto.replace(b"\r\n", b"\n")
+        if texto.endswith(b"\r"):
+            texto = texto[:-1]
+    lineas = texto.split(b"\n")
+    if lineas and not lineas[-1]:
+        lineas.pop()
+    if b"" in lineas:
+        lineas = [linea for linea in lineas if linea]
+    if not lineas:
+        return [[] for _ in range(n_columnas)]
+
+    # Caso común: todas las líneas tienen exactamente n_columnas campos -> un solo split
+    texto = b"\n".join(lineas)
+    buf = np.frombuffer(texto, dtype=np.uint8)
+    saltos = np.flatnonzero(buf == ord("\n"))
+    por_linea = np.bincount(np.searchsorted(saltos, np.flatnonzero(buf == delimitador[0])),
+                            minlength=len(lineas))
+    if (por_linea == n_columnas - 1).all():
+        campos = texto.replace(b"\n", delimitador).split(delimitador)
+        return [campos[i::n_columnas] for i in range(n_columnas)]
+
+    filas = [linea.split(delimitador) for linea in lineas]
+    return [[f[i] if i < len(f) else b"" for f in filas] for i in range(n_columnas)]
+
+
+def valores_desde_bytes(campos: List[bytes],
+                        tokens_na: Iterable[str] = TOKENS_NA) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte una columna de valores crudos a float64 en una pasada vectorizada
+    (strip, coma decimal -> punto). Devuelve (valores, validos).
+    Los decimales simples se convierten con NumPy; el resto (exponentes, NA, basura)
+    con limpiar_valor_numerico, así el resultado es el mismo que fila por fila.
+    """
+    n = len(campos)
+    valores = np.full(n, np.nan)
+    validos = np.zeros(n, dtype=bool)
+    if not n:
+        return valores, validos
+
+    limpios = cadenas.replace(cadenas.strip(np.array(campos, dtype=np.bytes_)), b",", b".")
+    # A lo sumo un signo inicial, seguido solo de dígitos y un punto
+    sin_signo = cadenas.lstrip(limpios, b"+-")
+    un_signo = cadenas.str_len(limpios) - cadenas.str_len(sin_signo) <= 1
+    simples = un_signo & cadenas.isdigit(cadenas.replace(sin_signo, b".", b"", 1))
+
+    try:
+        valores[simples] = limpios[simples].astype(np.float64)
+        validos[simples] = True
+    except ValueError:
+        simples[:] = False
+
+    for i in np.flatnonzero(~simples).tolist():
+        valor = limpiar_valor_numerico(campos[i].decode("utf-8"), tokens_na)
+        if valor is not None:
+            valores[i] = valor
+            validos[i] = True
+    return valores, validos
+
+
+def timestamps_desde_bytes(campos: List[bytes], parser: ParserTimestamps,
+                           consultar: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte una columna de timestamps crudos a ms epoch. Devuelve (ts_ms, validos).
+    Las formas canónicas ISO y dd/mm/aaaa permitidas por el parser se resuelven vectorizadas;
+    el resto de las filas marcadas en `consultar` (por defecto, todas) pasa por el parser.
+    """
+    n = len(campos)
+    if not n:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+
+    limpios = cadenas.strip(np.array(campos, dtype=np.bytes_))
+    largo = cadenas.str_len(limpios)
+    matriz = limpios.astype("S19").reshape(n, 1).view(np.uint8).reshape(n, 19).copy()
+
+    def separadores(*pares):
+        mascara = np.ones(n, dtype=bool)
+        for columna, caracter in pares:
+            mascara &= matriz[:, columna] == ord(caracter)
+        return mascara
+
+    ninguno = np.zeros(n, dtype=bool)
+    iso = ((largo >= 19) & separadores((4, "-"), (7, "-"), (10, "T"), (13, ":"), (16, ":"))
+           if ISO in parser.formatos else ninguno)
+    dmy = ((largo == 19) & separadores((2, "/"), (5, "/"), (10, " "), (13, ":"), (16, ":"))
+           if DMY in parser.formatos else ninguno)
+    matriz[dmy] = matriz[dmy][:, ORDEN_DMY_A_ISO]
+
+    ts_ms, validos = ms_desde_matriz_iso(matriz)
+    validos &= iso | dmy
+
+    pendientes = ~validos if consultar is None else ~validos & consultar
+    for i in np.flatnonzero(pendientes).tolist():
+        if campos[i]:
+            ms = parser.a_epoch_ms(campos[i].decode("utf-8"))
+            if ms is not None:
+                ts_ms[i] = ms
+                validos[i] = True
+    return ts_ms, validos
@@ -0,0 +1,184 @@
+import csv
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from comun.tiempo import iso_desde_ms_lote
+
+# KPIs por ventana de tiempo (media, RMS, desviación, "THD" = std/media y bin pico)
+# para ver la deriva del sensor por minuto u hora en lugar de un único valor por archivo.
+#   - Ventanas fijas (paso = ancho) o deslizantes (paso < ancho, ancho múltiplo del paso),
+#     alineadas al reloj: empiezan en múltiplos del paso desde el epoch.
+#   - Sumas acumuladas: cada ventana se resuelve con dos restas por KPI, O(n) en total
+#     sin importar cuánto se solapen. El histograma del bin pico se acumula por paso.
+#   - Solo se emiten ventanas con datos; un hueco en la serie no genera filas vacías.
+
+# Ventanas por lote al calcular el bin pico (acota la matriz bloques x bins)
+TAM_LOTE_VENTANAS = 4096
+# Tope de esa matriz (celdas int64); por encima se usa la moda ventana por ventana
+MAX_CELDAS_PICOS = 1 << 22
+
+COLUMNAS = ("inicio_ms", "fin_ms", "n", "media", "rms", "std", "thd", "pico")
+
+UNIDADES_MS = {"ms": 1, "s": 1000, "min": 60_000, "h": 3_600_000}
+
+
+def duracion_ms(texto: str) -> int:
+    """
+    "90" (segundos), "30s", "5min", "1h" o "500ms" -> milisegundos.
+    """
+    texto = texto.strip().lower()
+    for unidad in sorted(UNIDADES_MS, key=len, reverse=True):
+        if texto.endswith(unidad):
+            return int(float(texto[:-len(unidad)]) * UNIDADES_MS[unidad])
+    return int(float(texto) * 1000)
+
+
+def tabla_vacia() -> Dict[str, np.ndarray]:
+    return {c: np.empty(0, dtype=np.int64 if c in ("inicio_ms", "fin_ms", "n") else np.float64)
+            for c in COLUMNAS}
+
+
+def _inicios_con_datos(ocupados: np.ndarray, k: int) -> np.ndarray:
+    # Una ventana [s, s + k) tiene datos si contiene algún bloque ocupado, es decir
+    # s en [b - k + 1, b]. Se unen esos intervalos y se recortan a la serie: la primera
+    # ventana empieza en el primer bloque y la última termina en el último.
+    if k == 1:
+        return ocupados
+    corte = np.flatnonzero(np.diff(ocupados) > k) + 1
+    ini = np.maximum(ocupados[np.concatenate(([0], corte))] - k + 1, ocupados[0])
+    fin = np.minimum(ocupados[np.concatenate((corte - 1, [len(ocupados) - 1]))],
+                     max(ocupados[0], ocupados[-1] - k + 1))
+    largos = np.maximum(fin - ini + 1, 0)
+    desplazamiento = np.repeat(ini - np.concatenate(([0], np.cumsum(largos)[:-1])), largos)
+    return desplazamiento + np.arange(largos.sum())
+
+
+def _moda(bins: np.ndarray) -> float:
+    bins = bins[np.isfinite(bins)]
+    if not len(bins):
+        return np.nan
+    distintos, conteos = np.unique(bins, return_counts=True)
+    return distintos[np.argmax(conteos)]
+
+
+def _picos(valores: np.ndarray, pos: np.ndarray, i0: np.ndarray, i1: np.ndarray,
+           ancho_bin: float) -> np.ndarray:
+    # Bin de ancho `ancho_bin` con más muestras en cada ventana (en empate, el menor).
+    # Los valores no finitos no cuentan; una ventana sin valores finitos da NaN.
+    # Por lote de ventanas: histograma por bloque, acumulado por bloques y restado. Las
+    # columnas son solo los bins presentes (np.unique), no todo el rango entre el menor
+    # y el mayor: un valor atípico no agranda la matriz. Si aun así supera MAX_CELDAS_PICOS
+    # (muchos bins distintos), la moda se calcula ventana por ventana.
+    picos = np.full(len(i0), np.nan)
+    for c in range(0, len(i0), TAM_LOTE_VENTANAS):
+        j0, j1 = i0[c:c + TAM_LOTE_VENTANAS], i1[c:c + TAM_LOTE_VENTANAS]
+        a, b = j0[0], j1[-1]
+        bins = np.round(valores[pos[a]:pos[b]] / ancho_bin) + 0.0  # + 0.0: sin -0.0
+        finitos = np.isfinite(bins)
+        distintos, columna = np.unique(bins[finitos], return_inverse=True)
+        n_bins = len(distintos)
+        if not n_bins:
+            continue
+        if (b - a + 1) * n_bins > MAX_CELDAS_PICOS:
+            picos[c:c + TAM_LOTE_VENTANAS] = [_moda(bins[pos[x] - pos[a]:pos[y] - pos[a]])
+                                              for x, y in zip(j0, j1)]
+            continue
+        bloque = np.repeat(np.arange(b - a), np.diff(pos[a:b + 1]))[finitos]
+        conteos = np.bincount(bloque * n_bins + columna, minlength=(b - a) * n_bins)
+        acumulado = np.zeros((b - a + 1, n_bins), dtype=np.int64)
+        np.cumsum(conteos.reshape(b - a, n_bins), axis=0, out=acumulado[1:])
+        en_ventana = acumulado[j1 - a] - acumulado[j0 - a]
+        picos[c:c + TAM_LOTE_VENTANAS] = np.where(en_ventana.any(axis=1),
+                                                  distintos[np.argmax(en_ventana, axis=1)], np.nan)
+    return picos * ancho_bin
+
+
+def kpis_por_ventana(ts_ms: np.ndarray, valores: np.ndarray, ancho_ms: int,
+                     paso_ms: Optional[int] = None, ancho_bin: float = 5.0) -> Dict[str, np.ndarray]:
+    """
+    Tabla columnar {columna: array} con una fila por ventana [inicio_ms, fin_ms) con datos:
+    n, media, rms, std (poblacional), thd (% = std / media) y pico (bin más frecuente).
+    Sin paso las ventanas son fijas; con paso < ancho, deslizantes.
+    """
+    paso_ms = paso_ms or ancho_ms
+    if ancho_ms <= 0 or paso_ms <= 0 or ancho_ms % paso_ms:
+        raise ValueError("El ancho de la ventana debe ser un múltiplo positivo del paso")
+    k = ancho_ms // paso_ms
+
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    valores = np.asarray(valores, dtype=np.float64)
+    if not len(valores):
+        return tabla_vacia()
+    if (np.diff(ts_ms) < 0).any():
+        orden = np.argsort(ts_ms, kind="stable")
+        ts_ms, valores = ts_ms[orden], valores[orden]
+
+    # Bloques de un paso: `pos` marca dónde empieza cada bloque ocupado en la serie
+    bloque = ts_ms // paso_ms
+    pos = np.flatnonzero(np.diff(bloque)) + 1
+    ocupados = bloque[np.concatenate(([0], pos))]
+    pos = np.concatenate(([0], pos, [len(valores)]))
+
+    inicios = _inicios_con_datos(ocupados, k)
+    i0 = np.searchsorted(ocupados, inicios)
+    i1 = np.searchsorted(ocupados, inicios + k)
+    a, b = pos[i0], pos[i1]
+    n = b - a
+
+    # Sumas acumuladas; la varianza se calcula sobre valores centrados en la media global
+    # para que la resta de acumulados no pierda precisión
+    referencia = valores.mean()
+    centrados = valores - referencia
+    s1 = np.concatenate(([0.0], np.cumsum(centrados)))
+    s2 = np.concatenate(([0.0], np.cumsum(centrados * centrados)))
+    cuadrados = np.concatenate(([0.0], np.cumsum(valores * valores)))
+
+    media_c = (s1[b] - s1[a]) / n
+    media = referencia + media_c
+    std = np.sqrt(np.maximum((s2[b] - s2[a]) / n - media_c * media_c, 0.0))
+    rms = np.sqrt(np.maximum((cuadrados[b] - cuadrados[a]) / n, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        thd = np.where(media != 0, std / media * 100, 0.0)
+
+    return {
+        "inicio_ms": inicios * paso_ms,
+        "fin_ms": inicios * paso_ms + ancho_ms,
+        "n": n,
+        "media": media,
+        "rms": rms,
+        "std": std,
+        "thd": thd,
+        "pico": _picos(valores, pos, i0, i1, ancho_bin),
+    }
+
+
+def guardar_tabla_ventanas(tabla: Dict[str, np.ndarray], path: Path, decimales: int = 3) -> Path:
+    # CSV compacto: inicio/fin en ISO (UTC, como el resto de las salidas) y KPIs redondeados
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["inicio", "fin", "n", "media", "rms", "std", "thd_pct", "pico"])
+        writer.writerows(zip(
+            iso_desde_ms_lote(tabla["inicio_ms"]), iso_desde_ms_lote(tabla["fin_ms"]),
+            tabla["n"].tolist(),
+            *(np.round(tabla[c], decimales).tolist() for c in ("media", "rms", "std", "thd")),
+            tabla["pico"].tolist(),
+        ))
+    return path
+
+
+def imprimir_tabla_ventanas(tabla: Dict[str, np.ndarray], unidad: str = "", max_filas: int = 10):
+    n_ventanas = len(tabla["n"])
+    print(f"\nKPIs POR VENTANA ({n_ventanas} ventanas):")
+    if not n_ventanas:
+        return
+    print(f"   {'inicio':19s} {'n':>7s} {'media':>9s} {'rms':>9s} {'std':>9s} {'thd %':>7s} {'pico':>7s}")
+    filas = range(n_ventanas) if n_ventanas <= max_filas else [*range(max_filas // 2),
+                                                              *range(n_ventanas - max_filas // 2, n_ventanas)]
+    inicios = iso_desde_ms_lote(tabla["inicio_ms"][list(filas)])
+    for i, inicio in zip(filas, inicios):
+        if n_ventanas > max_filas and i == n_ventanas - max_filas // 2:
+            print("   ...")
+        print(f"   {inicio:19s} {tabla['n'][i]:7d} {tabla['media'][i]:9.3f} {tabla['rms'][i]:9.3f}"
+              f" {tabla['std'][i]:9.3f} {tabla['thd'][i]:7.2f} {tabla['pico'][i]:7g}{unidad}")
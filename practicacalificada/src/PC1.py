@@ -1,97 +1,31 @@
-import csv
-from datetime import datetime
+import sys
 from pathlib import Path
-from statistics import mean
 
 # Configuración de rutas
 ROOT = Path(__file__).resolve().parents[1]
 IN_FILE = ROOT/"datos"/"raw"/"datos_sucios_250_v2.csv"
 OUT_FILE = ROOT/"datos"/"proccesing"/"Temperaturas_Procesado.csv"
 
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from comun.limpieza import limpiar_csv
+# Limpieza: separador ';', fechas ISO o dd/mm/aaaa, T(°C) = 18*V - 64 con 2 decimales
+# y alerta por temperatura > 40°C (la misma ConfigLimpieza de PC1_conDef.py)
+from PC1_conDef import CONFIG
+
 print("=== PROCESAMIENTO DE DATOS DE TEMPERATURA ===")
 print("Iniciando procesamiento de datos...")
+print("Procesando filas...")
+
+datos, estadisticas = limpiar_csv(IN_FILE, CONFIG, OUT_FILE)
 
-with open(IN_FILE, 'r', encoding="utf-8", newline="") as fin, \
-     open(OUT_FILE, "w", encoding="utf-8", newline="") as fout:
-    
-    reader = csv.DictReader(fin, delimiter=';')
-    writer = csv.DictWriter(fout, fieldnames=["Timestamp", "voltaje", "Temp_C", "Alertas"])
-    writer.writeheader()
-    
-    # Variables para estadísticas
-    total = kept = 0
-    bad_ts = bad_val = 0
-    voltajes = []
-    temperaturas = []
-    alertas_count = 0
-    
-    print("Procesando filas...")
-    
-    for row in reader:
-        total += 1
-        ts_raw = (row.get("timestamp") or "").strip()
-        val_raw = (row.get("value") or "").strip()
-        
-        # Limpiar y convertir valor numérico
-        val_raw = val_raw.replace(",", ".")
-        val_low = val_raw.lower()
-        
-        # Verificar valores inválidos
-        if val_low in {"", "na", "n/a", "nan", "null", "none", "error"}:
-            bad_val += 1
-            continue
-        
-        try:
-            val = float(val_raw)
-        except ValueError:
-            bad_val += 1
-            continue
-        
-        # Limpieza de timestamp
-        ts_clean = None
-        for fmt in ("%Y-%m-%dT%H:%M:%S", "%d/%m/%Y %H:%M:%S"):
-            try:
-                dt = datetime.strptime(ts_raw, fmt)
-                ts_clean = dt.strftime("%Y-%m-%dT%H:%M:%S")
-                break
-            except ValueError:
-                pass
-        
-        # Intentar con formato sin milisegundos
-        if ts_clean is None and "T" in ts_raw and len(ts_raw) >= 19:
-            try:
-                dt = datetime.strptime(ts_raw[:19], "%Y-%m-%dT%H:%M:%S")
-                ts_clean = dt.strftime("%Y-%m-%dT%H:%M:%S")
-            except ValueError:
-                pass
-        
-        if ts_clean is None:
-            bad_ts += 1
-            continue
-        
-        # Convertir voltaje a temperatura (T(°C) = 18*V - 64)
-        temperatura = 18 * val - 64
-        temperatura = round(temperatura, 2)  # 2 decimales
-        
-        # Generar alerta por temperatura > 40°C
-        if temperatura > 40:
-            alerta = "ALERTA"
-            alertas_count += 1
-        else:
-            alerta = "OK"
-        
-        # Guardar datos para estadísticas
-        voltajes.append(val)
-        temperaturas.append(temperatura)
-        kept += 1
-        
-        # Escribir fila procesada
-        writer.writerow({
-            "Timestamp": ts_clean,
-            "voltaje": f"{val:.2f}",
-            "Temp_C": f"{temperatura:.2f}",
-            "Alertas": alerta
-        })
+# Variables para estadísticas
+total, kept = estadisticas["total"], estadisticas["keep"]
+bad_ts, bad_val = estadisticas["bad_ts"], estadisticas["bad_val"]
+temperaturas = datos["Temp_C"]
+alertas_count = estadisticas["alertas_count"]
 
 # Estadísticas de calidad de datos
 descartes_totales = bad_ts + bad_val
@@ -114,9 +48,9 @@ if len(temperaturas) == 0:
 else:
     kpis_temperatura = {
         'n': len(temperaturas),
-        'min': round(min(temperaturas), 2),
-        "max": round(max(temperaturas), 2),
-        "prom": round(mean(temperaturas), 2),
+        'min': round(float(temperaturas.min()), 2),
+        "max": round(float(temperaturas.max()), 2),
+        "prom": round(sum(temperaturas.tolist()) / len(temperaturas), 2),
         "alertas": alertas_count,
         "alertas_pct": round(100.0 * alertas_count / len(temperaturas), 2),
     }
@@ -1,61 +1,38 @@
-import csv
-from datetime import datetime
+import argparse
+import sys
 from pathlib import Path
-from statistics import mean
 from typing import Dict, List, Tuple, Optional
 
+import numpy as np
+
 # Configuración de rutas
 ROOT = Path(__file__).resolve().parents[1]
 IN_FILE = ROOT/"datos"/"raw"/"datos_sucios_250_v2.csv"
 OUT_FILE = ROOT/"datos"/"proccesing"/"Temperaturas_Procesado.csv"
 
-def limpiar_valor_numerico(valor_raw: str) -> Optional[float]:
-    """
-    Limpia y convierte un valor string a float.
-    Returns None si el valor es inválido.
-    """
-    if not valor_raw:
-        return None
-    
-    valor_raw = valor_raw.replace(",", ".")
-    valor_low = valor_raw.lower().strip()
-    
-    # Verificar valores inválidos
-    if valor_low in {"", "na", "n/a", "nan", "null", "none", "error"}:
-        return None
-    
-    try:
-        return float(valor_raw)
-    except ValueError:
-        return None
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from comun.limpieza import (ConfigLimpieza, fmt_alerta, fmt_decimales, fmt_iso, guardar_csv,
+                            limpiar_csv, limpiar_valor_numerico, parcial_de, redondear)
+from comun.lotes import (combinar_contadores, combinar_parciales, ejecutar_en_paralelo,
+                         expandir_entradas, nombres_repetidos, resumir_parcial)
+from comun.tiempo import DMY, ISO, ParserTimestamps, iso_desde_ms
 
-def limpiar_timestamp(ts_raw: str) -> Optional[str]:
+def limpiar_timestamp(ts_raw: str, parser: Optional[ParserTimestamps] = None) -> Optional[str]:
     """
-    Limpia y estandariza el formato de timestamp.
+    Limpia y estandariza el formato de timestamp (ISO o dd/mm/aaaa).
+    El parser detecta el formato una vez por archivo; sin parser se crea uno nuevo.
     Returns None si el formato no es reconocido.
     """
-    if not ts_raw:
-        return None
-    
-    ts_raw = ts_raw.strip()
-    formatos = ["%Y-%m-%dT%H:%M:%S", "%d/%m/%Y %H:%M:%S"]
-    
-    for fmt in formatos:
-        try:
-            dt = datetime.strptime(ts_raw, fmt)
-            return dt.strftime("%Y-%m-%dT%H:%M:%S")
-        except ValueError:
-            continue
+    if parser is None:
+        parser = ParserTimestamps((ISO, DMY))
     
-    # Intentar con formato sin milisegundos
-    if "T" in ts_raw and len(ts_raw) >= 19:
-        try:
-            dt = datetime.strptime(ts_raw[:19], "%Y-%m-%dT%H:%M:%S")
-            return dt.strftime("%Y-%m-%dT%H:%M:%S")
-        except ValueError:
-            pass
-    
-    return None
+    ts_ms = parser.a_epoch_ms(ts_raw)
+    if ts_ms is None:
+        return None
+    return iso_desde_ms(ts_ms)
 
 def convertir_voltaje_a_temperatura(voltaje: float) -> float:
     """
@@ -73,7 +50,7 @@ def generar_alerta(temperatura: float) -> Tuple[str, bool]:
         return "ALERTA", True
     return "OK", False
 
-def procesar_fila(row: Dict) -> Optional[Dict]:
+def procesar_fila(row: Dict, parser: Optional[ParserTimestamps] = None) -> Optional[Dict]:
     """
     Procesa una fila individual de datos.
     Returns None si la fila debe ser descartada.
@@ -87,7 +64,7 @@ def procesar_fila(row: Dict) -> Optional[Dict]:
         return None
     
     # Limpiar timestamp
-    ts_clean = limpiar_timestamp(ts_raw)
+    ts_clean = limpiar_timestamp(ts_raw, parser)
     if ts_clean is None:
         return None
     
@@ -105,84 +82,65 @@ def procesar_fila(row: Dict) -> Optional[Dict]:
         "es_alerta": es_alerta
     }
 
-def procesar_archivo() -> Tuple[List[Dict], Dict]:
+def temperaturas_de(voltajes: np.ndarray) -> np.ndarray:
+    # convertir_voltaje_a_temperatura sobre un bloque completo
+    return redondear(18 * voltajes - 64, 2)
+
+def alertas_de(temperaturas: np.ndarray) -> np.ndarray:
+    # generar_alerta sobre un bloque completo
+    return temperaturas > 40
+
+# Configuración del motor de limpieza común (comun/limpieza.py)
+CONFIG = ConfigLimpieza(
+    delimitador=";",
+    formatos=(ISO, DMY),
+    transformar=temperaturas_de,
+    alerta=alertas_de,
+    nombre_valor="voltaje",
+    nombre_transformado="Temp_C",
+    salida=(("Timestamp", "ts_ms", fmt_iso),
+            ("voltaje", "voltaje", fmt_decimales(2)),
+            ("Temp_C", "Temp_C", fmt_decimales(2)),
+            ("Alertas", "es_alerta", fmt_alerta("ALERTA", "OK"))),
+)
+
+def procesar_archivo(in_file: Path = IN_FILE, out_file: Optional[Path] = None) -> Tuple[Dict[str, np.ndarray], Dict]:
     """
-    Procesa el archivo completo y retorna datos procesados y estadísticas.
+    Procesa el archivo completo por lotes y retorna datos procesados y estadísticas.
+    Los datos son columnas NumPy: ts_ms, voltaje, Temp_C y es_alerta.
+    Con out_file, la salida se escribe en la misma pasada.
     """
-    datos_procesados = []
-    estadisticas = {
-        "total": 0,
-        "keep": 0,
-        "bad_ts": 0,
-        "bad_val": 0,
-        "alertas_count": 0
-    }
-    
-    with open(IN_FILE, 'r', encoding="utf-8", newline="") as fin:
-        reader = csv.DictReader(fin, delimiter=';')
-        
-        for row in reader:
-            estadisticas["total"] += 1
-            
-            fila_procesada = procesar_fila(row)
-            
-            if fila_procesada is None:
-                # Determinar por qué se descartó
-                ts_raw = row.get("timestamp", "")
-                val_raw = row.get("value", "")
-                
-                if limpiar_valor_numerico(val_raw) is None:
-                    estadisticas["bad_val"] += 1
-                elif limpiar_timestamp(ts_raw) is None:
-                    estadisticas["bad_ts"] += 1
-                continue
-            
-            # Contar alertas
-            if fila_procesada["es_alerta"]:
-                estadisticas["alertas_count"] += 1
-            
-            # Remover campo temporal antes de guardar
-            fila_sin_es_alerta = {k: v for k, v in fila_procesada.items() if k != "es_alerta"}
-            datos_procesados.append(fila_sin_es_alerta)
-            estadisticas["keep"] += 1
-    
-    return datos_procesados, estadisticas
+    return limpiar_csv(in_file, CONFIG, out_file)
 
-def guardar_datos_procesados(datos_procesados: List[Dict]):
+def guardar_datos_procesados(datos_procesados: Dict[str, np.ndarray], out_file: Path = OUT_FILE):
     """
     Guarda los datos procesados en el archivo de salida.
     """
-    with open(OUT_FILE, "w", encoding="utf-8", newline="") as fout:
-        writer = csv.DictWriter(fout, fieldnames=["Timestamp", "voltaje", "Temp_C", "Alertas"])
-        writer.writeheader()
-        for fila in datos_procesados:
-            fila_para_escribir = {
-                "Timestamp": fila["Timestamp"],
-                "voltaje": f"{fila['voltaje']:.2f}", 
-                "Temp_C": f"{fila['Temp_C']:.2f}",
-                "Alertas": fila["Alertas"]
-            }
-            writer.writerow(fila_para_escribir)
+    guardar_csv(datos_procesados, out_file, CONFIG)
 
-def calcular_estadisticas(datos_procesados: List[Dict], estadisticas: Dict) -> Tuple[Dict, Dict]:
+def calcular_kpis_calidad(estadisticas: Dict) -> Dict:
     """
-    Calcula estadísticas de temperatura y calidad de datos.
+    KPIs de calidad de datos a partir de los contadores de procesamiento.
     """
-    # Extraer listas de voltajes y temperaturas
-    voltajes = [fila["voltaje"] for fila in datos_procesados]  
-    temperaturas = [fila["Temp_C"] for fila in datos_procesados]
-    
-    # Estadísticas de calidad de datos
     descartes_totales = estadisticas["bad_ts"] + estadisticas["bad_val"]
     pct_descartadas = (descartes_totales / estadisticas["total"] * 100.0) if estadisticas["total"] else 0.0
     
-    kpis_calidad = {
+    return {
         "filas_totales": estadisticas["total"],
         "filas_validas": estadisticas["keep"],
         "descartes_timestamp": estadisticas["bad_ts"],
         "descartes_valor": estadisticas["bad_val"],
         "%_descartadas": round(pct_descartadas, 2),
     }
+
+def calcular_estadisticas(datos_procesados: Dict[str, np.ndarray], estadisticas: Dict) -> Tuple[Dict, Dict]:
+    """
+    Calcula estadísticas de temperatura y calidad de datos.
+    """
+    temperaturas = datos_procesados["Temp_C"]
+    
+    # Estadísticas de calidad de datos
+    kpis_calidad = calcular_kpis_calidad(estadisticas)
     
     # Estadísticas de temperaturas
     if len(temperaturas) == 0:
@@ -193,16 +151,51 @@ def calcular_estadisticas(datos_procesados: List[Dict], estadisticas: Dict) -> T
     else:
         kpis_temperatura = {
             'n': len(temperaturas),
-            'min': round(min(temperaturas), 2),
-            "max": round(max(temperaturas), 2),
-            "prom": round(mean(temperaturas), 2),
+            'min': round(float(temperaturas.min()), 2),
+            "max": round(float(temperaturas.max()), 2),
+            "prom": round(sum(temperaturas.tolist()) / len(temperaturas), 2),
             "alertas": estadisticas["alertas_count"],
             "alertas_pct": round(100.0 * estadisticas["alertas_count"] / len(temperaturas), 2),
         }
     
     return kpis_calidad, kpis_temperatura
 
-def generar_informe(kpis_calidad: Dict, kpis_temperatura: Dict):
+def procesar_un_archivo(in_file: Path) -> Tuple[Dict, Dict]:
+    """
+    Unidad de trabajo del modo lote: procesa un archivo, guarda su salida y
+    retorna sus contadores y el parcial combinable de temperaturas.
+    """
+    out_file = OUT_FILE.parent / f"{Path(in_file).stem}_Procesado.csv"
+    datos_procesados, estadisticas = procesar_archivo(Path(in_file), out_file)
+    return estadisticas, parcial_de(datos_procesados["Temp_C"])
+
+def calcular_estadisticas_globales(resultados: List[Tuple[Dict, Dict]]) -> Tuple[Dict, Dict]:
+    """
+    Combina los contadores y parciales de todos los archivos del lote.
+    """
+    estadisticas = combinar_contadores(r[0] for r in resultados)
+    resumen = resumir_parcial(combinar_parciales(r[1] for r in resultados))
+    
+    kpis_calidad = calcular_kpis_calidad(estadisticas)
+    
+    if not resumen["n"]:
+        kpis_temperatura = {
+            "n": 0, "min": None, "max": None, "prom": None, 
+            "alertas": 0, "alertas_pct": 0.0
+        }
+    else:
+        kpis_temperatura = {
+            'n': resumen["n"],
+            'min': round(resumen["min"], 2),
+            "max": round(resumen["max"], 2),
+            "prom": round(resumen["media"], 2),
+            "alertas": estadisticas["alertas_count"],
+            "alertas_pct": round(100.0 * estadisticas["alertas_count"] / resumen["n"], 2),
+        }
+    
+    return kpis_calidad, kpis_temperatura
+
+def generar_informe(kpis_calidad: Dict, kpis_temperatura: Dict, entrada=IN_FILE, salida=OUT_FILE):
     """
     Genera y muestra el informe de resultados en pantalla.
     """
@@ -226,8 +219,8 @@ def generar_informe(kpis_calidad: Dict, kpis_temperatura: Dict):
     print(f"   • Porcentaje de alertas: {kpis_temperatura['alertas_pct']}%")
 
     print(f"\n💾 ARCHIVOS:")
-    print(f"   • Entrada: {IN_FILE}")
-    print(f"   • Salida: {OUT_FILE}")
+    print(f"   • Entrada: {entrada}")
+    print(f"   • Salida: {salida}")
 
     print(f"\n✅ PROCESAMIENTO COMPLETADO EXITOSAMENTE")
     print("="*60)
@@ -236,14 +229,34 @@ def main():
     """
     Función principal que coordina todo el procesamiento.
     """
+    parser = argparse.ArgumentParser(description="Procesamiento de datos de temperatura")
+    parser.add_argument("--batch", metavar="ENTRADA",
+                        help="directorio o glob de archivos crudos a procesar en paralelo")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="procesos del modo lote (por defecto, uno por núcleo)")
+    args = parser.parse_args()
+    
     print("=== PROCESAMIENTO DE DATOS DE TEMPERATURA ===")
     print("Iniciando procesamiento de datos...")
     
-    # Procesar archivo
-    datos_procesados, estadisticas = procesar_archivo()
+    # Modo lote: varios archivos en paralelo y un informe global
+    if args.batch:
+        archivos = expandir_entradas(args.batch)
+        # Las salidas se nombran por el archivo de entrada: dos con el mismo nombre se pisarían
+        repetidos = nombres_repetidos(archivos)
+        if repetidos:
+            print("Hay archivos con el mismo nombre en distintas carpetas (sus salidas se pisarían):")
+            for rutas in repetidos.values():
+                print("   " + ", ".join(str(r) for r in rutas))
+            return
+        print(f"Procesando {len(archivos)} archivos en paralelo...")
+        resultados = ejecutar_en_paralelo(procesar_un_archivo, archivos, args.workers)
+        kpis_calidad, kpis_temperatura = calcular_estadisticas_globales(resultados)
+        generar_informe(kpis_calidad, kpis_temperatura, entrada=args.batch, salida=OUT_FILE.parent)
+        return
     
-    # Guardar datos
-    guardar_datos_procesados(datos_procesados)
+    # Procesar archivo y guardar datos (una sola pasada)
+    datos_procesados, estadisticas = procesar_archivo(IN_FILE, OUT_FILE)
     
     # Calcular estadísticas
     kpis_calidad, kpis_temperatura = calcular_estadisticas(datos_procesados, estadisticas)
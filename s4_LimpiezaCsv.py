@@ -7,9 +7,14 @@
 # - filas inválidas: se saltan
 
 #para lectura de varios archivos se usa el For y tambien el comando *.csv
-import csv
-from datetime import datetime
+import argparse
+from functools import partial
 from pathlib import Path #importo el comando path (busca el lugar del codigo)
+from comun.limpieza import ConfigLimpieza, fmt_decimales, fmt_iso, limpiar_csv, parcial_de
+from comun.lotes import (combinar_contadores, combinar_parciales,
+                         ejecutar_en_paralelo, expandir_entradas, resumir_parcial)
+from comun.tiempo import DMY, ISO
+from comun.ventanas import duracion_ms, guardar_tabla_ventanas, imprimir_tabla_ventanas, kpis_por_ventana
 
 
 #Path - ruta de acceso
@@ -17,47 +22,57 @@ ROOT = Path(__file__).resolve().parents[0]  # sube desde src/ a la raíz del pro
 TXT  = ROOT / "archivos"
 IN_FILE=TXT / "voltajes_250_sucio.csv" #archivo de Ingreso
 OUT_FILE=TXT /"Volajes_250_limpio.csv" #archivo de Salida
-#apertura de archivos
-with open(IN_FILE,'r', encoding="utf-8", newline="") as fin,\
-    open(OUT_FILE, "w", encoding="utf-8", newline="") as fout:
-    reader = csv.DictReader(fin, delimiter=';')       # usa ',' si tu archivo lo requiere
-    writer = csv.DictWriter(fout, fieldnames=["timestamp", "value"]) #crea el archivo y su cabera
-    writer.writeheader()
-#leer linea por lineal y seleccionar en crudo raw 
-    total = kept = 0
-    for row in reader:
-        total += 1
-        ts_raw  = (row.get("timestamp") or "").strip()
-        val_raw = (row.get("value") or "").strip()
-#limpiar datos
-        val_raw = val_raw.replace(",", ".")
-        val_low = val_raw.lower()
-        if val_low in {"", "na", "n/a", "nan", "null", "none", "error"}:
-            continue  # saltar fila
-        try:
-            val = float(val_raw)
-        except ValueError:
-            continue  # saltar fila si no es número
-#limpieza de datos de tiempo 
-        ts_clean = None
-        for fmt in ("%Y-%m-%dT%H:%M:%S", "%d/%m/%Y %H:%M:%S"):
-            try:
-                dt = datetime.strptime(ts_raw, fmt)
-                ts_clean = dt.strftime("%Y-%m-%dT%H:%M:%S")
-                break
-            except ValueError:
-                pass
-#milisegundo (opcional)
-        if ts_clean is None and "T" in ts_raw and len(ts_raw) >= 19:
-            try:
-                dt = datetime.strptime(ts_raw[:19], "%Y-%m-%dT%H:%M:%S")
-                ts_clean = dt.strftime("%Y-%m-%dT%H:%M:%S")
-            except ValueError:
-                ts_clean = None
-
-        if ts_clean is None:
-            continue  # saltar fila si no pudimos interpretar la fecha
-
-#grabar datos en writer
-        writer.writerow({"timestamp": ts_clean, "value": f"{val:.2f}"})
-        kept += 1 #sume 1 kept, en nuestro caso cambia de fila
\ No newline at end of file
+ANCHO_BIN_V = 0.5 #ancho del bin (V) para el voltaje más frecuente de cada ventana
+
+#limpieza con el motor común (comun/limpieza.py): separador ';', fechas ISO o dd/mm/aaaa,
+#valores con coma decimal o NA se corrigen/saltan, salida timestamp,value con 2 decimales
+CONFIG = ConfigLimpieza(
+    delimitador=";",  # usa ',' si tu archivo lo requiere
+    formatos=(ISO, DMY),
+    salida=(("timestamp", "ts_ms", fmt_iso), ("value", "valor", fmt_decimales(2))),
+)
+
+#apertura de archivos, lectura por bloques y escritura en una sola pasada
+#ventanas=(ancho_ms, paso_ms): además guarda los KPIs por ventana en <salida>_ventanas.csv
+def limpiar_archivo(in_file=IN_FILE, out_file=OUT_FILE, ventanas=None, mostrar=False):
+    datos, estadisticas = limpiar_csv(in_file, CONFIG, out_file)
+    parcial = parcial_de(datos["valor"]) #conteo, media, m2, suma de cuadrados, min y max de los voltajes
+    if ventanas is not None:
+        tabla = kpis_por_ventana(datos["ts_ms"], datos["valor"], *ventanas, ancho_bin=ANCHO_BIN_V)
+        guardar_tabla_ventanas(tabla, Path(out_file).with_name(f"{Path(out_file).stem}_ventanas.csv"))
+        if mostrar:
+            imprimir_tabla_ventanas(tabla, " V")
+    return estadisticas, parcial
+
+#modo lote: cada archivo se limpia en un proceso distinto
+def limpiar_un_archivo(in_file, ventanas=None):
+    in_file = Path(in_file)
+    return limpiar_archivo(in_file, in_file.with_name(f"{in_file.stem}_limpio.csv"), ventanas)
+
+def informe_lote(entrada, resultados):
+    estadisticas = combinar_contadores(r[0] for r in resultados)
+    resumen = resumir_parcial(combinar_parciales(r[1] for r in resultados))
+    print(f"Archivos procesados: {len(resultados)} ({entrada})")
+    print(f"Filas totales: {estadisticas.get('total', 0)}  válidas: {estadisticas.get('keep', 0)}"
+          f"  bad_ts: {estadisticas.get('bad_ts', 0)}  bad_val: {estadisticas.get('bad_val', 0)}")
+    if resumen["n"]:
+        print(f"Voltaje min: {resumen['min']:.3f}  max: {resumen['max']:.3f}"
+              f"  prom: {resumen['media']:.3f}  std: {resumen['std']:.3f}  rms: {resumen['rms']:.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Limpieza de CSV de voltajes")
+    parser.add_argument("--batch", metavar="ENTRADA", help="directorio o glob (*.csv) de archivos sucios")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--ventana", help="KPIs por ventana de tiempo: 60, 30s, 5min, 1h...")
+    parser.add_argument("--paso", help="paso de ventanas deslizantes (por defecto = ventana, fijas)")
+    args = parser.parse_args()
+    ventanas = None
+    if args.ventana:
+        ventanas = (duracion_ms(args.ventana), duracion_ms(args.paso) if args.paso else None)
+
+    if args.batch:
+        archivos = [a for a in expandir_entradas(args.batch) if not a.stem.endswith("_limpio")]
+        informe_lote(args.batch, ejecutar_en_paralelo(partial(limpiar_un_archivo, ventanas=ventanas),
+                                                      archivos, args.workers))
+    else:
+        limpiar_archivo(ventanas=ventanas, mostrar=True)
@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "PID"))
+
+from protocolo import TAM_TRAMA, DecodificadorBinario, armar_trama
+
+
+def test_trama_valida():
+    decodificador = DecodificadorBinario()
+    assert decodificador.decodificar(armar_trama(7, 1.5, 2.25)) == [(7, 1.5, 2.25)]
+    assert (decodificador.tramas_ok, decodificador.tramas_invalidas, decodificador.muestras_perdidas) == (1, 0, 0)
+    assert decodificador.pendiente == b""
+
+
+def test_crc_corrupto_se_descarta_y_resincroniza():
+    corrupta = bytearray(armar_trama(1, 3.0, 4.0))
+    corrupta[-1] ^= 0xFF
+    datos = armar_trama(0, 1.0, 2.0) + bytes(corrupta) + armar_trama(2, 5.0, 6.0)
+
+    decodificador = DecodificadorBinario()
+    assert decodificador.decodificar(datos) == [(0, 1.0, 2.0), (2, 5.0, 6.0)]
+    assert decodificador.tramas_invalidas == 1
+    assert decodificador.bytes_descartados == TAM_TRAMA
+    # La trama descartada deja un salto de secuencia
+    assert decodificador.muestras_perdidas == 1
+
+
+def test_trama_partida_entre_lecturas():
+    datos = armar_trama(10, 1.0, 2.0) + armar_trama(11, 3.0, 4.0)
+    decodificador = DecodificadorBinario()
+
+    assert decodificador.decodificar(datos[:TAM_TRAMA + 5]) == [(10, 1.0, 2.0)]
+    assert len(decodificador.pendiente) == 5
+    assert decodificador.decodificar(datos[TAM_TRAMA + 5:]) == [(11, 3.0, 4.0)]
+    assert decodificador.pendiente == b""
+    assert (decodificador.tramas_invalidas, decodificador.muestras_perdidas) == (0, 0)
+
+
+def test_vuelta_del_contador_de_secuencia():
+    decodificador = DecodificadorBinario()
+    primeras = decodificador.decodificar(armar_trama(65534, 0.0, 0.0) + armar_trama(65535, 0.0, 0.0))
+    siguientes = decodificador.decodificar(armar_trama(0, 0.0, 0.0) + armar_trama(2, 0.0, 0.0))
+
+    assert [m[0] for m in primeras + siguientes] == [65534, 65535, 65536, 65538]
+    assert decodificador.muestras_perdidas == 1
@@ -0,0 +1,108 @@
+import json
+import math
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "ProyectoFinal" / "src"))
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+
+import PythonAnalisis as pa
+from comun.columnar import leer_columnar
+from comun.lotes import agregar_valor, combinar_parciales, nuevo_parcial, resumir_parcial
+
+SENSOR = ROOT / "ProyectoFinal" / "datos" / "raw" / "sensor_data.csv"
+
+
+def procesar_en_serie(in_file, out_file):
+    estadisticas = pa.nuevas_estadisticas()
+    flujo = pa.guardar_salidas(pa.procesar_archivo(estadisticas, in_file), "ambos",
+                               out_file, out_file.with_suffix(".bin"))
+    return pa.calcular_estadisticas(flujo, estadisticas)
+
+
+def test_bloques_igual_que_serie(tmp_path):
+    kpis_serie = procesar_en_serie(SENSOR, tmp_path / "serie.csv")
+    resultados = pa.procesar_archivo_en_bloques(SENSOR, tmp_path / "bloques.csv", 2, "ambos")
+    kpis_bloques = pa.calcular_estadisticas_globales(resultados, unir_bloques=True)
+
+    assert len(resultados) > 1
+    assert (tmp_path / "bloques.csv").read_bytes() == (tmp_path / "serie.csv").read_bytes()
+    assert (tmp_path / "bloques.bin").read_bytes() == (tmp_path / "serie.bin").read_bytes()
+    assert kpis_bloques == kpis_serie
+
+
+def test_combinar_parciales_igual_que_welford():
+    rng = random.Random(0)
+    valores = [rng.gauss(1e6, 3.0) for _ in range(1000)]
+
+    serie = nuevo_parcial()
+    for x in valores:
+        agregar_valor(serie, x)
+
+    parciales = []
+    for inicio, fin in ((0, 1), (1, 250), (250, 250), (250, 999), (999, 1000)):
+        parcial = nuevo_parcial()
+        for x in valores[inicio:fin]:
+            agregar_valor(parcial, x)
+        parciales.append(parcial)
+    combinado = combinar_parciales(parciales)
+
+    esperado, obtenido = resumir_parcial(serie), resumir_parcial(combinado)
+    assert obtenido["n"] == esperado["n"]
+    assert (obtenido["min"], obtenido["max"]) == (esperado["min"], esperado["max"])
+    for clave in ("media", "std", "std_poblacional", "rms"):
+        assert abs(obtenido[clave] - esperado[clave]) <= 1e-9 * abs(esperado[clave])
+
+
+def test_incremental_igual_que_una_corrida(tmp_path):
+    lineas = SENSOR.read_text(encoding="utf-8").splitlines(keepends=False)
+    completo = tmp_path / "completo.csv"
+    completo.write_text("".join(l + "\n" for l in lineas), encoding="utf-8")
+    kpis_serie = procesar_en_serie(completo, tmp_path / "serie.csv")
+
+    # Corte a mitad de un evento de alerta (todas las filas son válidas: fila i = línea i),
+    # luego el resto anexado y una segunda corrida incremental
+    alertas = [f["Estado"] == "ALERT" for f in pa.procesar_archivo(pa.nuevas_estadisticas(), completo)]
+    assert len(alertas) == len(lineas)
+    mitad = next(i for i in range(len(lineas) // 2, len(lineas)) if alertas[i - 1] and alertas[i])
+    creciente = tmp_path / "creciente.csv"
+    creciente.write_text("".join(l + "\n" for l in lineas[:mitad]), encoding="utf-8")
+    checkpoint = tmp_path / "checkpoint.json"
+    pa.procesar_incremental(creciente, tmp_path / "incremental.csv", "ambos", checkpoint)
+    with open(creciente, "a", encoding="utf-8") as f:
+        f.write("".join(l + "\n" for l in lineas[mitad:]))
+    estadisticas, resumen, columnas = pa.procesar_incremental(creciente, tmp_path / "incremental.csv",
+                                                              "ambos", checkpoint)
+
+    assert len(columnas) == len(lineas) - mitad
+    assert (tmp_path / "incremental.csv").read_bytes() == (tmp_path / "serie.csv").read_bytes()
+    # El columnar anexado puede reservar capacidad extra: se comparan las columnas
+    incremental, serie = leer_columnar(tmp_path / "incremental.bin"), leer_columnar(tmp_path / "serie.bin")
+    assert incremental.keys() == serie.keys()
+    assert all(np.array_equal(incremental[c], serie[c]) for c in serie)
+    assert pa.calcular_kpis_desde_resumen(resumen, estadisticas) == kpis_serie
+
+
+def test_estado_del_acumulador_es_json_estandar():
+    vacio = pa.AcumuladorKPIs()
+    estado = json.loads(json.dumps(vacio.a_estado(), allow_nan=False))
+    assert estado["minimo"] is None and estado["maximo"] is None
+    restaurado = pa.AcumuladorKPIs.desde_estado(estado)
+    assert (restaurado.minimo, restaurado.maximo) == (math.inf, -math.inf)
+
+    acumulador = pa.AcumuladorKPIs().consumir([
+        {"Timestamp": 1000, "Distancia_cm": math.inf, "Estado": "NORMAL"},
+        {"Timestamp": 2000, "Distancia_cm": 20.0, "Estado": "ALERT"},
+    ])
+    estado = json.loads(json.dumps(acumulador.a_estado(), allow_nan=False))
+    restaurado = pa.AcumuladorKPIs.desde_estado(estado)
+    assert (restaurado.minimo, restaurado.maximo) == (20.0, math.inf)
+    assert restaurado.primera_fila["Distancia_cm"] == math.inf
+    assert [str(getattr(restaurado, c)) for c in pa.CAMPOS_FLOAT_ESTADO] == \
+        [str(getattr(acumulador, c)) for c in pa.CAMPOS_FLOAT_ESTADO]
@@ -0,0 +1,26 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from comun.seguimiento import seguir_lineas
+
+
+def test_rotacion_omite_el_encabezado_del_archivo_nuevo(tmp_path):
+    log = tmp_path / "log.csv"
+    log.write_text("ts_ms,dist_avg\n1000,40\n")
+    llamadas = []
+
+    def detener():
+        # Primera vez sin datos: se rota el archivo; la segunda, se termina
+        llamadas.append(1)
+        if len(llamadas) == 1:
+            os.rename(log, tmp_path / "log.1.csv")
+            log.write_text("ts_ms,dist_avg\n2000,50\n")
+        return len(llamadas) > 1
+
+    lineas = list(seguir_lineas(log, desde=len("ts_ms,dist_avg\n"), intervalo=0.01, usar_inotify=False,
+                                detener=detener, es_encabezado=lambda l: l.startswith("ts_ms")))
+    assert lineas == ["1000,40\n", "2000,50\n"]
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import matplotlib
+matplotlib.use("Agg")
+
+from comun.tokenizador import dividir_campos, separar_encabezado
+from PythonAnálisis import DataAnalyzer
+
+FILAS = [(1000, 40.0, "NORMAL"), (2000, 20.0, "ALERT"), (3000, 25.0, "ALERT"),
+         (4000, 50.0, "NORMAL"), (5000, 10.0, "ALERT"), (6000, 45.0, "NORMAL")]
+
+
+def escribir(path, salto):
+    lineas = ["ts_ms,distance,state"] + [f"{t},{d},{s}" for t, d, s in FILAS]
+    path.write_bytes(salto.join(lineas).encode() + salto.encode())
+    return path
+
+
+def test_dividir_campos_crlf():
+    nombres, resto = separar_encabezado(b"a;b\r\n1;x\r\n\r\n2;y\r\n3;z\r")
+    assert nombres == ["a", "b"]
+    assert dividir_campos(resto, 2) == [[b"1", b"2", b"3"], [b"x", b"y", b"z"]]
+
+
+def test_data_analyzer_crlf_igual_que_lf(tmp_path):
+    lf = DataAnalyzer(escribir(tmp_path / "lf.csv", "\n"), sin_pantalla=True)
+    crlf = DataAnalyzer(escribir(tmp_path / "crlf.csv", "\r\n"), sin_pantalla=True)
+    kpis = crlf.calculate_kpis()
+    assert kpis == lf.calculate_kpis()
+    assert kpis["percent_alert"] == 50.0
+    assert kpis["event_count"] == 2